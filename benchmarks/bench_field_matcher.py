@@ -0,0 +1,184 @@
+"""
+字段匹配基准测试
+在 10～1000 个属性的合成数据库结构上，对比旧的贪心匹配（逐字段扫描 + get_close_matches）
+与 field_matcher.match_fields（候选索引 + 类型打分 + 匈牙利算法）的耗时和匹配质量
+
+每个合成结构中埋入了一组"正确答案"属性（大小写/分隔符变化、拼写偏差、带干扰的相近名称），
+其余为随机名称和类型的填充属性；质量按与正确答案一致的字段数和写不进去的类型组合数统计
+
+用法: python benchmarks/bench_field_matcher.py [--sizes 10,50,100,250,500,1000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from difflib import get_close_matches
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from field_matcher import FIELD_CANDIDATES, match_fields, type_score  # noqa: E402
+
+# 埋入的属性: 属性名 → (类型, 应该匹配的字段；None 表示干扰项，不应被匹配)
+PLANTED_PROPERTIES = {
+    "Project": ("title", "name"),
+    "Full-Name": ("rich_text", "full_name"),
+    "Description": ("rich_text", "description"),
+    "Repository URL": ("url", "url"),
+    "Stargazer": ("number", "stars"),
+    "Language": ("select", "language"),
+    "Fork Count": ("number", "forks"),
+    "作者": ("rich_text", "owner"),
+    "Created At": ("date", "created_at"),
+    "Last Updated": ("date", "updated_at"),
+    "Open-Issue": ("number", "open_issues"),
+    "Tags": ("multi_select", "topics"),
+    "Licenses": ("rich_text", "license"),
+    "今日新增": ("number", "today_stars"),
+    "日期": ("date", "date"),
+    "AI总结": ("rich_text", "repo_detail"),
+    # 干扰项：名称相近但类型写不进去
+    "Stars Rollup": ("rollup", None),
+    "Created by": ("created_by", None),
+    "Forks Formula": ("formula", None),
+}
+
+FILLER_TYPES = ["rich_text", "number", "select", "multi_select", "date", "checkbox", "url",
+                "people", "relation", "formula", "files", "status"]
+FILLER_WORDS = ["owner notes", "priority", "status", "team", "sprint", "estimate", "reviewer",
+                "deadline", "category", "score", "budget", "region", "stage", "version", "channel",
+                "comment", "source", "target", "metric", "link", "project code", "issue key"]
+
+
+def make_schema(size, seed):
+    """生成 size 个属性的合成结构，返回 (properties, 正确答案 {字段: 属性名})"""
+    rng = random.Random(seed)
+    properties = {}
+    expected = {}
+    planted = list(PLANTED_PROPERTIES.items())
+    rng.shuffle(planted)
+    # 小结构只埋入一部分（保证有 title）
+    keep = planted if size >= len(planted) else (
+        [item for item in planted if item[1][0] == "title"] +
+        [item for item in planted if item[1][0] != "title"][:size - 1]
+    )
+    for name, (prop_type, field_key) in keep:
+        properties[name] = {"id": f"p{len(properties)}", "type": prop_type}
+        if field_key:
+            expected[field_key] = name
+
+    while len(properties) < size:
+        word = rng.choice(FILLER_WORDS)
+        name = f"{word.title()} {rng.randint(1, 99999)}"
+        if name not in properties:
+            properties[name] = {"id": f"p{len(properties)}", "type": rng.choice(FILLER_TYPES)}
+
+    items = list(properties.items())
+    rng.shuffle(items)
+    return dict(items), expected
+
+
+def match_fields_greedy(properties):
+    """旧版 auto_match_fields 的匹配逻辑（去掉输出），作为对照"""
+    field_mapping = {}
+    db_prop_names = list(properties.keys())
+    matched_notion_props = set()
+
+    for field_key, candidates in FIELD_CANDIDATES.items():
+        matched = None
+
+        for prop_name in db_prop_names:
+            if prop_name.lower() in [c.lower() for c in candidates] and prop_name not in matched_notion_props:
+                matched = prop_name
+                break
+
+        if not matched:
+            candidates_lower = [c.lower() for c in candidates]
+            for prop_name in db_prop_names:
+                if prop_name.lower() in candidates_lower and prop_name not in matched_notion_props:
+                    matched = prop_name
+                    break
+
+        if not matched and db_prop_names:
+            available_props = [n for n in db_prop_names if n not in matched_notion_props]
+            matches = get_close_matches(field_key, [n.lower() for n in available_props], n=1, cutoff=0.3)
+            if matches:
+                for prop_name in available_props:
+                    if prop_name.lower() == matches[0]:
+                        matched = prop_name
+                        break
+
+        if matched:
+            field_mapping[field_key] = matched
+            matched_notion_props.add(matched)
+    return field_mapping
+
+
+def match_fields_optimal(properties):
+    return {field_key: prop_name for field_key, (prop_name, _) in match_fields(properties).items()}
+
+
+def evaluate(mapping, properties, expected):
+    """返回 (与正确答案一致的字段数, 错配字段数, 写不进去的类型组合数)"""
+    correct = sum(1 for field_key, prop_name in mapping.items() if expected.get(field_key) == prop_name)
+    wrong = len(mapping) - correct
+    incompatible = sum(1 for field_key, prop_name in mapping.items()
+                       if not type_score(field_key, properties[prop_name].get("type", "")))
+    return correct, wrong, incompatible
+
+
+def measure(func, properties, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mapping = func(properties)
+        timings.append(time.perf_counter() - start)
+    return mapping, statistics.median(timings)
+
+
+def run(sizes, repeat, seed=7):
+    results = []
+    for size in sizes:
+        properties, expected = make_schema(size, seed + size)
+        old_mapping, old_time = measure(match_fields_greedy, properties, repeat)
+        new_mapping, new_time = measure(match_fields_optimal, properties, repeat)
+        old_correct, old_wrong, old_incompatible = evaluate(old_mapping, properties, expected)
+        new_correct, new_wrong, new_incompatible = evaluate(new_mapping, properties, expected)
+        results.append({
+            "size": size,
+            "expected": len(expected),
+            "old_ms": old_time * 1000,
+            "new_ms": new_time * 1000,
+            "old_correct": old_correct,
+            "new_correct": new_correct,
+            "old_wrong": old_wrong,
+            "new_wrong": new_wrong,
+            "old_incompatible": old_incompatible,
+            "new_incompatible": new_incompatible,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字段匹配基准测试")
+    parser.add_argument("--sizes", default="10,50,100,250,500,1000", help="属性数量，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=5, help="每个结构重复次数")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = run(sizes, args.repeat)
+
+    print(f"{'属性数':>6} {'应匹配':>6} {'旧(ms)':>9} {'新(ms)':>9} {'旧 正确/错配/类型不符':>22} {'新 正确/错配/类型不符':>22}")
+    print("-" * 82)
+    for r in results:
+        old_quality = f"{r['old_correct']}/{r['old_wrong']}/{r['old_incompatible']}"
+        new_quality = f"{r['new_correct']}/{r['new_wrong']}/{r['new_incompatible']}"
+        print(f"{r['size']:>6} {r['expected']:>6} {r['old_ms']:>9.2f} {r['new_ms']:>9.2f} "
+              f"{old_quality:>22} {new_quality:>22}")
+    print("-" * 82)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Notion属性构建基准测试
+对比旧的 build_notion_properties（每个仓库每个字段都走 if/elif 分派、重建选项字典）
+与编译后的序列化函数（notion_payload）构建大量仓库属性的耗时，并校验两者输出完全一致
+
+用法: python benchmarks/bench_notion_payload.py [--repos 5000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notion_payload import compile_property_serializers, serialize_properties  # noqa: E402
+
+# 覆盖所有属性类型的数据库结构和字段映射
+DB_PROPERTIES = {
+    "Name": {"type": "title"},
+    "Full Name": {"type": "rich_text"},
+    "Description": {"type": "rich_text"},
+    "URL": {"type": "url"},
+    "Stars": {"type": "number"},
+    "Language": {"type": "select", "select": {"options": [
+        {"id": str(i), "name": name} for i, name in enumerate(
+            ["Python", "Rust", "Go", "TypeScript", "JavaScript", "C++", "Java", "Zig"])
+    ]}},
+    "Forks": {"type": "number"},
+    "Owner": {"type": "text"},
+    "Created": {"type": "date"},
+    "Updated": {"type": "date"},
+    "Issues": {"type": "phone"},
+    "Tags": {"type": "multi_select", "multi_select": {"options": [
+        {"id": str(i), "name": f"topic-{i}"} for i in range(50)
+    ]}},
+    "License": {"type": "email"},
+    "今日新增": {"type": "number"},
+    "日期": {"type": "date"},
+    "仓库详情": {"type": "rich_text"},
+    "Archived": {"type": "checkbox"},
+}
+FIELD_MAPPING = {
+    "name": "Name", "full_name": "Full Name", "description": "Description", "url": "URL",
+    "stars": "Stars", "language": "Language", "forks": "Forks", "owner": "Owner",
+    "created_at": "Created", "updated_at": "Updated", "open_issues": "Issues", "topics": "Tags",
+    "license": "License", "today_stars": "今日新增", "date": "日期", "repo_detail": "仓库详情",
+    "archived": "Archived",
+}
+LANGUAGES = ["Python", "Rust", "Go", "TypeScript", "Kotlin", "", None]
+
+
+def make_repos(count, seed=11):
+    """生成覆盖各种取值（空值、超长文本、非数字、未知选项）的仓库数据"""
+    rng = random.Random(seed)
+    repos = []
+    for i in range(count):
+        owner = f"owner{i % 97}"
+        repos.append({
+            "name": f"repo-{i}",
+            "full_name": f"{owner}/repo-{i}",
+            "description": rng.choice([None, "", "A tool " * rng.randint(1, 400)]),
+            "url": f"https://github.com/{owner}/repo-{i}",
+            "stars": rng.choice([rng.randint(0, 200000), None, "1.2k"]),
+            "language": rng.choice(LANGUAGES),
+            "forks": rng.randint(0, 5000),
+            "owner": owner,
+            "created_at": rng.choice(["2024-01-02T03:04:05Z", "2024", None]),
+            "updated_at": "2026-10-01T00:00:00Z",
+            "open_issues": rng.choice([12, None]),
+            "topics": rng.choice([[f"topic-{rng.randint(0, 80)}" for _ in range(rng.randint(0, 14))], None, "cli"]),
+            "license": rng.choice(["MIT", "x@y.z", None]),
+            "today_stars": rng.choice([rng.randint(0, 3000), None]),
+            "date": rng.choice(["2026-10-16", None]),
+            "repo_detail": rng.choice([None, "项目简介" * rng.randint(1, 700)]),
+            "archived": rng.choice([True, False, None]),
+        })
+    return repos
+
+
+def build_properties_legacy(field_mapping, db_properties, repo):
+    """旧版 build_notion_properties（逐字段 if/elif 分派），作为对照"""
+    properties = {}
+
+    # 辅助函数：安全截断文本
+    def truncate_text(text, max_length=2000):
+        if not text:
+            return ""
+        text = str(text)
+        return text[:max_length] if len(text) > max_length else text
+
+    # 根据字段映射和属性类型构建数据
+    for field_key, notion_prop_name in field_mapping.items():
+        prop_type = db_properties[notion_prop_name].get("type")
+        value = repo.get(field_key)
+
+        # 跳过空值（除了date和today_stars，它们有默认值）
+        if value is None and field_key not in ["date", "today_stars"]:
+            continue
+
+        # 根据Notion属性类型设置值
+        if prop_type == "title":
+            properties[notion_prop_name] = {
+                "title": [{"text": {"content": truncate_text(value, 2000)}}]
+            }
+
+        elif prop_type == "rich_text":
+            # rich_text 可以存储字符串
+            text_content = truncate_text(value, 2000) if value else ""
+            properties[notion_prop_name] = {
+                "rich_text": [{"text": {"content": text_content}}]
+            }
+
+        elif prop_type == "text":
+            properties[notion_prop_name] = {
+                "text": {"content": truncate_text(value, 2000)}
+            }
+
+        elif prop_type == "number" and isinstance(value, (int, float)):
+            properties[notion_prop_name] = {"number": value}
+
+        elif prop_type == "url":
+            properties[notion_prop_name] = {"url": value}
+
+        elif prop_type == "date":
+            # 只有当值是日期格式时才使用date类型
+            if isinstance(value, str) and len(value) >= 10:
+                properties[notion_prop_name] = {"date": {"start": value}}
+
+        elif prop_type == "email" and "@" in str(value):
+            properties[notion_prop_name] = {"email": str(value)}
+
+        elif prop_type == "phone":
+            properties[notion_prop_name] = {"phone_number": str(value)}
+
+        elif prop_type == "checkbox":
+            properties[notion_prop_name] = {"checkbox": bool(value)}
+
+        elif prop_type == "multi_select" and field_key == "topics" and isinstance(value, list):
+            # 处理topics标签
+            options = db_properties[notion_prop_name].get("multi_select", {}).get("options", [])
+            existing_options = {opt["name"]: opt["id"] for opt in options}
+
+            selects = []
+            for item in value[:10]:  # 最多10个标签
+                item_str = str(item)
+                if item_str in existing_options:
+                    selects.append({"name": item_str})
+                else:
+                    # 对于不存在的选项，Notion会忽略
+                    selects.append({"name": item_str})
+
+            if selects:
+                properties[notion_prop_name] = {"multi_select": selects}
+
+        elif prop_type == "select" and value:
+            # 处理单选
+            value_str = truncate_text(value, 100)
+            options = db_properties[notion_prop_name].get("select", {}).get("options", [])
+            existing_options = {opt["name"]: opt["id"] for opt in options}
+
+            if value_str in existing_options:
+                properties[notion_prop_name] = {"select": {"name": value_str}}
+
+    return properties
+
+
+def build_compiled(field_mapping, db_properties, repos):
+    compiled = compile_property_serializers(field_mapping, db_properties)
+    return [serialize_properties(compiled, repo) for repo in repos]
+
+
+def build_legacy(field_mapping, db_properties, repos):
+    return [build_properties_legacy(field_mapping, db_properties, repo) for repo in repos]
+
+
+def measure(func, repos, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(FIELD_MAPPING, DB_PROPERTIES, repos)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), min(timings)
+
+
+def run(repo_count, repeat):
+    repos = make_repos(repo_count)
+    if build_legacy(FIELD_MAPPING, DB_PROPERTIES, repos) != build_compiled(FIELD_MAPPING, DB_PROPERTIES, repos):
+        raise AssertionError("新旧属性构建结果不一致")
+    old_median, old_best = measure(build_legacy, repos, repeat)
+    new_median, new_best = measure(build_compiled, repos, repeat)
+    return {
+        "repos": repo_count,
+        "old_ms": old_median * 1000,
+        "new_ms": new_median * 1000,
+        "old_best_ms": old_best * 1000,
+        "new_best_ms": new_best * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notion属性构建基准测试")
+    parser.add_argument("--repos", type=int, default=5000, help="仓库数量")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    r = run(args.repos, args.repeat)
+    speedup = r["old_ms"] / r["new_ms"] if r["new_ms"] else 0
+    print(f"{'仓库数':>6} {'旧(ms)':>9} {'新(ms)':>9} {'旧最快':>9} {'新最快':>9} {'加速':>6}")
+    print("-" * 56)
+    print(f"{r['repos']:>6} {r['old_ms']:>9.2f} {r['new_ms']:>9.2f} {r['old_best_ms']:>9.2f} "
+          f"{r['new_best_ms']:>9.2f} {speedup:>5.1f}x")
+    print("-" * 56)
+    print("✓ 新旧属性构建结果一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Trending页面解析基准测试
+对比旧路径（BeautifulSoup 整页解析 + parse_repo_article_soup）与
+新路径（TrendingPageExtractor + parse_repo_fields）的单页耗时和峰值内存，
+并校验两条路径输出完全一致
+
+用法: python benchmarks/bench_trending_parse.py [--repeat 20] [--limit 10]
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from github_trending_notion import GitHubTrendingToNotion, TrendingPageExtractor  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def parse_old(bot, html, limit):
+    soup = BeautifulSoup(html, 'html.parser')
+    articles = soup.find_all('article', class_='Box-row')
+    return [repo for repo in (bot.parse_repo_article_soup(a) for a in articles[:limit]) if repo]
+
+
+def parse_new(bot, html, limit):
+    articles = TrendingPageExtractor().extract(html, limit=limit)
+    return [repo for repo in (bot.parse_repo_fields(f) for f in articles) if repo]
+
+
+def measure(func, bot, html, limit, repeat):
+    """返回 (耗时中位数秒, 最快秒, 峰值内存字节)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(bot, html, limit)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(bot, html, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), min(timings), peak
+
+
+def run(repeat, limit, fixtures=None):
+    bot = GitHubTrendingToNotion()
+    fixtures = fixtures or sorted(glob.glob(os.path.join(FIXTURES_DIR, "trending_*.html")))
+    results = []
+    for path in fixtures:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+
+        old_repos = parse_old(bot, html, limit)
+        new_repos = parse_new(bot, html, limit)
+        if old_repos != new_repos:
+            raise AssertionError(f"{os.path.basename(path)}: 新旧解析结果不一致")
+
+        old_median, old_best, old_peak = measure(parse_old, bot, html, limit, repeat)
+        new_median, new_best, new_peak = measure(parse_new, bot, html, limit, repeat)
+        results.append({
+            "fixture": os.path.basename(path),
+            "size_kb": len(html.encode("utf-8")) // 1024,
+            "repos": len(new_repos),
+            "old_ms": old_median * 1000,
+            "new_ms": new_median * 1000,
+            "old_best_ms": old_best * 1000,
+            "new_best_ms": new_best * 1000,
+            "old_peak_kb": old_peak / 1024,
+            "new_peak_kb": new_peak / 1024,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trending页面解析基准测试")
+    parser.add_argument("--repeat", type=int, default=20, help="每个样本重复次数")
+    parser.add_argument("--limit", type=int, default=10, help="每页解析的项目数（与 get_trending_repos 一致）")
+    args = parser.parse_args()
+
+    # 使用独立的缓存目录，不在正式运行的 .cache 下创建缓存数据库
+    bench_cache = tempfile.mkdtemp(prefix="bench_cache_")
+    os.environ["CACHE_DIR"] = bench_cache
+    os.environ["NOTION_SCHEMA_CACHE_FILE"] = os.path.join(bench_cache, "notion_schema_cache.json")
+    try:
+        results = run(args.repeat, args.limit)
+    finally:
+        shutil.rmtree(bench_cache, ignore_errors=True)
+
+    print(f"{'样本':32} {'大小':>7} {'项目':>4} {'旧(ms)':>9} {'新(ms)':>9} {'加速':>6} {'旧峰值(KB)':>11} {'新峰值(KB)':>11}")
+    print("-" * 98)
+    for r in results:
+        speedup = r["old_ms"] / r["new_ms"] if r["new_ms"] else 0
+        print(f"{r['fixture']:32} {r['size_kb']:>5}KB {r['repos']:>4} {r['old_ms']:>9.2f} {r['new_ms']:>9.2f} "
+              f"{speedup:>5.1f}x {r['old_peak_kb']:>11.0f} {r['new_peak_kb']:>11.0f}")
+    print("-" * 98)
+    print("✓ 新旧解析结果一致")
+
+
+if __name__ == "__main__":
+    main()
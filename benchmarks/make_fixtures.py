@@ -0,0 +1,206 @@
+"""
+生成基准测试用的 GitHub Trending 页面样本
+页面结构参照 github.com/trending 的真实标记（Box-row 文章 + 大量页头页尾和脚本），
+使用固定随机种子，重复运行得到完全相同的文件
+"""
+
+import os
+import random
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+LANGUAGES = [
+    ("Python", "#3572A5"), ("TypeScript", "#3178c6"), ("Rust", "#dea584"), ("Go", "#00ADD8"),
+    ("JavaScript", "#f1e05a"), ("C++", "#f34b7d"), ("Java", "#b07219"), ("Jupyter Notebook", "#DA5B0B"),
+    ("Shell", "#89e051"), ("Kotlin", "#A97BFF"), ("Swift", "#F05138"), ("Zig", "#ec915c"),
+]
+
+WORDS = (
+    "fast local agent framework llm vector database tool cli runtime open source self-hosted "
+    "terminal ui workflow automation inference model server browser rust python plugin "
+    "lightweight modern privacy first sync editor compiler"
+).split()
+
+STAR_SVG = (
+    '<svg aria-label="star" role="img" height="16" viewBox="0 0 16 16" version="1.1" width="16" '
+    'data-view-component="true" class="octicon octicon-star"><path d="M8 .25a.75.75 0 0 1 .673.418l1.882 '
+    '3.815 4.21.612a.75.75 0 0 1 .416 1.279l-3.046 2.97.719 4.192a.751.751 0 0 1-1.088.791L8 12.347l-3.766 '
+    '1.98a.75.75 0 0 1-1.088-.79l.72-4.194L.818 6.374a.75.75 0 0 1 .416-1.28l4.21-.611L7.327.668A.75.75 0 0 1 8 .25Z"></path></svg>'
+)
+FORK_SVG = (
+    '<svg aria-label="fork" role="img" height="16" viewBox="0 0 16 16" version="1.1" width="16" '
+    'data-view-component="true" class="octicon octicon-repo-forked"><path d="M5 5.372v.878c0 .414.336.75.75.75h4.5a.75.75 '
+    '0 0 0 .75-.75v-.878a2.25 2.25 0 1 1 1.5 0v.878a2.25 2.25 0 0 1-2.25 2.25h-1.5v2.128a2.251 2.251 0 1 1-1.5 '
+    '0V8.5h-1.5A2.25 2.25 0 0 1 3.5 6.25v-.878a2.25 2.25 0 1 1 1.5 0Z"></path></svg>'
+)
+REPO_SVG = (
+    '<svg aria-hidden="true" height="16" viewBox="0 0 16 16" version="1.1" width="16" data-view-component="true" '
+    'class="octicon octicon-repo mr-1 color-fg-muted"><path d="M2 2.5A2.5 2.5 0 0 1 4.5 0h8.75a.75.75 0 0 1 .75.75v12.5a.75.75 '
+    '0 0 1-.75.75h-2.5a.75.75 0 0 1 0-1.5h1.75v-2h-8a1 1 0 0 0-.714 1.7.75.75 0 1 1-1.072 1.05A2.495 2.495 0 0 1 2 11.5Z"></path></svg>'
+)
+
+
+def format_count(rng, low, high):
+    return f"{rng.randint(low, high):,}"
+
+
+def make_article(rng, index, period_word):
+    owner = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}{index}"
+    repo = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}"
+    href = f"/{owner}/{repo}"
+    description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 22))).capitalize()
+    if index % 7 == 0:
+        description += " &amp; more"
+    language, color = rng.choice(LANGUAGES)
+    built_by = "".join(
+        f'\n          <a class="d-inline-block" data-hydro-click="{{&quot;event_type&quot;:&quot;explore.click&quot;,'
+        f'&quot;payload&quot;:{{&quot;click_context&quot;:&quot;TRENDING_REPOSITORIES_PAGE&quot;}}}}" '
+        f'href="/contrib{index}x{k}"><img class="avatar mb-1 avatar-user" src="https://avatars.githubusercontent.com/u/{rng.randint(1000, 9999999)}?s=40&amp;v=4" '
+        f'width="20" height="20" alt="@contrib{index}x{k}" /></a>'
+        for k in range(rng.randint(1, 5))
+    )
+
+    language_block = ""
+    if index % 9 != 4:  # 部分项目没有语言标记
+        language_block = f"""
+        <span class="d-inline-block ml-0 mr-3">
+  <span class="repo-language-color" style="background-color: {color}"></span>
+  <span itemprop="programmingLanguage">{language}</span>
+</span>
+"""
+
+    description_block = ""
+    if index % 11 != 6:  # 部分项目没有描述
+        description_block = f"""
+  <p class="col-9 color-fg-muted my-1 tmp-pr-4">
+    {description}
+  </p>
+"""
+
+    return f"""
+    <article class="Box-row">
+      <div class="float-right d-flex">
+          <div data-view-component="true" class="js-toggler-container js-social-container starring-container d-flex">
+    <div data-view-component="true" class="starred BlankslateBtnGroup">
+      <form class="js-social-form" data-turbo="false" action="{href}/unstar" accept-charset="UTF-8" method="post">
+        <input type="hidden" name="authenticity_token" value="{rng.getrandbits(128):032x}" autocomplete="off" />
+        <button data-hydro-click="{{&quot;event_type&quot;:&quot;repository.click&quot;}}" type="submit" data-view-component="true" class="rounded-left-2 btn-sm btn BtnGroup-item">
+          {STAR_SVG}<span data-view-component="true">Starred</span>
+        </button>
+      </form>
+    </div>
+    <div data-view-component="true" class="unstarred BtnGroup">
+      <a href="/login?return_to={href}" rel="nofollow" data-view-component="true" class="tooltipped tooltipped-s btn-sm btn">
+        {STAR_SVG}<span data-view-component="true" class="d-inline">Star</span>
+      </a>
+    </div>
+</div>
+      </div>
+
+  <h2 class="h3 lh-condensed">
+    <a data-hydro-click="{{&quot;event_type&quot;:&quot;explore.click&quot;,&quot;payload&quot;:{{&quot;click_context&quot;:&quot;TRENDING_REPOSITORIES_PAGE&quot;,&quot;click_target&quot;:&quot;REPOSITORY&quot;}}}}" data-hydro-click-hmac="{rng.getrandbits(256):064x}" href="{href}" data-view-component="true" class="Link">
+      {REPO_SVG}
+      <span data-view-component="true" class="text-normal">
+        {owner} /
+</span>
+      {repo}
+</a>  </h2>
+{description_block}
+  <div class="f6 color-fg-muted mt-2">
+{language_block}
+        <a href="{href}/stargazers" data-view-component="true" class="Link Link--muted d-inline-block mr-3">
+          {STAR_SVG}
+          {format_count(rng, 200, 250000)}
+</a>
+        <a href="{href}/forks" data-view-component="true" class="Link Link--muted d-inline-block mr-3">
+          {FORK_SVG}
+          {format_count(rng, 5, 40000)}
+</a>
+        <span data-view-component="true" class="d-inline-block mr-3">
+          Built by
+{built_by}
+</span>
+        <span data-view-component="true" class="d-inline-block float-sm-right">
+          {STAR_SVG}
+          {format_count(rng, 10, 4000) if index % 5 else rng.randint(10, 999)} stars {period_word}
+</span>
+  </div>
+</article>"""
+
+
+def make_boilerplate(rng, blocks):
+    """模拟页头导航、内联脚本、页脚等与项目无关的标记"""
+    parts = []
+    for i in range(blocks):
+        parts.append(
+            f'<div class="HeaderMenu-item" data-menu-item="i{i}"><a class="HeaderMenu-link" href="/features/{rng.choice(WORDS)}">'
+            f'{STAR_SVG}<span class="text-bold">{rng.choice(WORDS).title()}</span>'
+            f'<span class="color-fg-subtle">{" ".join(rng.choice(WORDS) for _ in range(8))}</span></a></div>'
+        )
+        if i % 10 == 0:
+            parts.append(
+                '<script type="application/json" id="client-env">'
+                + '{"locale":"en","featureFlags":[' + ",".join(f'"{rng.choice(WORDS)}_{k}"' for k in range(40)) + ']}'
+                + "</script>"
+            )
+    return "\n".join(parts)
+
+
+def make_page(seed, count, period_word, title):
+    rng = random.Random(seed)
+    header = make_boilerplate(rng, 180)
+    footer = make_boilerplate(rng, 120)
+    articles = "".join(make_article(rng, i, period_word) for i in range(count))
+    return f"""<!DOCTYPE html>
+<html lang="en" data-color-mode="auto" data-light-theme="light" data-dark-theme="dark">
+<head>
+  <meta charset="utf-8">
+  <title>{title}</title>
+  <link crossorigin="anonymous" media="all" rel="stylesheet" href="https://github.githubassets.com/assets/primer.css" />
+  <script crossorigin="anonymous" defer="defer" type="application/javascript" src="https://github.githubassets.com/assets/wp-runtime.js"></script>
+</head>
+<body class="logged-out env-production page-responsive">
+<header class="HeaderMktg header-logged-out">
+{header}
+</header>
+<main>
+  <div class="application-main">
+    <div class="Box">
+      <div class="Box-header d-md-flex flex-items-center flex-justify-between">
+        <nav class="subnav mb-0" aria-label="Trending">
+          <a class="js-selected-navigation-item selected subnav-item" href="/trending">Repositories</a>
+          <a class="js-selected-navigation-item subnav-item" href="/trending/developers">Developers</a>
+        </nav>
+      </div>
+      <div data-hpc>
+{articles}
+      </div>
+    </div>
+  </div>
+</main>
+<footer class="footer">
+{footer}
+</footer>
+</body>
+</html>
+"""
+
+
+FIXTURES = {
+    "trending_daily.html": (20260101, 25, "today", "Trending repositories on GitHub today"),
+    "trending_weekly_python.html": (20260102, 25, "this week", "Trending Python repositories on GitHub this week"),
+    "trending_monthly_rust.html": (20260103, 25, "this month", "Trending Rust repositories on GitHub this month"),
+}
+
+
+def main():
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for filename, (seed, count, period_word, title) in FIXTURES.items():
+        path = os.path.join(FIXTURES_DIR, filename)
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(make_page(seed, count, period_word, title))
+        print(f"已生成 {path} ({os.path.getsize(path) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
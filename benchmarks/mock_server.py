@@ -0,0 +1,617 @@
+"""
+本地模拟服务
+在本机启动 GitHub 网页 / raw / API、Notion API 和火山引擎（OpenAI 兼容 chat completions）的替身，
+可注入延迟、429（带 Retry-After）、5xx 和慢速响应体，用于离线压测完整的同步流程
+
+Trending 页面由 make_fixtures.make_page 生成（与解析基准测试同一套标记），
+README 和 Notion 数据库结构取自 fixtures/readme.md、fixtures/notion_schema.json
+
+用法:
+  python benchmarks/mock_server.py --repos 100                      # 启动并打印需要设置的环境变量
+  python benchmarks/mock_server.py --repos 1000 --run               # 启动后直接运行一次同步并计时
+  python benchmarks/mock_server.py --latency 0.05 --fault notion:throttle=0.05 --fault volcano:latency=1.5
+"""
+
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from make_fixtures import FIXTURES_DIR, WORDS, make_page  # noqa: E402
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 服务名与 HttpTransport 的上游名一致，端口按此顺序从 port_base 开始分配
+SERVICES = ("github_web", "github_raw", "github_api", "notion", "volcano")
+
+PERIOD_WORDS = {"daily": "today", "weekly": "this week", "monthly": "this month"}
+
+DATABASE_ID = "00000000000040008000000000000001"
+
+BATCH_ITEM_PATTERN = re.compile(r'^=== 项目\d+：(.+?) ===$', re.MULTILINE)
+SINGLE_NAME_PATTERN = re.compile(r'^项目名称：(.+)$', re.MULTILINE)
+RANGE_PATTERN = re.compile(r'bytes=(\d+)-(\d*)')
+
+AI_DETAIL_TEMPLATE = ("**是什么**：{name} 是一个{topic}相关的开源项目。\n"
+                      "**有什么用**：{description}\n"
+                      "**怎么用**：pip install {name}，参考 README 中的快速开始示例。")
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 注入延迟时客户端常在超时后断开，写响应失败不输出异常
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class Fault:
+    """
+    单个服务的故障注入配置
+    latency: 平均附加延迟（秒，实际在 0.5～1.5 倍之间随机）；throttle: 返回429的概率；
+    retry_after: 429响应的 Retry-After 秒数；error: 返回5xx的概率；error_status: 5xx状态码；
+    slow_body: 响应体分块发送的总耗时（秒）
+    """
+
+    KEYS = ("latency", "throttle", "retry_after", "error", "error_status", "slow_body")
+
+    def __init__(self, latency=0.0, throttle=0.0, retry_after=1, error=0.0, error_status=503, slow_body=0.0):
+        self.latency = latency
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.error = error
+        self.error_status = error_status
+        self.slow_body = slow_body
+
+    def update(self, key, value):
+        if key not in self.KEYS:
+            raise ValueError(f"未知的故障参数: {key}（可用: {', '.join(self.KEYS)}）")
+        setattr(self, key, int(value) if key in ("retry_after", "error_status") else float(value))
+
+    def describe(self):
+        parts = []
+        if self.latency:
+            parts.append(f"延迟{self.latency * 1000:.0f}ms")
+        if self.throttle:
+            parts.append(f"429 {self.throttle:.0%}(Retry-After {self.retry_after}s)")
+        if self.error:
+            parts.append(f"{self.error_status} {self.error:.0%}")
+        if self.slow_body:
+            parts.append(f"慢响应体{self.slow_body:.1f}s")
+        return "，".join(parts) or "无故障"
+
+
+def parse_fault_specs(specs, faults):
+    """解析 SERVICE:KEY=VALUE[,KEY=VALUE] 形式的故障配置，写入 faults {服务名: Fault}"""
+    for spec in specs:
+        service, _, settings = spec.partition(":")
+        if service not in faults:
+            raise ValueError(f"未知的服务: {service}（可用: {', '.join(SERVICES)}）")
+        for setting in settings.split(","):
+            key, _, value = setting.partition("=")
+            faults[service].update(key.strip(), value.strip())
+    return faults
+
+
+def notion_time():
+    """Notion 的 last_edited_time 精确到分钟"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:00.000Z")
+
+
+def rich_text_response(items):
+    """请求中的 rich_text/title 数组转换为查询返回的格式（带 plain_text）"""
+    result = []
+    for item in items or []:
+        content = (item.get("text") or {}).get("content", "")
+        result.append({"type": "text", "text": {"content": content, "link": None}, "plain_text": content})
+    return result
+
+
+class MockServices:
+    """
+    五个模拟服务，各自监听一个端口；可以在基准测试中直接导入使用：
+        services = MockServices(repos=100)
+        env = services.start()    # 需要设置的环境变量
+        ...
+        services.stop()
+    """
+
+    def __init__(self, repos=100, faults=None, seed=1, host="127.0.0.1", port_base=0):
+        self.repos = repos
+        self.faults = {name: Fault() for name in SERVICES}
+        self.faults.update(faults or {})
+        self.seed = seed
+        self.host = host
+        self.port_base = port_base
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.servers = {}
+        self.lock = threading.Lock()
+        self.requests = {name: {} for name in SERVICES}
+        self.pages = {}
+        self.pages_lock = threading.Lock()
+        self.trending_pages = {}
+        self.graphql_remaining = 5000
+        self.ai_counter = itertools.count(1)
+
+        with open(os.path.join(FIXTURES_DIR, "readme.md"), encoding="utf-8") as f:
+            self.readme_template = f.read()
+        with open(os.path.join(FIXTURES_DIR, "notion_schema.json"), encoding="utf-8") as f:
+            self.schema = json.load(f)
+        self.schema_edited_time = notion_time()
+
+    # ---------- 生命周期 ----------
+
+    def start(self):
+        """启动所有服务，返回指向它们的环境变量"""
+        for offset, name in enumerate(SERVICES):
+            port = self.port_base + offset if self.port_base else 0
+            server = MockHTTPServer((self.host, port), self._make_handler(name))
+            thread = threading.Thread(target=server.serve_forever, name=f"mock-{name}", daemon=True)
+            thread.start()
+            self.servers[name] = server
+        return self.env()
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+        self.servers = {}
+
+    def base_url(self, name):
+        host, port = self.servers[name].server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        return {
+            "GITHUB_BASE_URL": self.base_url("github_web"),
+            "GITHUB_RAW_URL": self.base_url("github_raw"),
+            "GITHUB_API_URL": self.base_url("github_api"),
+            "NOTION_API_URL": self.base_url("notion"),
+            "VOLCANO_API_URL": f"{self.base_url('volcano')}/api/v3/chat/completions",
+            "GITHUB_TOKEN": "mock-github-token",
+            "NOTION_TOKEN": "mock-notion-token",
+            "NOTION_DATABASE_ID": DATABASE_ID,
+            "VOLCANO_API_KEY": "mock-volcano-key",
+            "VOLCANO_MODEL": "mock-model",
+            "TRENDING_TOP_N": str(self.repos),
+        }
+
+    def record(self, service, status):
+        with self.lock:
+            counts = self.requests[service]
+            counts[status] = counts.get(status, 0) + 1
+
+    def stats(self):
+        """{服务名: {状态码: 请求数}} 和已创建的页面数"""
+        with self.lock:
+            requests_by_service = {name: dict(counts) for name, counts in self.requests.items()}
+        with self.pages_lock:
+            pages = len(self.pages)
+        return {"requests": requests_by_service, "pages": pages}
+
+    def random(self):
+        with self.rng_lock:
+            return self.rng.random()
+
+    # ---------- 请求处理 ----------
+
+    def _make_handler(self, service):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                services.handle(service, self, "GET")
+
+            def do_HEAD(self):
+                services.handle(service, self, "HEAD")
+
+            def do_POST(self):
+                services.handle(service, self, "POST")
+
+            def do_PATCH(self):
+                services.handle(service, self, "PATCH")
+
+        return Handler
+
+    def handle(self, service, handler, method):
+        length = int(handler.headers.get("Content-Length") or 0)
+        raw_body = handler.rfile.read(length) if length else b""
+        fault = self.faults[service]
+
+        if fault.latency:
+            time.sleep(fault.latency * (0.5 + self.random()))
+        if fault.throttle and self.random() < fault.throttle:
+            return self.send(service, handler, 429, {"message": "rate limited"},
+                             headers={"Retry-After": str(fault.retry_after)})
+        if fault.error and self.random() < fault.error:
+            return self.send(service, handler, fault.error_status, {"message": "injected error"})
+
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+        except ValueError:
+            return self.send(service, handler, 400, {"message": "invalid json"})
+
+        parts = urlsplit(handler.path)
+        route = getattr(self, f"route_{service}")
+        try:
+            status, payload, headers = route(method, parts.path, parse_qs(parts.query), body, handler.headers)
+        except Exception as e:  # 模拟服务自身的错误按500返回，不中断服务
+            status, payload, headers = 500, {"message": f"mock error: {e}"}, {}
+        self.send(service, handler, status, payload, headers=headers, head_only=method == "HEAD")
+
+    def send(self, service, handler, status, payload, headers=None, head_only=False):
+        headers = dict(headers or {})
+        if isinstance(payload, (dict, list)):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json; charset=utf-8")
+        elif isinstance(payload, str):
+            data = payload.encode("utf-8")
+            headers.setdefault("Content-Type", "text/plain; charset=utf-8")
+        else:
+            data = payload or b""
+
+        # 带 ETag 的响应支持条件请求
+        etag = headers.get("ETag")
+        if etag and status == 200 and handler.headers.get("If-None-Match") == etag:
+            status, data = 304, b""
+        if status == 200 and headers.pop("_range", False):
+            status, data = self.apply_range(handler, data, headers)
+
+        self.record(service, status)
+        handler.send_response(status)
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        if head_only or not data:
+            return
+
+        slow_body = self.faults[service].slow_body
+        if not slow_body:
+            handler.wfile.write(data)
+            return
+        # 慢响应体：分成若干块，在 slow_body 秒内发完
+        chunks = 10
+        chunk_size = max(1, -(-len(data) // chunks))
+        for start in range(0, len(data), chunk_size):
+            handler.wfile.write(data[start:start + chunk_size])
+            handler.wfile.flush()
+            time.sleep(slow_body / chunks)
+
+    def apply_range(self, handler, data, headers):
+        match = RANGE_PATTERN.fullmatch(handler.headers.get("Range", "").strip())
+        if not match:
+            return 200, data
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else len(data) - 1
+        if start >= len(data):
+            headers["Content-Range"] = f"bytes */{len(data)}"
+            return 416, b""
+        end = min(end, len(data) - 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return 206, data[start:end + 1]
+
+    # ---------- 仓库数据 ----------
+
+    def repo_description(self, full_name):
+        rng = random.Random(zlib.crc32(full_name.lower().encode("utf-8")))
+        return " ".join(rng.choice(WORDS) for _ in range(12)).capitalize()
+
+    def readme_text(self, owner, name):
+        return (self.readme_template.replace("{owner}", owner).replace("{name}", name)
+                .replace("{description}", self.repo_description(f"{owner}/{name}")))
+
+    def readme_sha(self, owner, name):
+        return hashlib.sha1(self.readme_text(owner, name).encode("utf-8")).hexdigest()
+
+    def repo_node(self, owner, name, query, expression):
+        full_name = f"{owner}/{name}"
+        rng = random.Random(zlib.crc32(full_name.lower().encode("utf-8")))
+        node = {
+            "createdAt": f"20{rng.randint(15, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T08:00:00Z",
+            "updatedAt": "2026-10-01T12:00:00Z",
+            "repositoryTopics": {"nodes": [{"topic": {"name": word}} for word in rng.sample(WORDS, 3)]},
+            "licenseInfo": {"spdxId": rng.choice(["MIT", "Apache-2.0", "GPL-3.0", "NOASSERTION"]), "name": "License"},
+            "issues": {"totalCount": rng.randint(0, 500)},
+            "defaultBranchRef": {"name": "main"},
+        }
+        if "readmeMd:" in query:
+            node["readmeMd"] = {"oid": self.readme_sha(owner, name)}
+            for alias in ("readmeLowerMd", "readmePlain", "readmeRst"):
+                node[alias] = None
+        if expression:
+            text = self.readme_text(owner, name) if expression == "HEAD:README.md" else None
+            node["readme"] = {"oid": self.readme_sha(owner, name), "text": text} if text else None
+        return node
+
+    # ---------- GitHub ----------
+
+    def route_github_web(self, method, path, query, body, headers):
+        segments = [segment for segment in path.split("/") if segment]
+        if not segments or segments[0] != "trending" or len(segments) > 2:
+            return 404, "Not Found", {}
+        language = segments[1] if len(segments) == 2 else ""
+        since = (query.get("since") or ["daily"])[0]
+        key = (since, language.lower())
+        with self.lock:
+            page = self.trending_pages.get(key)
+        if page is None:
+            # 不同周期/语言的榜单各用一个种子，同一榜单每次请求内容相同
+            seed = self.seed * 1000003 + zlib.crc32(f"{since}:{language.lower()}".encode("utf-8"))
+            title = f"Trending {language.title() + ' ' if language else ''}repositories on GitHub"
+            page = make_page(seed, self.repos, PERIOD_WORDS.get(since, "today"), title).encode("utf-8")
+            with self.lock:
+                self.trending_pages[key] = page
+        etag = f'W/"{zlib.crc32(page):08x}"'
+        return 200, page, {"Content-Type": "text/html; charset=utf-8", "ETag": etag}
+
+    def route_github_raw(self, method, path, query, body, headers):
+        segments = path.strip("/").split("/")
+        if len(segments) != 4 or segments[3] != "README.md":
+            return 404, "404: Not Found", {}
+        owner, name = segments[0], segments[1]
+        text = self.readme_text(owner, name).encode("utf-8")
+        return 200, text, {"ETag": f'"{self.readme_sha(owner, name)}"', "Accept-Ranges": "bytes", "_range": True}
+
+    def route_github_api(self, method, path, query, body, headers):
+        if method == "POST" and path == "/graphql":
+            if not headers.get("Authorization"):
+                return 401, {"message": "This endpoint requires you to be authenticated."}, {}
+            return self.graphql(body)
+
+        match = re.fullmatch(r'/repos/([^/]+)/([^/]+)/readme', path)
+        if method == "GET" and match:
+            owner, name = match.groups()
+            text = self.readme_text(owner, name).encode("utf-8")
+            return 200, {
+                "name": "README.md",
+                "path": "README.md",
+                "sha": self.readme_sha(owner, name),
+                "size": len(text),
+                "encoding": "base64",
+                "content": base64.b64encode(text).decode("ascii"),
+                "download_url": f"{self.base_url('github_raw')}/{owner}/{name}/main/README.md",
+            }, {}
+        return 404, {"message": "Not Found"}, {}
+
+    def graphql(self, body):
+        query = body.get("query", "")
+        variables = body.get("variables") or {}
+        data = {}
+        index = 0
+        while f"o{index}" in variables:
+            data[f"r{index}"] = self.repo_node(variables[f"o{index}"], variables[f"n{index}"], query,
+                                               variables.get(f"e{index}"))
+            index += 1
+        with self.lock:
+            self.graphql_remaining = max(0, self.graphql_remaining - 1)
+            remaining = self.graphql_remaining
+        data["rateLimit"] = {"cost": 1, "remaining": remaining, "resetAt": "2026-10-16T12:00:00Z"}
+        return 200, {"data": data}, {}
+
+    # ---------- Notion ----------
+
+    def route_notion(self, method, path, query, body, headers):
+        if not headers.get("Authorization"):
+            return 401, {"object": "error", "code": "unauthorized", "message": "API token is invalid."}, {}
+
+        segments = [segment for segment in path.split("/") if segment]
+        if segments[:2] == ["v1", "databases"] and len(segments) >= 3:
+            if segments[2].replace("-", "") != DATABASE_ID:
+                return 404, {"object": "error", "code": "object_not_found", "message": "Could not find database."}, {}
+            if method == "GET" and len(segments) == 3:
+                return 200, {"object": "database", "id": DATABASE_ID, "last_edited_time": self.schema_edited_time,
+                             "properties": self.schema}, {}
+            if method == "POST" and segments[3:] == ["query"]:
+                return self.query_pages(body, query.get("filter_properties") or [])
+        if segments[:2] == ["v1", "pages"]:
+            if method == "POST" and len(segments) == 2:
+                return self.create_page(body)
+            if method == "PATCH" and len(segments) == 3:
+                return self.update_page(segments[2], body)
+        return 404, {"object": "error", "code": "invalid_request_url", "message": "Invalid request URL."}, {}
+
+    def page_response(self, page, property_ids=None):
+        """property_ids 为 filter_properties 参数（属性ID，可能经过URL编码），只返回这些属性"""
+        wanted = {unquote(prop_id) for prop_id in property_ids or ()}
+        properties = {}
+        for name, value in page["properties"].items():
+            prop = self.schema[name]
+            if wanted and unquote(prop["id"]) not in wanted:
+                continue
+            prop_type = prop["type"]
+            content = value.get(prop_type)
+            if prop_type in ("title", "rich_text"):
+                content = rich_text_response(content)
+            properties[name] = {"id": prop["id"], "type": prop_type, prop_type: content}
+        return {"object": "page", "id": page["id"], "last_edited_time": page["last_edited_time"],
+                "archived": False, "parent": {"type": "database_id", "database_id": DATABASE_ID},
+                "properties": properties}
+
+    def validate_properties(self, properties):
+        for name in properties:
+            if name not in self.schema:
+                return f"{name} is not a property that exists."
+        return ""
+
+    def create_page(self, body):
+        parent = (body.get("parent") or {}).get("database_id", "").replace("-", "")
+        if parent != DATABASE_ID:
+            return 404, {"object": "error", "code": "object_not_found", "message": "Could not find database."}, {}
+        properties = body.get("properties") or {}
+        error = self.validate_properties(properties)
+        if error:
+            return 400, {"object": "error", "code": "validation_error", "message": error}, {}
+        page = {"id": str(uuid.uuid4()), "properties": properties, "last_edited_time": notion_time()}
+        with self.pages_lock:
+            self.pages[page["id"]] = page
+        return 200, self.page_response(page), {}
+
+    def update_page(self, page_id, body):
+        properties = body.get("properties") or {}
+        error = self.validate_properties(properties)
+        if error:
+            return 400, {"object": "error", "code": "validation_error", "message": error}, {}
+        with self.pages_lock:
+            page = self.pages.get(page_id)
+            if page is None:
+                return 404, {"object": "error", "code": "object_not_found", "message": "Could not find page."}, {}
+            page["properties"].update(properties)
+            page["last_edited_time"] = notion_time()
+        return 200, self.page_response(page), {}
+
+    def query_pages(self, body, property_ids):
+        since = ((body.get("filter") or {}).get("last_edited_time") or {}).get("on_or_after")
+        with self.pages_lock:
+            pages = [page for page in self.pages.values() if not since or page["last_edited_time"] >= since]
+        pages.sort(key=lambda page: page["last_edited_time"])
+        start = int(body.get("start_cursor") or 0)
+        size = min(100, int(body.get("page_size") or 100))
+        chunk = pages[start:start + size]
+        has_more = start + size < len(pages)
+        return 200, {
+            "object": "list",
+            "results": [self.page_response(page, property_ids) for page in chunk],
+            "has_more": has_more,
+            "next_cursor": str(start + size) if has_more else None,
+        }, {}
+
+    # ---------- 火山引擎 ----------
+
+    def route_volcano(self, method, path, query, body, headers):
+        if method != "POST" or not path.endswith("/chat/completions"):
+            return 404, {"error": {"message": "not found"}}, {}
+        if not headers.get("Authorization"):
+            return 401, {"error": {"code": "AuthenticationError", "message": "missing api key"}}, {}
+        prompt = "".join(message.get("content", "") for message in body.get("messages") or [])
+
+        names = BATCH_ITEM_PATTERN.findall(prompt)
+        if names:
+            content = json.dumps({name: self.ai_detail(name) for name in names}, ensure_ascii=False)
+        else:
+            match = SINGLE_NAME_PATTERN.search(prompt)
+            content = self.ai_detail(match.group(1).strip() if match else "unknown/project")
+
+        return 200, {
+            "id": f"mock-{next(self.ai_counter)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": len(prompt) // 2,
+                "completion_tokens": len(content) // 2,
+                "total_tokens": len(prompt) // 2 + len(content) // 2,
+            },
+        }, {}
+
+    def ai_detail(self, full_name):
+        rng = random.Random(zlib.crc32(full_name.lower().encode("utf-8")))
+        return AI_DETAIL_TEMPLATE.format(name=full_name.split("/")[-1], topic=rng.choice(WORDS),
+                                         description=self.repo_description(full_name))
+
+
+def run_sync(env, cache_dir, log_path=None):
+    """
+    用模拟服务的环境变量运行一次同步（子进程），返回 (退出码, 耗时秒)
+    运行报告和Notion数据库结构缓存写在 cache_dir 下，不覆盖正式运行的文件；指定 log_path 时输出写入该文件而不是终端
+    """
+    child_env = dict(os.environ)
+    child_env.update(env)
+    # 只抓一个榜单，项目数即 TRENDING_TOP_N
+    child_env.update({"TRENDING_PERIOD": "daily", "TRENDING_PERIODS": "", "TRENDING_LANGUAGES": "",
+                      "CACHE_DIR": cache_dir, "RUN_REPORT_FILE": os.path.join(cache_dir, "run_report.json"),
+                      "NOTION_SCHEMA_CACHE_FILE": os.path.join(cache_dir, "notion_schema_cache.json"),
+                      "PYTHONIOENCODING": "utf-8"})
+    command = [sys.executable, os.path.join(PROJECT_DIR, "github_trending_notion.py")]
+    started = time.perf_counter()
+    if log_path:
+        with open(log_path, "w", encoding="utf-8") as log:
+            result = subprocess.run(command, env=child_env, cwd=PROJECT_DIR, stdout=log, stderr=subprocess.STDOUT)
+    else:
+        result = subprocess.run(command, env=child_env, cwd=PROJECT_DIR)
+    return result.returncode, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub / Notion / 火山引擎 本地模拟服务")
+    parser.add_argument("--repos", type=int, default=100, help="每个榜单的项目数")
+    parser.add_argument("--seed", type=int, default=1, help="生成榜单的随机种子")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port-base", type=int, default=18080, help="起始端口，依次分配给 " + "/".join(SERVICES))
+    parser.add_argument("--latency", type=float, default=0.0, help="所有服务的平均附加延迟（秒）")
+    parser.add_argument("--throttle", type=float, default=0.0, help="所有服务返回429的概率")
+    parser.add_argument("--retry-after", type=int, default=1, help="429响应的 Retry-After 秒数")
+    parser.add_argument("--error", type=float, default=0.0, help="所有服务返回503的概率")
+    parser.add_argument("--slow-body", type=float, default=0.0, help="所有服务响应体的发送耗时（秒）")
+    parser.add_argument("--fault", action="append", default=[], metavar="SERVICE:KEY=VALUE",
+                        help="单个服务的故障参数，例如 notion:throttle=0.1,retry_after=2（可重复）")
+    parser.add_argument("--run", action="store_true", help="启动后运行一次同步并计时，结束后退出")
+    parser.add_argument("--cache-dir", default="", help="--run 时使用的缓存目录（默认新建临时目录）")
+    args = parser.parse_args()
+
+    faults = {
+        name: Fault(latency=args.latency, throttle=args.throttle, retry_after=args.retry_after,
+                    error=args.error, slow_body=args.slow_body)
+        for name in SERVICES
+    }
+    try:
+        parse_fault_specs(args.fault, faults)
+    except ValueError as e:
+        parser.error(str(e))
+
+    services = MockServices(repos=args.repos, faults=faults, seed=args.seed, host=args.host,
+                            port_base=0 if args.run else args.port_base)
+    env = services.start()
+    print(f"🧪 模拟服务已启动（每个榜单 {args.repos} 个项目）")
+    for name in SERVICES:
+        print(f"  {name:11} {services.base_url(name)}  {faults[name].describe()}")
+
+    if args.run:
+        cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="mock_sync_")
+        print(f"\n🚀 运行同步（缓存目录 {cache_dir}）\n")
+        code, elapsed = run_sync(env, cache_dir)
+        stats = services.stats()
+        services.stop()
+        print(f"\n⏱️  {args.repos} 个项目: 耗时 {elapsed:.1f}s，退出码 {code}，Notion页面 {stats['pages']} 个")
+        for name, counts in stats["requests"].items():
+            print(f"  {name:11} " + (" ".join(f"{status}×{count}" for status, count in sorted(counts.items())) or "无请求"))
+        sys.exit(code)
+
+    print("\n在 .env 或命令行中设置以下环境变量（建议另外指定一个 CACHE_DIR，避免与正式数据混用）：\n")
+    for key, value in env.items():
+        print(f"{key}={value}")
+    print("\n按 Ctrl+C 停止")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        services.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+基准测试套件
+用固定的样本测量各环节耗时，结果写成JSON，可与基线比较并在变慢超过阈值时以退出码1结束：
+
+- parse:   Trending页面解析（parse_repo_article_soup 整页解析 / TrendingPageExtractor + parse_repo_fields）
+- match:   auto_match_fields，数据库结构为 fixtures/notion_schema.json 和 100～1000 个属性的合成结构
+- payload: build_notion_properties，10～10000 个仓库
+- e2e:     对本地模拟服务（mock_server.py）完整运行一次同步，首次运行（cold）和紧接着的第二次运行（warm）
+
+用法:
+  python benchmarks/run_benchmarks.py                        # 全部运行，结果写入 benchmarks/results/latest.json
+  python benchmarks/run_benchmarks.py --save-baseline        # 同时保存为基线
+  python benchmarks/run_benchmarks.py --suites parse,payload --threshold 0.15
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+RESULTS_VERSION = 1
+SUITES = ("parse", "match", "payload", "e2e")
+
+# 端到端测试放开限速，测量的是代码路径而不是限速器
+E2E_ENV = {
+    "AI_RPS": "1000",
+    "AI_CONCURRENCY": "8",
+    "NOTION_RPS": "1000",
+    "NOTION_CONCURRENCY": "8",
+}
+
+
+def measure(func, rounds, warmup=1):
+    """先预热 warmup 次，再计时 rounds 次，返回 {rounds, median_ms, min_ms, max_ms}"""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "rounds": rounds,
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+    }
+
+
+def load_fixture_schema():
+    from mock_server import FIXTURES_DIR
+    with open(os.path.join(FIXTURES_DIR, "notion_schema.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def quiet_match(bot, properties):
+    """用给定的数据库结构执行 auto_match_fields（不输出匹配过程），返回字段映射"""
+    bot.db_properties = properties
+    bot.field_mapping = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot.auto_match_fields()
+    return bot.field_mapping
+
+
+def suite_parse(bot, args):
+    from bench_trending_parse import parse_new, parse_old
+
+    results = {}
+    for path in sorted(glob.glob(os.path.join(BENCH_DIR, "fixtures", "trending_*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        name = os.path.splitext(os.path.basename(path))[0]
+        repos = len(parse_new(bot, html, None))
+        for label, func in (("soup", parse_old), ("extractor", parse_new)):
+            result = measure(lambda func=func, html=html: func(bot, html, None), args.rounds)
+            result["repos"] = repos
+            results[f"parse/{label}/{name}"] = result
+    return results
+
+
+def suite_match(bot, args):
+    from bench_field_matcher import make_schema
+
+    schemas = [("fixture", load_fixture_schema())]
+    schemas += [(str(size), make_schema(size, 7 + size)[0]) for size in args.schema_sizes]
+    results = {}
+    for label, properties in schemas:
+        result = measure(lambda properties=properties: quiet_match(bot, properties), args.rounds)
+        result["properties"] = len(properties)
+        result["matched"] = len(bot.field_mapping)
+        results[f"match/{label}"] = result
+    return results
+
+
+def suite_payload(bot, args):
+    from bench_notion_payload import make_repos
+
+    quiet_match(bot, load_fixture_schema())
+
+    def build_all(repos):
+        # 每轮重新编译序列化函数，与一次运行的实际开销一致
+        bot.property_serializers_key = None
+        for repo in repos:
+            bot.build_notion_properties(repo)
+
+    results = {}
+    for count in args.repo_counts:
+        repos = make_repos(count)
+        result = measure(lambda repos=repos: build_all(repos), args.rounds)
+        result["repos"] = count
+        results[f"payload/{count}"] = result
+    return results
+
+
+def request_delta(before, after):
+    """两次 MockServices.stats()["requests"] 之间各服务、各状态码新增的请求数"""
+    delta = {}
+    for name, counts in after.items():
+        previous = before.get(name, {})
+        delta[name] = {status: count - previous.get(status, 0) for status, count in counts.items()
+                       if count > previous.get(status, 0)}
+    return delta
+
+
+def suite_e2e(bot, args):
+    from mock_server import SERVICES, Fault, MockServices, run_sync
+
+    results = {}
+    for count in args.e2e_sizes:
+        faults = {name: Fault(latency=args.e2e_latency) for name in SERVICES}
+        services = MockServices(repos=count, faults=faults)
+        env = dict(services.start(), **E2E_ENV)
+        cache_dir = tempfile.mkdtemp(prefix=f"bench_e2e_{count}_")
+        try:
+            # 同一组服务和缓存目录连续运行两次：第二次命中AI缓存、Notion镜像和HTTP缓存
+            for label in ("cold", "warm"):
+                log_path = os.path.join(cache_dir, f"sync_{label}.log")
+                # 服务的请求计数跨两次运行累计，只记录本次运行的增量
+                before = services.stats()["requests"]
+                code, elapsed = run_sync(env, cache_dir, log_path=log_path)
+                if code != 0:
+                    raise RuntimeError(f"e2e/{count}/{label} 运行失败（退出码 {code}），日志: {log_path}")
+                with open(os.path.join(cache_dir, "run_report.json"), encoding="utf-8") as f:
+                    report = json.load(f)
+                elapsed_ms = round(elapsed * 1000, 3)
+                results[f"e2e/{count}/{label}"] = {
+                    "rounds": 1,
+                    "median_ms": elapsed_ms,
+                    "min_ms": elapsed_ms,
+                    "max_ms": elapsed_ms,
+                    "repos": count,
+                    "status": report.get("status"),
+                    "writes": {key: value for key, value in (report.get("writes") or {}).items() if key != "latency"},
+                    "stages_ms": {stage: round(item["wall"] * 1000, 1)
+                                  for stage, item in (report.get("stages") or {}).items()},
+                    "requests": request_delta(before, services.stats()["requests"]),
+                }
+        finally:
+            services.stop()
+            if not args.keep_e2e_cache:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+    return results
+
+
+SUITE_FUNCS = {"parse": suite_parse, "match": suite_match, "payload": suite_payload, "e2e": suite_e2e}
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """与基线比较中位数耗时，返回 {键: (基线ms, 当前ms, 比值, 是否变慢)}"""
+    comparison = {}
+    for key, item in results.items():
+        base = (baseline.get("results") or {}).get(key)
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = item["median_ms"] / base["median_ms"]
+        regressed = ratio > 1 + threshold and item["median_ms"] - base["median_ms"] > min_delta_ms
+        comparison[key] = (base["median_ms"], item["median_ms"], ratio, regressed)
+    return comparison
+
+
+def write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def parse_int_list(text):
+    return [int(item) for item in text.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基准测试套件")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"要运行的测试，逗号分隔（{'/'.join(SUITES)}）")
+    parser.add_argument("--rounds", type=int, default=5, help="每项计时次数（e2e 固定为1次）")
+    parser.add_argument("--schema-sizes", type=parse_int_list, default=[100, 1000], help="合成数据库结构的属性数")
+    parser.add_argument("--repo-counts", type=parse_int_list, default=[10, 100, 1000, 10000],
+                        help="属性构建的仓库数")
+    parser.add_argument("--e2e-sizes", type=parse_int_list, default=[10, 100], help="端到端测试的项目数")
+    parser.add_argument("--e2e-latency", type=float, default=0.0, help="端到端测试中每个模拟服务的平均附加延迟（秒）")
+    parser.add_argument("--keep-e2e-cache", action="store_true", help="保留端到端测试的缓存目录和日志")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"), help="结果文件")
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "baseline.json"),
+                        help="基线文件，存在时与之比较")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.25, help="中位数耗时超过基线的比例，超过视为变慢")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="变慢的绝对差值下限（毫秒），避免微小耗时的抖动")
+    args = parser.parse_args()
+
+    suites = [suite.strip() for suite in args.suites.split(",") if suite.strip()]
+    unknown = [suite for suite in suites if suite not in SUITE_FUNCS]
+    if unknown:
+        parser.error(f"未知的测试: {', '.join(unknown)}")
+
+    # 基准测试使用独立的缓存目录，不影响正式运行的缓存
+    bench_cache = tempfile.mkdtemp(prefix="bench_cache_")
+    os.environ["CACHE_DIR"] = bench_cache
+    os.environ["NOTION_SCHEMA_CACHE_FILE"] = os.path.join(bench_cache, "notion_schema_cache.json")
+    from github_trending_notion import GitHubTrendingToNotion
+    bot = GitHubTrendingToNotion()
+
+    results = {}
+    try:
+        for suite in suites:
+            print(f"⏱️  {suite} ...")
+            started = time.perf_counter()
+            results.update(SUITE_FUNCS[suite](bot, args))
+            print(f"   完成，用时 {time.perf_counter() - started:.1f}s")
+    finally:
+        bot.transport.close()
+        shutil.rmtree(bench_cache, ignore_errors=True)
+
+    data = {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"rounds": args.rounds, "suites": suites},
+        "results": results,
+    }
+    write_json(args.output, data)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    comparison = compare(results, baseline, args.threshold, args.min_delta_ms) if baseline else {}
+
+    print(f"\n{'测试项':40} {'中位数(ms)':>11} {'最快(ms)':>10} {'基线(ms)':>10} {'变化':>8}")
+    print("-" * 84)
+    for key, item in results.items():
+        line = f"{key:40} {item['median_ms']:>11.2f} {item['min_ms']:>10.2f}"
+        if key in comparison:
+            base_ms, _, ratio, regressed = comparison[key]
+            line += f" {base_ms:>10.2f} {(ratio - 1) * 100:>+7.0f}%{' ✗' if regressed else ''}"
+        print(line)
+    print("-" * 84)
+    print(f"📄 结果: {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, data)
+        print(f"📌 已保存为基线: {args.baseline}")
+        return
+    if not baseline:
+        print(f"（没有基线文件 {args.baseline}，用 --save-baseline 保存）")
+        return
+
+    regressions = [key for key, (_, _, _, regressed) in comparison.items() if regressed]
+    if regressions:
+        print(f"✗ {len(regressions)} 项比基线慢 {args.threshold:.0%} 以上: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"✓ 与基线相比没有超过 {args.threshold:.0%} 的变慢（比较 {len(comparison)} 项）")
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,17 @@ pyinstaller --noconfirm ^
     --name "GitHubTrendingToNotion" ^
     --icon=NONE ^
     --add-data "github_trending_notion.py;." ^
+    --add-data "circuit_breaker.py;." ^
+    --add-data "field_matcher.py;." ^
+    --add-data "http_cache.py;." ^
+    --add-data "http_transport.py;." ^
+    --add-data "local_store.py;." ^
+    --add-data "notion_payload.py;." ^
+    --add-data "pipeline.py;." ^
+    --add-data "profiling.py;." ^
+    --add-data "rate_limit.py;." ^
+    --add-data "run_budget.py;." ^
+    --add-data "run_metrics.py;." ^
     --hidden-import=tkinter ^
     --hidden-import=customtkinter ^
     --hidden-import=requests ^
@@ -3,9 +3,10 @@
 运行此脚本可以查看你的Notion数据库有哪些属性
 """
 
-import requests
 import json
 
+from http_transport import HttpTransport
+
 
 def check_notion_database():
     import os
@@ -31,7 +32,9 @@ def check_notion_database():
     print("正在获取Notion数据库结构...")
     print("=" * 60)
 
-    response = requests.get(url, headers=headers)
+    transport = HttpTransport()
+    response = transport.session("notion").get(url, headers=headers)
+    transport.close()
 
     if response.status_code == 200:
         data = response.json()
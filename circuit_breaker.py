@@ -0,0 +1,221 @@
+"""
+熔断器
+每个上游服务一个，整次运行共享：连续失败（网络错误、超时、5xx）达到阈值后打开，
+冷却期内该服务的请求直接失败（CircuitOpenError），不再逐个等待超时；
+冷却结束后进入半开状态，只放行一个探测请求，成功则恢复，失败则重新打开。
+状态可以保存到缓存目录，下一次运行开始时沿用
+"""
+
+import json
+import os
+import threading
+import time
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_LABELS = {CLOSED: "正常", OPEN: "熔断", HALF_OPEN: "半开"}
+
+
+class CircuitOpenError(requests.RequestException):
+    """上游服务处于熔断状态，请求没有发出"""
+
+
+def is_failure(response=None, error=None):
+    """网络错误、超时和5xx视为服务故障；4xx（包括429限流）说明服务可用"""
+    if error is not None:
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+    return response is not None and response.status_code >= 500
+
+
+class CircuitBreaker:
+    """单个上游的熔断器，可在多线程间共享"""
+
+    def __init__(self, name, failure_threshold=5, cooldown=60.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        # 打开状态持续到的时间（time.time()，便于保存到文件）
+        self.open_until = 0.0
+        self.probing = False
+        # 打开次数、直接失败的请求数
+        self.opened = 0
+        self.rejected = 0
+
+    def before_request(self):
+        """请求前调用：熔断中抛出 CircuitOpenError；冷却结束后只放行一个探测请求"""
+        with self.lock:
+            if self.state == OPEN and time.time() >= self.open_until:
+                self._set_state(HALF_OPEN, "冷却结束，发送探测请求")
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return
+            self.rejected += 1
+            wait = max(0.0, self.open_until - time.time())
+            detail = f"{wait:.0f}s 后重试" if self.state == OPEN else "等待探测结果"
+        raise CircuitOpenError(f"{self.name} 熔断中（连续失败 {self.failures} 次，{detail}），请求未发出")
+
+    def check(self):
+        """
+        不占用探测名额的提前检查：熔断中（或探测请求进行中）抛出 CircuitOpenError；
+        在等待限速器之前调用，熔断时不必先等到令牌再失败
+        """
+        with self.lock:
+            if self.state == CLOSED or (self.state == OPEN and time.time() >= self.open_until):
+                return
+            if self.state == HALF_OPEN and not self.probing:
+                return
+            self.rejected += 1
+            wait = max(0.0, self.open_until - time.time())
+            detail = f"{wait:.0f}s 后重试" if self.state == OPEN else "等待探测结果"
+        raise CircuitOpenError(f"{self.name} 熔断中（连续失败 {self.failures} 次，{detail}），请求未发出")
+
+    def record(self, response=None, error=None):
+        """请求结束后调用，传入响应或异常"""
+        failed = is_failure(response, error)
+        with self.lock:
+            probe = self.state == HALF_OPEN and self.probing
+            if probe:
+                self.probing = False
+            if not failed:
+                self.failures = 0
+                if self.state != CLOSED:
+                    self._set_state(CLOSED, "探测成功，恢复请求")
+                return
+            self.failures += 1
+            if probe:
+                self._open("探测失败")
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open(f"连续失败 {self.failures} 次")
+
+    def release(self):
+        """请求没有得到结论（例如被调用方中断）时释放探测名额"""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probing = False
+
+    def allows_requests(self):
+        """当前是否会放行请求（不占用探测名额），用于提前跳过依赖该服务的准备工作"""
+        with self.lock:
+            return self.state == CLOSED or time.time() >= self.open_until
+
+    def _open(self, reason):
+        self.open_until = time.time() + self.cooldown
+        self.opened += 1
+        self._set_state(OPEN, f"{reason}，{self.cooldown:.0f}s 内的请求直接失败")
+
+    def _set_state(self, state, reason):
+        previous = self.state
+        self.state = state
+        print(f"  🔌 熔断器 {self.name}: {STATE_LABELS[previous]} → {STATE_LABELS[state]}（{reason}）")
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class CircuitBreakers:
+    """
+    按上游名称管理熔断器；state_file 非空时 load() / save() 在运行之间保留未恢复的熔断状态
+    failure_threshold <= 0 时关闭熔断（get 返回 None）
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=60.0, state_file=""):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state_file = state_file
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.failure_threshold > 0
+
+    def get(self, name):
+        if not self.enabled:
+            return None
+        with self.lock:
+            breaker = self.breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, self.failure_threshold, self.cooldown)
+                self.breakers[name] = breaker
+            return breaker
+
+    def load(self):
+        """读取上次运行结束时未恢复的熔断器：冷却未结束的保持打开，已结束的先探测"""
+        if not (self.enabled and self.state_file):
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                saved = json.load(f).get("upstreams", {})
+        except (OSError, ValueError, AttributeError):
+            return
+        for name, item in saved.items():
+            try:
+                open_until = float(item.get("open_until", 0))
+                failures = int(item.get("failures", 0))
+            except (TypeError, ValueError, AttributeError):
+                continue
+            breaker = self.get(name)
+            with breaker.lock:
+                breaker.state = OPEN
+                breaker.failures = failures
+                breaker.open_until = open_until
+            wait = max(0.0, open_until - time.time())
+            print(f"  🔌 熔断器 {name}: 上次运行结束时处于熔断状态，"
+                  f"{f'{wait:.0f}s 后' if wait else '本次'}先发送探测请求")
+
+    def save(self):
+        """保存仍未恢复的熔断器；全部正常时删除状态文件"""
+        if not (self.enabled and self.state_file):
+            return
+        upstreams = {}
+        with self.lock:
+            breakers = list(self.breakers.values())
+        for breaker in breakers:
+            with breaker.lock:
+                if breaker.state != CLOSED:
+                    upstreams[breaker.name] = {"failures": breaker.failures, "open_until": breaker.open_until}
+        try:
+            if not upstreams:
+                if os.path.exists(self.state_file):
+                    os.remove(self.state_file)
+                return
+            directory = os.path.dirname(self.state_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.state_file}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"upstreams": upstreams}, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.state_file)
+        except OSError as e:
+            print(f"⚠️  保存熔断状态失败: {e}")
+
+    def stats(self):
+        """{上游: {state, failures, opened, rejected}}，只包含发生过熔断的上游"""
+        with self.lock:
+            breakers = list(self.breakers.values())
+        stats = {}
+        for breaker in breakers:
+            item = breaker.snapshot()
+            if item["opened"] or item["state"] != CLOSED:
+                stats[breaker.name] = item
+        return stats
+
+    def summary(self):
+        parts = [f"{name} {STATE_LABELS[item['state']]}（打开 {item['opened']} 次，跳过 {item['rejected']} 个请求）"
+                 for name, item in self.stats().items()]
+        return " | ".join(parts)
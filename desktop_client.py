@@ -5,6 +5,7 @@ GitHub Trending to Notion - Desktop Client (Notion Style UI)
 
 import os
 import sys
+import json
 import threading
 import subprocess
 import webbrowser
@@ -595,7 +596,8 @@ class DesktopClient(ctk.CTk):
         cards.pack(fill="x", padx=40, pady=(0, 24))
 
         self.create_stat_card(cards, ICONS["status_ok"], "状态", "已就绪", C_SUCCESS).pack(side="left", fill="both", expand=True, padx=(0, 12))
-        self.create_stat_card(cards, ICONS["sync"], "今日同步", "0 个项目", C_ACCENT).pack(side="left", fill="both", expand=True, padx=(0, 12))
+        self.sync_card = self.create_stat_card(cards, ICONS["sync"], "上次同步", "0 个项目", C_ACCENT)
+        self.sync_card.pack(side="left", fill="both", expand=True, padx=(0, 12))
         self.create_stat_card(cards, ICONS["schedule"], "下次运行", "09:00", C_TEXT_SEC).pack(side="left", fill="both", expand=True)
 
         # 快速操作
@@ -617,6 +619,7 @@ class DesktopClient(ctk.CTk):
         self.log_text.pack(fill="both", expand=True, padx=0, pady=(0, 16))
         self.log_text.insert("1.0", "桌面客户端已启动\n")
         self.log_text.configure(state="disabled")
+        self.refresh_sync_card()
 
     def create_stat_card(self, parent, icon, label, value, color):
         card = ctk.CTkFrame(parent, corner_radius=6, fg_color="white", border_width=1, border_color=C_BORDER)
@@ -628,7 +631,8 @@ class DesktopClient(ctk.CTk):
         ctk.CTkLabel(top, text=icon, font=("Segoe UI Symbol", 20), text_color=color).pack(side="left")
         ctk.CTkLabel(top, text=label, font=("", 13), anchor="w", text_color=C_TEXT_SEC).pack(side="left", padx=(8, 0))
 
-        ctk.CTkLabel(inner, text=value, font=("", 24, "bold"), anchor="w", text_color=color).pack(fill="x", pady=(12, 0))
+        card.value_label = ctk.CTkLabel(inner, text=value, font=("", 24, "bold"), anchor="w", text_color=color)
+        card.value_label.pack(fill="x", pady=(12, 0))
         return card
 
     def create_card(self, parent, title, show_clear=False):
@@ -724,11 +728,18 @@ class DesktopClient(ctk.CTk):
                       corner_radius=4, fg_color=C_ACCENT, hover_color="#1A6BC0", text_color="white",
                       font=("Segoe UI Symbol", 13)).pack(anchor="w", padx=(40, 0), pady=(0, 32))
 
+    def get_transport(self):
+        """验证用的共享HTTP传输层，重复验证时复用连接"""
+        if getattr(self, "transport", None) is None:
+            from http_transport import HttpTransport
+            self.transport = HttpTransport(pool_size=2)
+        return self.transport
+
     def validate_notion_token(self, value):
         try:
-            import requests
             headers = {"Authorization": f"Bearer {value}", "Notion-Version": "2022-06-28"}
-            response = requests.get("https://api.notion.com/v1/users/me", headers=headers, timeout=10)
+            response = self.get_transport().session("notion").get(
+                "https://api.notion.com/v1/users/me", headers=headers, timeout=10)
             if response.status_code == 200:
                 return {"success": True}
             return {"success": False, "error": f"认证失败 ({response.status_code})"}
@@ -739,9 +750,9 @@ class DesktopClient(ctk.CTk):
         if not self.config.get("NOTION_TOKEN"):
             return {"success": False, "error": "请先验证 Notion Token"}
         try:
-            import requests
             headers = {"Authorization": f"Bearer {self.config['NOTION_TOKEN']}", "Notion-Version": "2022-06-28"}
-            response = requests.get(f"https://api.notion.com/v1/databases/{value}", headers=headers, timeout=10)
+            response = self.get_transport().session("notion").get(
+                f"https://api.notion.com/v1/databases/{value}", headers=headers, timeout=10)
             if response.status_code == 200:
                 return {"success": True}
             return {"success": False, "error": f"数据库访问失败 ({response.status_code})"}
@@ -750,9 +761,9 @@ class DesktopClient(ctk.CTk):
 
     def validate_github_token(self, value):
         try:
-            import requests
             headers = {"Authorization": f"token {value}"} if value else {}
-            response = requests.get("https://api.github.com/user", headers=headers, timeout=10)
+            response = self.get_transport().session("github_api").get(
+                "https://api.github.com/user", headers=headers, timeout=10)
             if response.status_code == 200:
                 return {"success": True}
             elif response.status_code == 401:
@@ -823,8 +834,79 @@ class DesktopClient(ctk.CTk):
 
     def create_history_content(self):
         parent = self.frame_history
-        ctk.CTkLabel(parent, text="历史记录", font=("", 28, "bold"), anchor="w", text_color=C_TEXT).pack(fill="x", padx=40, pady=(32, 24))
-        ctk.CTkLabel(parent, text="暂无历史记录", font=("", 14), text_color=C_TEXT_LIGHT).pack(expand=True)
+        ctk.CTkLabel(parent, text="历史记录", font=("", 28, "bold"), anchor="w", text_color=C_TEXT).pack(fill="x", padx=40, pady=(32, 4))
+        ctk.CTkLabel(parent, text="最近一次运行的报告（各阶段和各服务的耗时）", font=("", 14),
+                     anchor="w", text_color=C_TEXT_SEC).pack(fill="x", padx=40, pady=(0, 24))
+        self.report_text = ctk.CTkTextbox(parent, font=("Consolas", 11), fg_color=C_BG,
+                                          border_width=1, border_color=C_BORDER)
+        self.report_text.pack(fill="both", expand=True, padx=40, pady=(0, 32))
+        self.refresh_report_view()
+
+    def get_report_file(self):
+        """与主脚本一致：RUN_REPORT_FILE，默认为缓存目录下的 run_report.json"""
+        report_file = self.config.get("RUN_REPORT_FILE")
+        if report_file:
+            return Path(report_file)
+        cache_dir = self.config.get("CACHE_DIR") or str(self.project_dir / ".cache")
+        return Path(cache_dir) / "run_report.json"
+
+    def load_run_report(self):
+        try:
+            with open(self.get_report_file(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def format_run_report(self, report):
+        """把运行报告整理成几行文字"""
+        finished = datetime.fromtimestamp(report.get("finished_at", 0)).strftime("%Y-%m-%d %H:%M:%S")
+        writes = report.get("writes", {})
+        lines = [
+            f"运行 {report.get('run_id', '')} | {finished} | 状态 {report.get('status', '')} | 耗时 {report.get('duration', 0):.1f}s",
+        ]
+        if report.get("reason"):
+            lines.append(f"原因: {report['reason']}")
+        if writes:
+            lines.append(f"写入: 新建 {writes.get('created', 0)} | 更新 {writes.get('updated', 0)} | "
+                         f"未变化 {writes.get('unchanged', 0)} | 失败 {writes.get('failed', 0)} / 共 {writes.get('total', 0)}")
+        repo_latency = report.get("repo_latency")
+        if repo_latency and repo_latency.get("count"):
+            lines.append(f"单个项目端到端: p50 {repo_latency['p50']:.1f}s | p95 {repo_latency['p95']:.1f}s | "
+                         f"最长 {repo_latency['max']:.1f}s")
+        circuits = report.get("circuits")
+        if circuits:
+            states = {"open": "熔断中", "half_open": "半开", "closed": "已恢复"}
+            lines.append("熔断: " + " | ".join(
+                f"{name} {states.get(item['state'], item['state'])}（打开 {item['opened']} 次，跳过 {item['rejected']} 个请求）"
+                for name, item in circuits.items()))
+        lines.append("阶段:")
+        for name, item in report.get("stages", {}).items():
+            latency = item["latency"]
+            lines.append(f"  {name:12} 用时 {item['wall']:7.1f}s | {latency['count']:4} 次 | "
+                         f"p50 {latency['p50']:6.2f}s | p95 {latency['p95']:6.2f}s | 最长 {latency['max']:6.2f}s")
+        lines.append("服务:")
+        for host, item in report.get("hosts", {}).items():
+            latency = item["latency"]
+            lines.append(f"  {host:28} {item['requests']:4} 请求 | 失败 {item['errors']:3} | 重试 {item['retries']:3} | "
+                         f"p50 {latency['p50']:6.2f}s | p95 {latency['p95']:6.2f}s | 最长 {latency['max']:6.2f}s")
+        return lines
+
+    def refresh_report_view(self):
+        if not hasattr(self, 'report_text'):
+            return
+        report = self.load_run_report()
+        text = "\n".join(self.format_run_report(report)) if report else "暂无运行报告"
+        self.report_text.configure(state="normal")
+        self.report_text.delete("1.0", "end")
+        self.report_text.insert("1.0", text + "\n")
+        self.report_text.configure(state="disabled")
+
+    def refresh_sync_card(self):
+        report = self.load_run_report()
+        if report and hasattr(self, 'sync_card'):
+            writes = report.get("writes", {})
+            written = writes.get("created", 0) + writes.get("updated", 0) + writes.get("unchanged", 0)
+            self.sync_card.value_label.configure(text=f"{written} 个项目")
 
     def create_settings_content(self):
         parent = self.frame_settings
@@ -887,6 +969,7 @@ class DesktopClient(ctk.CTk):
         self.show_frame("schedule")
 
     def show_history(self):
+        self.refresh_report_view()
         self.show_frame("history")
 
     def show_settings(self):
@@ -950,9 +1033,20 @@ class DesktopClient(ctk.CTk):
                 self.log("错误: " + result.stderr)
             if result.returncode == 0:
                 self.log("脚本运行完成")
+            self.after(0, self.show_last_report)
         except Exception as e:
             self.log(f"运行出错: {e}")
 
+    def show_last_report(self):
+        """运行结束后把报告中的阶段和服务耗时写入日志，并刷新统计卡片"""
+        report = self.load_run_report()
+        if not report:
+            return
+        for line in self.format_run_report(report):
+            self.log(line)
+        self.refresh_sync_card()
+        self.refresh_report_view()
+
     def check_scheduled_task(self):
         try:
             result = subprocess.run(
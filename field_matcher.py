@@ -0,0 +1,225 @@
+"""
+Notion 字段匹配
+把仓库数据的字段（name、stars、topics……）分配给数据库属性：
+先建立一次规范化的候选名索引，再为每个 (字段, 属性) 组合按名称相似度和属性类型打分，
+最后用匈牙利算法求总分最高的一对一分配，避免贪心匹配时前面的字段抢走后面字段更合适的属性
+"""
+
+import re
+from difflib import SequenceMatcher
+
+# 每个字段可能对应的属性名
+FIELD_CANDIDATES = {
+    "name": ["name", "title", "project", "repository", "repo", "项目名称", "名称"],
+    "full_name": ["full name", "fullname", "full_name", "repo", "repository", "完整名称", "全名"],
+    "description": ["description", "desc", "about", "summary", "intro", "描述", "简介"],
+    "url": ["url", "link", "github", "github url", "repository url", "项目链接", "链接", "地址"],
+    "stars": ["stars", "star", "stargazers", "星标数", "总星标数", "点赞数", "stars数"],
+    "language": ["language", "lang", "编程语言", "语言", "技术栈", "tech stack"],
+    "forks": ["forks", "fork", "fork count", "分支数", "fork数", "fork"],
+    "owner": ["owner", "author", "creator", "maintainer", "用户", "作者", "所有者", "owner"],
+    "created_at": ["created", "created at", "create date", "date created", "创建时间", "创建日期"],
+    "updated_at": ["updated", "updated at", "last updated", "update date", "更新时间", "更新日期"],
+    "open_issues": ["issues", "open issues", "issue count", "问题数", "issues数"],
+    "topics": ["topics", "tags", "labels", "subject", "主题", "标签"],
+    "license": ["license", "licence", "许可证", "授权"],
+    "today_stars": ["今日新增", "today stars", "new stars"],
+    "date": ["日期", "date", "时间", "time"],
+    "repo_detail": ["仓库详情", "ai解析描述", "仓库描述", "ai description", "detail", "details", "ai总结", "ai摘要"],
+}
+
+# 字段值的种类
+FIELD_KINDS = {
+    "name": "text", "full_name": "text", "description": "text", "language": "text",
+    "owner": "text", "license": "text", "repo_detail": "text",
+    "url": "url",
+    "stars": "number", "forks": "number", "open_issues": "number", "today_stars": "number",
+    "created_at": "date", "updated_at": "date", "date": "date",
+    "topics": "list",
+}
+
+# 属性类型对各种值的适合程度（与 build_notion_properties 的写入方式一致），未列出的组合不能写入
+TYPE_COMPATIBILITY = {
+    "text": {"title": 1.0, "rich_text": 1.0, "text": 1.0, "select": 0.6},
+    "url": {"url": 1.0, "rich_text": 0.7, "text": 0.7, "title": 0.5},
+    "number": {"number": 1.0, "rich_text": 0.5, "text": 0.5},
+    "date": {"date": 1.0, "rich_text": 0.5, "text": 0.5},
+    "list": {"multi_select": 1.0},
+}
+
+# title 属性优先分配给 name；名称都对不上时 name 仍可以用较低的得分分配到 title 属性（每个数据库有且只有一个）
+TITLE_FIELD = "name"
+TITLE_OTHER_FIELD_WEIGHT = 0.8
+TITLE_FALLBACK_SCORE = 0.3
+
+# 名称完全匹配候选词的得分；模糊匹配得分 = 相似度 × FUZZY_WEIGHT，相似度低于 FUZZY_CUTOFF 不算匹配
+EXACT_SCORE = 1.0
+FUZZY_WEIGHT = 0.8
+FUZZY_CUTOFF = 0.75
+
+SEPARATOR_PATTERN = re.compile(r'[\s_\-]+')
+
+
+def normalize_name(name):
+    """小写，空白/下划线/连字符统一为一个空格"""
+    return SEPARATOR_PATTERN.sub(" ", name.lower()).strip()
+
+
+def build_candidate_index(field_candidates):
+    """规范化候选名 → 字段列表；字段名本身也作为候选"""
+    index = {}
+    for field_key, candidates in field_candidates.items():
+        for candidate in [field_key] + candidates:
+            fields = index.setdefault(normalize_name(candidate), [])
+            if field_key not in fields:
+                fields.append(field_key)
+    return index
+
+
+def type_score(field_key, prop_type):
+    score = TYPE_COMPATIBILITY.get(FIELD_KINDS.get(field_key, "text"), {}).get(prop_type, 0.0)
+    if prop_type == "title" and field_key != TITLE_FIELD:
+        score *= TITLE_OTHER_FIELD_WEIGHT
+    return score
+
+
+def score_matrix(field_candidates, properties):
+    """
+    返回 (字段列表, 属性名列表, 得分矩阵)，得分 = 名称得分 × 类型得分，0 表示不能分配
+    完全匹配通过候选索引一次查出；模糊匹配只对类型兼容的组合计算，先用 quick_ratio 上界剪枝
+    """
+    fields = list(field_candidates)
+    prop_names = list(properties)
+    field_rows = {field_key: row for row, field_key in enumerate(fields)}
+    index = build_candidate_index(field_candidates)
+    scores = [[0.0] * len(prop_names) for _ in fields]
+
+    # 模糊匹配用的候选词，按字段分组（SequenceMatcher 缓存 seq2 的分析结果，每个候选词只建一次）
+    fuzzy_candidates = []
+    for field_key in fields:
+        matchers = []
+        for candidate in sorted({normalize_name(c) for c in [field_key] + field_candidates[field_key]}):
+            matcher = SequenceMatcher()
+            matcher.set_seq2(candidate)
+            matchers.append((len(candidate), matcher))
+        fuzzy_candidates.append(matchers)
+    # 每种属性类型对各字段的类型得分
+    type_scores_by_type = {}
+
+    for col, prop_name in enumerate(prop_names):
+        prop_type = properties[prop_name].get("type", "")
+        normalized = normalize_name(prop_name)
+        length = len(normalized)
+        type_scores = type_scores_by_type.get(prop_type)
+        if type_scores is None:
+            type_scores = [type_score(field_key, prop_type) for field_key in fields]
+            type_scores_by_type[prop_type] = type_scores
+
+        name_scores = [0.0] * len(fields)
+        for field_key in index.get(normalized, ()):
+            name_scores[field_rows[field_key]] = EXACT_SCORE
+
+        for row, matchers in enumerate(fuzzy_candidates):
+            if not type_scores[row] or name_scores[row] >= EXACT_SCORE:
+                continue
+            for candidate_length, matcher in matchers:
+                # 长度差决定的相似度上界（即 real_quick_ratio），不够时不必比较
+                if 2.0 * min(length, candidate_length) / (length + candidate_length) < FUZZY_CUTOFF:
+                    continue
+                matcher.set_seq1(normalized)
+                if matcher.quick_ratio() >= FUZZY_CUTOFF:
+                    ratio = matcher.ratio()
+                    if ratio >= FUZZY_CUTOFF:
+                        name_scores[row] = max(name_scores[row], ratio * FUZZY_WEIGHT)
+
+        if prop_type == "title" and TITLE_FIELD in field_rows:
+            row = field_rows[TITLE_FIELD]
+            name_scores[row] = max(name_scores[row], TITLE_FALLBACK_SCORE)
+
+        for row in range(len(fields)):
+            if name_scores[row] and type_scores[row]:
+                scores[row][col] = name_scores[row] * type_scores[row]
+    return fields, prop_names, scores
+
+
+def solve_assignment(cost):
+    """
+    匈牙利算法（最短增广路 + 势函数），cost 为 n×m 矩阵且 n <= m，
+    返回每一行分配到的列，使总代价最小；复杂度 O(n²·m)
+    """
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    if n > m:
+        raise ValueError("行数不能多于列数")
+    inf = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)      # p[j]: 分配到第 j 列的行（1 开始，0 表示未分配）
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if used[j]:
+                    continue
+                current = row[j - 1] - ui0 - v[j]
+                if current < minv[j]:
+                    minv[j] = current
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    assignment = [-1] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment
+
+
+def match_fields(properties, field_candidates=None):
+    """
+    计算字段映射，返回 {字段: (属性名, 得分)}
+    properties 为 Notion 数据库的 properties（属性名 → {type, ...}）
+    """
+    field_candidates = field_candidates or FIELD_CANDIDATES
+    fields, prop_names, scores = score_matrix(field_candidates, properties)
+    if not fields or not prop_names:
+        return {}
+
+    # 最大化总得分 = 最小化负得分；行数多于列数时转置求解
+    if len(fields) <= len(prop_names):
+        assignment = solve_assignment([[-score for score in row] for row in scores])
+        pairs = [(row, col) for row, col in enumerate(assignment)]
+    else:
+        transposed = [[-scores[row][col] for row in range(len(fields))] for col in range(len(prop_names))]
+        assignment = solve_assignment(transposed)
+        pairs = [(row, col) for col, row in enumerate(assignment)]
+
+    mapping = {}
+    for row, col in sorted(pairs):
+        if col >= 0 and scores[row][col] > 0:
+            mapping[fields[row]] = (prop_names[col], scores[row][col])
+    return mapping
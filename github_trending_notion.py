@@ -7,14 +7,35 @@ GitHub Trending to Notion 自动化脚本
 import requests
 import json
 import re
+import argparse
 from datetime import datetime, timedelta
 import time
 import os
 import sys
-from difflib import get_close_matches
-from bs4 import BeautifulSoup
+import base64
+import hashlib
+import random
+import threading
+from urllib.parse import unquote, urlsplit
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from html.parser import HTMLParser
 from dotenv import load_dotenv
 
+from circuit_breaker import CircuitBreakers, CircuitOpenError
+from http_cache import HttpCache, capped_get, parse_host_ttls
+from http_transport import HttpTransport
+from field_matcher import FIELD_CANDIDATES, match_fields
+from notion_payload import (
+    VOLATILE_FIELDS, changed_properties, compile_property_serializers, property_hashes,
+    property_plain_text, serialize_properties
+)
+from local_store import AiAnalysisCache, NotionMirror, Outbox
+from pipeline import Pipeline, Stage, percentile
+from profiling import profile_call
+from rate_limit import RateLimiter, parse_retry_after
+from run_budget import DeadlineExceeded, RunBudget, parse_degrade_at
+from run_metrics import RunMetrics, latency_summary
+
 # 加载.env文件
 load_dotenv()
 
@@ -25,6 +46,456 @@ if sys.platform == "win32":
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 
+# 预编译的解析用正则
+NUMBER_PATTERN = re.compile(r'([\d.]+)([kmb]?)')
+TODAY_STAR_PATTERNS = [
+    re.compile(r'(\d+[kmbKMB]?)\s*stars?\s*today', re.IGNORECASE),
+    re.compile(r'(\d+)\s+stars?\s+today', re.IGNORECASE),
+    re.compile(r'today[^\"\d]*(\d+)', re.IGNORECASE),
+]
+SPAN_NUMBER_PATTERN = re.compile(r'(\d+[kmbKMB]?)')
+ARTICLE_START_PATTERN = re.compile(r'<article\b', re.IGNORECASE)
+ARTICLE_END_PATTERN = re.compile(r'</article\s*>', re.IGNORECASE)
+GITHUB_REPO_URL_PATTERN = re.compile(r'github\.com/([^/\s?#]+/[^/\s?#]+)', re.IGNORECASE)
+
+# GraphQL补全使用的仓库字段；README先用 HEAD:文件名 表达式定位（只取blob oid），
+# AI缓存未命中的仓库再批量取回正文
+GRAPHQL_README_ALIASES = {
+    "readmeMd": "README.md",
+    "readmeLowerMd": "readme.md",
+    "readmePlain": "README",
+    "readmeRst": "README.rst",
+}
+GRAPHQL_REPO_FIELDS = """
+    createdAt
+    updatedAt
+    repositoryTopics(first: 10) { nodes { topic { name } } }
+    licenseInfo { spdxId name }
+    issues(states: OPEN) { totalCount }
+    defaultBranchRef { name }
+"""
+GRAPHQL_README_LOCATE_FIELDS = "".join(
+    f'    {alias}: object(expression: "HEAD:{filename}") {{ ... on Blob {{ oid }} }}\n'
+    for alias, filename in GRAPHQL_README_ALIASES.items()
+)
+GRAPHQL_README_TEXT_FIELDS = """
+    readme: object(expression: $expression) { ... on Blob { oid text } }
+"""
+
+# AI提示词模板；修改模板时同步提升版本号，使旧的AI缓存失效
+AI_PROMPT_VERSION = "2"
+AI_PROMPT_TEMPLATE = """请分析以下GitHub开源项目，用中文生成一段简洁的描述（200字以内）。
+
+项目名称：{full_name}
+原描述：{description}
+
+README内容（精简）：
+{readme}
+
+请按以下格式回答：
+**是什么**：[项目是什么]
+**有什么用**：[项目的核心功能和用途]
+**怎么用**：[简单的使用方法或安装步骤]
+
+要求：
+1. 用简洁准确的中文
+2. 突出项目的核心价值
+3. 实用的使用建议
+4. 总字数控制在200字以内
+"""
+
+# 批量模式：多个仓库放进一次请求，要求模型输出以 full_name 为键的JSON
+AI_BATCH_PROMPT_TEMPLATE = """请分析以下 {count} 个GitHub开源项目，分别为每个项目用中文生成一段简洁的描述（200字以内）。
+
+每个项目的描述按以下格式：
+**是什么**：[项目是什么]
+**有什么用**：[项目的核心功能和用途]
+**怎么用**：[简单的使用方法或安装步骤]
+
+要求：
+1. 用简洁准确的中文
+2. 突出项目的核心价值
+3. 实用的使用建议
+4. 每个项目总字数控制在200字以内
+
+只输出一个JSON对象，不要输出其他内容。键为项目名称（owner/repo，与下文完全一致），值为该项目的描述文本。
+
+{items}
+"""
+AI_BATCH_ITEM_TEMPLATE = """=== 项目{index}：{full_name} ===
+原描述：{description}
+README内容（精简）：
+{readme}"""
+
+
+CJK_PATTERN = re.compile(r'[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+
+
+def estimate_tokens(text):
+    """本地估算token数：中日韩字符约1个token，其余字符约4个字符1个token"""
+    if not text:
+        return 0
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def trim_to_tokens(text, max_tokens):
+    """截取文本开头部分，使估算的token数不超过 max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+# README精简用的正则
+README_COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.DOTALL)
+README_BADGE_PATTERN = re.compile(r'\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)')
+README_IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\([^)]*\)|!\[[^\]]*\]\[[^\]]*\]')
+README_HTML_BLOCK_PATTERN = re.compile(r'<(picture|svg|table|details)\b.*?</\1\s*>', re.DOTALL | re.IGNORECASE)
+README_HTML_TAG_PATTERN = re.compile(r'</?[a-zA-Z][^>]*>')
+README_LINK_DEF_PATTERN = re.compile(r'^\s*\[[^\]]+\]:\s*\S+.*$', re.MULTILINE)
+README_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\((?:[^()]|\([^)]*\))*\)')
+README_FENCE_PATTERN = re.compile(r'^(```|~~~)[^\n]*\n(.*?)^\1[ \t]*$', re.DOTALL | re.MULTILINE)
+README_FENCE_OPEN_PATTERN = re.compile(r'^[ \t]{0,3}(```|~~~)')
+README_HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$', re.MULTILINE)
+README_BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+
+# 章节排序：数字越小越优先；匹配 README_SECTION_DROP 的章节直接丢弃
+README_SECTION_RANKS = [
+    (re.compile(r'feature|highlight|why|what|about|overview|introduction|功能|特性|特点|简介|介绍|概述', re.I), 1),
+    (re.compile(r'install|setup|quick ?start|getting started|requirement|安装|快速开始|快速上手|入门', re.I), 2),
+    (re.compile(r'usage|example|how to|demo|使用|用法|示例|教程', re.I), 3),
+]
+README_SECTION_DROP = re.compile(
+    r'licen[cs]e|contribut|acknowledg|sponsor|backer|star history|changelog|citation|cite|'
+    r'contact|community|support|faq|roadmap|todo|table of contents|^contents$|'
+    r'许可|协议|贡献|致谢|赞助|联系|交流群|更新日志|常见问题|目录',
+    re.I
+)
+README_CODE_BLOCK_LINES = 6
+
+
+def clean_readme(text):
+    """去掉徽章、图片、HTML标签、注释和链接定义，折叠代码块"""
+    text = README_COMMENT_PATTERN.sub("", text)
+    text = README_BADGE_PATTERN.sub("", text)
+    text = README_IMAGE_PATTERN.sub("", text)
+    text = README_HTML_BLOCK_PATTERN.sub("", text)
+    text = README_HTML_TAG_PATTERN.sub("", text)
+    text = README_LINK_DEF_PATTERN.sub("", text)
+    text = README_LINK_PATTERN.sub(r"\1", text)
+
+    def collapse(match):
+        lines = [line for line in match.group(2).splitlines() if line.strip()]
+        if len(lines) > README_CODE_BLOCK_LINES:
+            lines = lines[:README_CODE_BLOCK_LINES] + ["..."]
+        return match.group(1) + "\n" + "\n".join(lines) + "\n" + match.group(1)
+
+    text = README_FENCE_PATTERN.sub(collapse, text)
+    text = "\n".join(line.rstrip() for line in text.splitlines())
+    return README_BLANK_LINES_PATTERN.sub("\n\n", text).strip()
+
+
+def readme_fence_spans(text):
+    """
+    返回代码块（```/~~~）所占的 [(起点, 终点)] 以及未闭合代码块的标记；
+    未闭合的代码块延续到文末
+    """
+    spans = []
+    fence = None
+    start = 0
+    pos = 0
+    for line in text.splitlines(keepends=True):
+        match = README_FENCE_OPEN_PATTERN.match(line)
+        if fence is None:
+            if match:
+                fence = match.group(1)
+                start = pos
+        elif match and match.group(1) == fence and not line.strip()[len(fence):].strip():
+            spans.append((start, pos + len(line)))
+            fence = None
+        pos += len(line)
+    if fence is not None:
+        spans.append((start, len(text)))
+    return spans, fence
+
+
+def split_readme_sections(text):
+    """
+    按标题切分章节，返回 [(标题, 内容)]，第一个章节为标题前的引言（标题为空）
+    代码块里的 # 注释行不是标题，不在代码块内部切分
+    """
+    fences, _ = readme_fence_spans(text)
+    sections = []
+    last_end = 0
+    last_title = ""
+    for match in README_HEADING_PATTERN.finditer(text):
+        if any(start <= match.start() < end for start, end in fences):
+            continue
+        sections.append((last_title, text[last_end:match.start()].strip()))
+        last_title = match.group(2).strip()
+        last_end = match.end()
+    sections.append((last_title, text[last_end:].strip()))
+    return [(title, body) for title, body in sections if title or body]
+
+
+def compact_readme(text, max_tokens):
+    """
+    精简README用于AI分析：清理无关标记后按章节重要性填充token预算，
+    保留章节原有顺序；引言最优先，其次是功能、安装、使用
+    """
+    sections = split_readme_sections(clean_readme(text))
+    ranked = []
+    for position, (title, body) in enumerate(sections):
+        if title and README_SECTION_DROP.search(title):
+            continue
+        if not title or position == 0:
+            rank = 0
+        else:
+            rank = next((r for pattern, r in README_SECTION_RANKS if pattern.search(title)), 4)
+        ranked.append((rank, position, title, body))
+
+    remaining = max_tokens
+    chosen = {}
+    for _, position, title, body in sorted(ranked):
+        if remaining <= 0:
+            break
+        block = f"## {title}\n{body}" if title else body
+        cost = estimate_tokens(block)
+        if cost > remaining:
+            # 只截取放得下的开头部分，太短的残段不要
+            if remaining < 40:
+                continue
+            block = trim_to_tokens(block, remaining)
+            # 截断点落在代码块中间时补上结束标记，避免后续章节被当成代码
+            _, open_fence = readme_fence_spans(block)
+            if open_fence:
+                block = block.rstrip() + "\n" + open_fence
+            cost = estimate_tokens(block)
+        chosen[position] = block
+        remaining -= cost
+
+    return "\n\n".join(chosen[position] for position in sorted(chosen))
+
+
+def truncate_utf8(text, max_bytes):
+    """按UTF-8字节数截断文本，不截断半个字符"""
+    data = text.encode("utf-8")
+    if len(data) <= max_bytes:
+        return text
+    return data[:max_bytes].decode("utf-8", errors="ignore")
+
+
+def parse_number(text):
+    """解析包含k、M等单位的数字字符串"""
+    if not text:
+        return 0
+    text = text.strip().replace(',', '').replace(' ', '')
+    multipliers = {'k': 1000, 'm': 1000000, 'b': 1000000000}
+    match = NUMBER_PATTERN.search(text.lower())
+    if match:
+        num = float(match.group(1))
+        unit = match.group(2)
+        return int(num * multipliers.get(unit, 1))
+    return 0
+
+
+class TrendingPageExtractor(HTMLParser):
+    """
+    Trending页面快速解析器
+    只把 <article class="Box-row"> 片段交给 HTMLParser，边解析边收集字段，
+    不构建整页文档树；输出与 parse_repo_article_soup 相同的字段
+    """
+
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+                 "link", "meta", "param", "source", "track", "wbr"}
+    # 与 BeautifulSoup.get_text() 一致：不计入这些标签内的文本
+    SKIP_TEXT_TAGS = {"script", "style", "template"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.articles = []
+        self._article = None
+
+    def extract(self, html, limit=None):
+        """解析整页HTML，返回每个项目的原始字段列表"""
+        self.articles = []
+        pos = 0
+        while limit is None or len(self.articles) < limit:
+            start = ARTICLE_START_PATTERN.search(html, pos)
+            if not start:
+                break
+            end = ARTICLE_END_PATTERN.search(html, start.end())
+            if not end:
+                break
+            pos = end.end()
+            self.reset()
+            self._article = None
+            self.feed(html[start.start():pos])
+            self.close()
+        return self.articles
+
+    def _start_article(self, attrs):
+        self._article = {
+            "stack": [],
+            "pending": [],
+            "text": [],
+            "skip_depth": 0,
+            "title": None,      # 第一个 class="h3 lh-condensed" 的 h2/h3
+            "title_href": None,
+            "description": None,
+            "language": None,
+            "links": [],        # [(href, 文本片段)]
+            "spans": [],        # [文本片段]，按开始标签顺序
+        }
+
+    def handle_starttag(self, tag, attrs):
+        article = self._article
+        if article is None:
+            if tag == "article":
+                classes = (dict(attrs).get("class") or "").split()
+                if "Box-row" in classes:
+                    self._start_article(attrs)
+            return
+
+        self._flush_text()
+        attrs = dict(attrs)
+        collector = None
+
+        if tag in ("h2", "h3") and article["title"] is None:
+            if " ".join((attrs.get("class") or "").split()) == "h3 lh-condensed":
+                article["title"] = tag
+                collector = "title"
+        elif tag == "a":
+            if article["title"] == "open" and article["title_href"] is None:
+                article["title_href"] = attrs.get("href") or ""
+            if "href" in attrs:
+                parts = []
+                article["links"].append((attrs["href"] or "", parts))
+                collector = parts
+        elif tag == "p" and article["description"] is None:
+            article["description"] = []
+            collector = article["description"]
+        elif tag == "span":
+            parts = []
+            article["spans"].append(parts)
+            collector = parts
+            if attrs.get("itemprop") == "programmingLanguage" and article["language"] is None:
+                article["language"] = parts
+
+        if collector == "title":
+            article["title"] = "open"
+            collector = None
+            article["stack"].append((tag, "title"))
+        elif tag not in self.VOID_TAGS:
+            article["stack"].append((tag, collector))
+
+        if tag in self.SKIP_TEXT_TAGS:
+            article["skip_depth"] += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if self._article is not None and tag not in self.VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        article = self._article
+        if article is None:
+            return
+        self._flush_text()
+
+        if tag == "article" and not any(t == "article" for t, _ in article["stack"]):
+            self._finish_article()
+            return
+
+        stack = article["stack"]
+        # 与 BeautifulSoup 一致：关闭最近的同名标签，找不到则忽略
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0] == tag:
+                for closed_tag, collector in stack[i:]:
+                    if collector == "title":
+                        article["title"] = "closed"
+                    if closed_tag in self.SKIP_TEXT_TAGS:
+                        article["skip_depth"] -= 1
+                del stack[i:]
+                break
+
+    def handle_data(self, data):
+        if self._article is not None and not self._article["skip_depth"]:
+            self._article["pending"].append(data)
+
+    def _flush_text(self):
+        article = self._article
+        if not article["pending"]:
+            return
+        text = "".join(article["pending"])
+        article["pending"] = []
+        article["text"].append(text)
+        stripped = text.strip()
+        if not stripped:
+            return
+        for _, collector in article["stack"]:
+            if collector is not None and collector != "title":
+                collector.append(stripped)
+
+    def _finish_article(self):
+        article = self._article
+        self._article = None
+        fields = None
+        href = article["title_href"]
+        if href is not None:
+            fields = {
+                "href": href,
+                "description": "".join(article["description"] or []),
+                "language": "".join(article["language"] or []),
+                "links": [(link_href, "".join(parts)) for link_href, parts in article["links"]],
+                "spans": ["".join(parts) for parts in article["spans"]],
+                "text": "".join(article["text"]),
+            }
+        self.articles.append(fields)
+
+
+# 字段匹配规则的版本，修改 auto_match_fields 的规则后递增，使缓存的字段映射失效
+FIELD_MATCHER_VERSION = "2"
+
+
+def schema_fingerprint(properties):
+    """数据库属性中影响字段映射的部分 {属性名: (id, 类型)}"""
+    return {name: (prop.get("id"), prop.get("type")) for name, prop in properties.items()}
+
+
+def diff_schema_properties(old, new):
+    """比较两次获取的数据库属性，返回变化说明列表（按属性id识别重命名）"""
+    old_fp = schema_fingerprint(old)
+    new_fp = schema_fingerprint(new)
+    old_by_id = {prop_id: name for name, (prop_id, _) in old_fp.items() if prop_id}
+    changes = []
+    renamed = set()
+    for name, (prop_id, prop_type) in new_fp.items():
+        if name in old_fp:
+            if old_fp[name][1] != prop_type:
+                changes.append(f"~ {name}: 类型 {old_fp[name][1]} → {prop_type}")
+            continue
+        old_name = old_by_id.get(prop_id)
+        if old_name and old_name not in new_fp:
+            renamed.add(old_name)
+            changes.append(f"~ 重命名 {old_name} → {name}")
+            if old_fp[old_name][1] != prop_type:
+                changes.append(f"~ {name}: 类型 {old_fp[old_name][1]} → {prop_type}")
+        else:
+            changes.append(f"+ 新增 {name} ({prop_type})")
+    for name, (_, prop_type) in old_fp.items():
+        if name not in new_fp and name not in renamed:
+            changes.append(f"- 删除 {name} ({prop_type})")
+    return changes
+
+
 class GitHubTrendingToNotion:
     def __init__(self):
         # Notion 配置（从环境变量读取）
@@ -39,6 +510,12 @@ class GitHubTrendingToNotion:
         # GitHub 配置
         self.github_token = os.getenv("GITHUB_TOKEN", "")
 
+        # 各服务的基础地址，可指向本地模拟服务（benchmarks/mock_server.py）离线测试
+        self.github_base_url = os.getenv("GITHUB_BASE_URL", "https://github.com").rstrip("/")
+        self.github_raw_url = os.getenv("GITHUB_RAW_URL", "https://raw.githubusercontent.com").rstrip("/")
+        self.github_api_url = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+        self.notion_api_url = os.getenv("NOTION_API_URL", "https://api.notion.com").rstrip("/")
+
         # 火山引擎豆包 API 配置（从环境变量读取）
         self.volcano_api_key = os.getenv("VOLCANO_API_KEY", "")
         self.volcano_api_url = os.getenv("VOLCANO_API_URL", "https://ark.cn-beijing.volces.com/api/v3/chat/completions")
@@ -58,6 +535,49 @@ class GitHubTrendingToNotion:
         # 国内服务不走代理
         self.proxies_no_noproxy = None  # 火山引擎等国内服务
 
+        # 读取超时（秒）：Trending页面和GraphQL、README、AI、Notion 请求
+        self.github_timeout = float(os.getenv("GITHUB_TIMEOUT", "30"))
+        self.readme_timeout = float(os.getenv("README_TIMEOUT", "10"))
+        self.ai_timeout = float(os.getenv("AI_TIMEOUT", "30"))
+        self.notion_timeout = float(os.getenv("NOTION_TIMEOUT", "30"))
+        # 失败重试（5xx、网络错误）按 2^尝试次数 秒退避，最多等待的秒数
+        self.retry_backoff_max = float(os.getenv("RETRY_BACKOFF_MAX", "30"))
+        # 运行时间预算（秒，0 表示不限时）：已用时间达到各比例时依次跳过README探测、跳过AI分析、
+        # 写入时不带AI总结；请求超时和重试等待不超过剩余时间，截止后不再发出请求
+        self.budget = RunBudget(float(os.getenv("RUN_TIME_BUDGET", "1800")),
+                                parse_degrade_at(os.getenv("RUN_DEGRADE_AT", "")))
+
+        # 运行指标：每个HTTP请求的延迟/状态码/字节数/重试，以及各阶段耗时
+        self.metrics = RunMetrics()
+
+        # 熔断器：某个上游连续失败（网络错误、超时、5xx）CIRCUIT_FAILURE_THRESHOLD 次后，
+        # CIRCUIT_COOLDOWN 秒内的请求直接失败，之后放行一个探测请求；阈值为0时关闭
+        self.breakers = CircuitBreakers(
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            cooldown=float(os.getenv("CIRCUIT_COOLDOWN", "60"))
+        )
+
+        # 共享的HTTP传输层：每个上游一个带连接池的Session（代理、请求头、超时分别配置）
+        self.transport = HttpTransport(
+            proxies=self.proxies,
+            pool_size=max(1, int(os.getenv("HTTP_POOL_SIZE", "10"))),
+            metrics=self.metrics,
+            budget=self.budget,
+            breakers=self.breakers
+        )
+        self.transport.configure("notion", headers=self.notion_headers, timeout=(10, self.notion_timeout))
+        self.transport.configure("volcano", headers={
+            "Content-Type": "application/json; charset=utf-8",
+            "Authorization": f"Bearer {self.volcano_api_key}"
+        })
+        if self.github_token:
+            self.transport.configure("github_api", headers={"Authorization": f"token {self.github_token}"})
+        # 自定义地址（带端口时按 主机:端口 区分）归到对应的上游
+        for url, name in ((self.github_base_url, "github_web"), (self.github_raw_url, "github_raw"),
+                          (self.github_api_url, "github_api"), (self.notion_api_url, "notion"),
+                          (self.volcano_api_url, "volcano")):
+            self.transport.register_host(urlsplit(url).netloc, name)
+
         # 数据库属性结构（运行时获取）
         self.db_properties = {}
         # 字段映射关系（运行时自动匹配）
@@ -66,104 +586,298 @@ class GitHubTrendingToNotion:
         self.current_datetime = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
 
         # Trending配置
-        self.trending_url = "https://github.com/trending"
-        self.trending_period = "daily"  # daily, weekly, monthly
+        self.trending_url = f"{self.github_base_url}/trending"
+        self.trending_period = os.getenv("TRENDING_PERIOD", "daily")  # daily, weekly, monthly
+        # 多周期/多语言抓取：TRENDING_PERIODS=daily,weekly,monthly  TRENDING_LANGUAGES=python,rust,all
+        # 两者组合成 (周期, 语言) 列表，语言为空或 all 表示不限语言
+        self.trending_targets = self.parse_trending_targets(
+            os.getenv("TRENDING_PERIODS", ""),
+            os.getenv("TRENDING_LANGUAGES", "")
+        )
+        # 每个榜单取前几个项目
+        self.trending_top_n = max(1, int(os.getenv("TRENDING_TOP_N", "10")))
+        # 并发抓取的线程数
+        self.crawl_workers = max(1, int(os.getenv("CRAWL_WORKERS", "6")))
 
         # AI分析缓存（避免重复分析同一仓库）
         self.analyzed_repos = {}
 
-    def get_database_schema(self):
-        """获取Notion数据库的结构"""
-        url = f"https://api.notion.com/v1/databases/{self.notion_database_id}"
+        # 本地缓存目录
+        self.cache_dir = os.getenv("CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+        # 运行结束时仍未恢复的熔断器保存到缓存目录，下次运行沿用；CIRCUIT_PERSIST=0 关闭
+        if os.getenv("CIRCUIT_PERSIST", "1") != "0":
+            self.breakers.state_file = os.path.join(self.cache_dir, "circuit_breakers.json")
+            self.breakers.load()
+
+        # Notion数据库结构和字段映射缓存：默认与 check_notion_schema.py 生成的 notion_schema.json 放在同一目录；
+        # 指定了 CACHE_DIR 时放在缓存目录，NOTION_SCHEMA_CACHE_FILE 可直接指定文件
+        self.schema_cache_file = os.getenv("NOTION_SCHEMA_CACHE_FILE") or os.path.join(
+            os.getenv("CACHE_DIR") or os.path.dirname(os.path.abspath(__file__)), "notion_schema_cache.json")
+        self.schema_cache_ttl = float(os.getenv("NOTION_SCHEMA_TTL_HOURS", "24")) * 3600
+        # 可直接使用的缓存字段映射（结构未变化时由 get_database_schema 设置）
+        self.cached_field_mapping = None
+        self.schema_last_edited_time = None
+        self.schema_fetched_at = None
+        # 按字段映射编译的属性序列化函数（见 build_notion_properties）
+        self.property_serializers = []
+        self.property_serializers_key = None
+
+        # README位置索引（跨运行保存每个仓库README的路径/分支，以及"没有README"的结果）
+        self.readme_index_file = os.path.join(self.cache_dir, "readme_index.json")
+        self.readme_index = self.load_readme_index()
+        self.readme_index_lock = threading.Lock()
+        self.readme_missing_ttl = float(os.getenv("README_MISSING_TTL_HOURS", "72")) * 3600
+        # README下载上限（字节），超出部分不下载
+        self.readme_max_bytes = max(1024, int(os.getenv("README_MAX_BYTES", "32768")))
+        # 每个仓库README的下载统计 {full_name: {source, cap, transferred, truncated}}
+        self.readme_stats = {}
+        # 本次运行获取到的README校验信息 {full_name: "etag:..." / "sha:..."}
+        self.readme_validators = {}
+        # API不可用时按顺序尝试的文件名（最常见的在前），同时进行的请求数为 readme_probe_workers
+        self.readme_names = ["README.md", "readme.md", "Readme.md", "README", "README.rst"]
+        self.readme_probe_workers = 2
+
+        # AI分析持久化缓存，AI_CACHE=0 关闭
+        self.ai_cache = None
+        if os.getenv("AI_CACHE", "1") != "0":
+            self.ai_cache = AiAnalysisCache(
+                self.cache_dir,
+                ttl_seconds=float(os.getenv("AI_CACHE_TTL_DAYS", "30")) * 86400,
+                max_entries=int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000"))
+            )
 
+        # AI并发分析：线程数、每秒请求数、最大尝试次数
+        self.ai_concurrency = max(1, int(os.getenv("AI_CONCURRENCY", "4")))
+        self.ai_limiter = RateLimiter(
+            rate=float(os.getenv("AI_RPS", "2")),
+            max_concurrent=self.ai_concurrency
+        )
+        self.ai_max_attempts = max(1, int(os.getenv("AI_MAX_RETRIES", "3")))
+        # 连接池至少容纳所有并发线程，避免线程间争抢连接后反复新建
+        self.transport.configure("volcano", pool_size=max(self.transport.pool_size, self.ai_concurrency))
+        for name in ("github_web", "github_raw", "github_api"):
+            self.transport.configure(name, pool_size=max(self.transport.pool_size, self.crawl_workers))
+
+        # Notion并发写入：线程数、每秒请求数（Notion 文档给出的平均限额约为 3 次/秒）、最大尝试次数
+        self.notion_concurrency = max(1, int(os.getenv("NOTION_CONCURRENCY", "3")))
+        self.notion_limiter = RateLimiter(
+            rate=float(os.getenv("NOTION_RPS", "3")),
+            max_concurrent=self.notion_concurrency
+        )
+        self.notion_max_attempts = max(1, int(os.getenv("NOTION_MAX_RETRIES", "5")))
+        self.transport.configure("notion", pool_size=max(self.transport.pool_size, self.notion_concurrency))
+
+        # Notion数据库本地镜像：已有页面的仓库更新原页面而不是新建；NOTION_UPSERT=0 时每次都新建页面
+        self.notion_mirror = NotionMirror(self.cache_dir) if os.getenv("NOTION_UPSERT", "1") != "0" else None
+        # 用于识别仓库的字段 (字段, 属性名)，按 full_name > url > name 的顺序选择
+        self.mirror_key = None
+
+        # 写入队列：记录每次运行的仓库数据和逐个写入结果，中断后用 --resume 继续；OUTBOX=0 关闭
+        self.outbox = None
+        if os.getenv("OUTBOX", "1") != "0":
+            self.outbox = Outbox(self.cache_dir, keep_runs=max(1, int(os.getenv("OUTBOX_KEEP_RUNS", "10"))))
+        self.outbox_run_id = None
+
+        # 流水线：抓取 → 补全 → AI分析 → 写入 各阶段重叠执行，PIPELINE=0 时按步骤依次执行
+        self.pipeline_enabled = os.getenv("PIPELINE", "1") != "0"
+        # 阶段之间队列的容量，下游处理不过来时上游等待
+        self.pipeline_queue_size = max(1, int(os.getenv("PIPELINE_QUEUE_SIZE", "20")))
+        # 同时进行的GraphQL补全批次数
+        self.pipeline_enrich_workers = max(1, int(os.getenv("PIPELINE_ENRICH_WORKERS", "2")))
+        # 每个仓库到达各阶段的时间 {full_name: {scraped/enriched/analyzed/written: perf_counter}}
+        self.repo_timeline = {}
+        self.pipeline = None
+
+        # JSON运行报告（各阶段和各域名的 p50/p95/最大耗时、写入结果），设为空字符串时不生成
+        self.run_report_file = os.getenv("RUN_REPORT_FILE", os.path.join(self.cache_dir, "run_report.json"))
+        # sync / pipeline / resume，写入运行报告
+        self.run_mode = None
+        # 每次AI请求的统计 {full_name或batch#n: {latency, attempts, status, prompt_tokens, completion_tokens}}
+        self.ai_call_stats = {}
+        # 每个仓库的AI统计（批量模式按比例分摊token），附带 mode: single/batch
+        self.ai_repo_stats = {}
+        # README精简：README_COMPACT=0 时沿用截取前8000字符；单个请求中README的token预算
+        self.readme_compact = os.getenv("README_COMPACT", "1") != "0"
+        self.ai_readme_tokens = int(os.getenv("AI_README_TOKENS", "2000"))
+        # 每个README放入提示词前后的token估算 {full_name: {raw, compact}}
+        self.prompt_size_stats = {}
+        # 批量模式：每次请求最多的仓库数（<=1 关闭）、输入token预算、每个README的token上限
+        self.ai_batch_size = int(os.getenv("AI_BATCH_SIZE", "1"))
+        self.ai_batch_tokens = int(os.getenv("AI_BATCH_TOKENS", "12000"))
+        self.ai_batch_readme_tokens = int(os.getenv("AI_BATCH_README_TOKENS", "1500"))
+
+        # GitHub GraphQL 批量补全
+        self.github_graphql_url = f"{self.github_api_url}/graphql"
+        self.graphql_batch_size = max(1, int(os.getenv("GRAPHQL_BATCH_SIZE", "25")))
+        self.graphql_cost = 0
+        self.graphql_last_cost = 1
+        self.graphql_remaining = None
+        # 流水线中多个补全线程同时查询，额度检查和消耗统计加锁
+        self.graphql_lock = threading.Lock()
+
+        # HTTP磁盘缓存（GitHub页面和README），HTTP_CACHE=0 关闭
+        self.http_cache = None
+        if os.getenv("HTTP_CACHE", "1") != "0":
+            self.http_cache = HttpCache(
+                self.cache_dir,
+                max_bytes=int(float(os.getenv("HTTP_CACHE_MAX_MB", "50")) * 1024 * 1024),
+                host_ttls=parse_host_ttls(os.getenv("HTTP_CACHE_TTLS", ""))
+            )
+
+    def http_get(self, url, max_bytes=None, **kwargs):
+        """GET请求，经过对应上游的共享Session；启用缓存时经过HTTP磁盘缓存；max_bytes 限制下载字节数"""
+        session = self.transport.for_url(url)
+        if self.http_cache:
+            return self.http_cache.get(url, max_bytes=max_bytes, session=session, **kwargs)
+        if max_bytes:
+            return capped_get(session, url, max_bytes, **kwargs)
+        return session.get(url, **kwargs)
+
+    def load_schema_cache(self):
+        """读取数据库结构缓存 {database_id, last_edited_time, fetched_at, properties, field_mapping, matcher_version}"""
         try:
-            response = requests.get(url, headers=self.notion_headers, proxies=self.proxies)
-            response.raise_for_status()
-            data = response.json()
-            self.db_properties = data.get("properties", {})
+            with open(self.schema_cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cache.get("database_id") != self.notion_database_id:
+            return None
+        return cache
+
+    def save_schema_cache(self):
+        """保存数据库结构和字段映射"""
+        data = {
+            "database_id": self.notion_database_id,
+            "last_edited_time": self.schema_last_edited_time,
+            "fetched_at": self.schema_fetched_at or time.time(),
+            "properties": self.db_properties,
+            "field_mapping": self.field_mapping,
+            "matcher_version": FIELD_MATCHER_VERSION,
+        }
+        try:
+            tmp_file = self.schema_cache_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_file, self.schema_cache_file)
+        except OSError as e:
+            print(f"  ⚠️  保存数据库结构缓存失败: {e}")
+
+    def invalidate_schema_cache(self):
+        """写入时出现属性校验错误，说明缓存的结构可能已过时，下次运行重新获取"""
+        try:
+            os.remove(self.schema_cache_file)
+            print("  ⚠️  Notion返回属性校验错误，已清除数据库结构缓存，下次运行重新获取")
+        except OSError:
+            pass
 
-            print("\n📊 Notion数据库结构:")
-            print("=" * 50)
-            for prop_name, prop_data in self.db_properties.items():
-                prop_type = prop_data.get("type", "unknown")
-                print(f"  [{prop_type:12}] {prop_name}")
-            print("=" * 50)
+    def print_database_schema(self, note=""):
+        print(f"\n📊 Notion数据库结构{note}:")
+        print("=" * 50)
+        for prop_name, prop_data in self.db_properties.items():
+            prop_type = prop_data.get("type", "unknown")
+            print(f"  [{prop_type:12}] {prop_name}")
+        print("=" * 50)
 
+    def get_database_schema(self):
+        """
+        获取Notion数据库的结构
+        NOTION_SCHEMA_TTL_HOURS 内直接使用本地缓存；过期后重新获取，last_edited_time 未变化
+        或属性（名称/类型）没有变化时沿用缓存的字段映射，否则输出变化并重新匹配
+        """
+        cache = self.load_schema_cache()
+        mapping_usable = bool(
+            cache and cache.get("field_mapping") and cache.get("matcher_version") == FIELD_MATCHER_VERSION
+        )
+        if cache and mapping_usable and time.time() - cache.get("fetched_at", 0) < self.schema_cache_ttl:
+            self.db_properties = cache["properties"]
+            self.property_serializers_key = None
+            self.schema_last_edited_time = cache.get("last_edited_time")
+            self.cached_field_mapping = cache["field_mapping"]
+            self.schema_fetched_at = cache["fetched_at"]
+            age_hours = (time.time() - cache["fetched_at"]) / 3600
+            print(f"\n📊 Notion数据库结构: 使用本地缓存（{len(self.db_properties)} 个属性，"
+                  f"{age_hours:.1f} 小时前获取，最后编辑 {self.schema_last_edited_time}）")
             return True
 
-        except requests.RequestException as e:
+        url = f"{self.notion_api_url}/v1/databases/{self.notion_database_id}"
+
+        # 经过Notion限速器，429按 Retry-After 重试，5xx和网络错误按指数退避重试
+        response, _, error = self.notion_request("GET", url, "数据库结构", idempotent=True)
+        if response is None or response.status_code != 200:
+            status = response.status_code if response is not None else "网络错误"
+            print(f"✗ 获取数据库结构失败: {status} - {error}")
+            return False
+        try:
+            data = response.json()
+        except ValueError as e:
             print(f"✗ 获取数据库结构失败: {e}")
             return False
 
-    def auto_match_fields(self):
-        """自动匹配GitHub数据到Notion字段"""
-        # 定义我们想写入的数据及其可能的字段名
-        field_candidates = {
-            "name": ["name", "title", "project", "repository", "repo", "项目名称", "名称"],
-            "full_name": ["full name", "fullname", "full_name", "repo", "repository", "完整名称", "全名"],
-            "description": ["description", "desc", "about", "summary", "intro", "描述", "简介"],
-            "url": ["url", "link", "github", "github url", "repository url", "项目链接", "链接", "地址"],
-            "stars": ["stars", "star", "stargazers", "星标数", "总星标数", "点赞数", "stars数"],
-            "language": ["language", "lang", "编程语言", "语言", "技术栈", "tech stack"],
-            "forks": ["forks", "fork", "fork count", "分支数", "fork数", "fork"],
-            "owner": ["owner", "author", "creator", "maintainer", "用户", "作者", "所有者", "owner"],
-            "created_at": ["created", "created at", "create date", "date created", "创建时间", "创建日期"],
-            "updated_at": ["updated", "updated at", "last updated", "update date", "更新时间", "更新日期"],
-            "open_issues": ["issues", "open issues", "issue count", "问题数", "issues数"],
-            "topics": ["topics", "tags", "labels", "subject", "主题", "标签"],
-            "license": ["license", "licence", "许可证", "授权"],
-            "today_stars": ["今日新增", "today stars", "new stars"],
-            "date": ["日期", "date", "时间", "time"],
-            "repo_detail": ["仓库详情", "ai解析描述", "仓库描述", "ai description", "detail", "details", "ai总结", "ai摘要"],
-        }
-
-        # 获取数据库中所有的属性名
-        db_prop_names = list(self.db_properties.keys())
-
-        print("\n🔍 自动匹配字段:")
-        print("-" * 50)
+        self.db_properties = data.get("properties", {})
+        self.property_serializers_key = None
+        self.schema_last_edited_time = data.get("last_edited_time")
+        self.schema_fetched_at = time.time()
+
+        if not cache:
+            self.print_database_schema()
+        elif cache.get("last_edited_time") == self.schema_last_edited_time:
+            print(f"\n📊 Notion数据库结构: 未变化（最后编辑 {self.schema_last_edited_time}）")
+            if mapping_usable:
+                self.cached_field_mapping = cache["field_mapping"]
+        else:
+            changes = diff_schema_properties(cache.get("properties", {}), self.db_properties)
+            if changes:
+                self.print_database_schema(f"（有变化，上次获取后最后编辑 {self.schema_last_edited_time}）")
+                print("  变化:")
+                for change in changes:
+                    print(f"    {change}")
+            else:
+                print(f"\n📊 Notion数据库结构: 属性未变化（最后编辑 {self.schema_last_edited_time}）")
+                if mapping_usable:
+                    self.cached_field_mapping = cache["field_mapping"]
+        return True
 
-        # 记录已匹配的Notion字段，避免重复匹配
-        matched_notion_props = set()
+    def resolve_field_mapping(self):
+        """数据库结构未变化时沿用缓存的字段映射，否则重新匹配；结果连同数据库结构一起保存"""
+        mapping = self.cached_field_mapping
+        if mapping and all(prop in self.db_properties for prop in mapping.values()):
+            self.field_mapping = dict(mapping)
+            print(f"\n🔍 使用缓存的字段映射（{len(self.field_mapping)} 个字段）:")
+            print("-" * 50)
+            for field_key, prop_name in self.field_mapping.items():
+                print(f"  ✓ {field_key:15} → {prop_name} ({self.db_properties[prop_name].get('type', '')})")
+            print("-" * 50)
+            self.save_schema_cache()
+            return "name" in self.field_mapping
 
-        for field_key, candidates in field_candidates.items():
-            matched = None
+        self.field_mapping = {}
+        if not self.auto_match_fields():
+            return False
+        self.save_schema_cache()
+        return True
 
-            # 首先尝试精确匹配（不区分大小写）
-            for prop_name in db_prop_names:
-                if prop_name.lower() in [c.lower() for c in candidates] and prop_name not in matched_notion_props:
-                    matched = prop_name
-                    break
+    def auto_match_fields(self):
+        """
+        自动匹配GitHub数据到Notion字段
+        按名称相似度和属性类型为所有 (字段, 属性) 组合打分，整体求最优分配（见 field_matcher）
+        """
+        started = time.perf_counter()
+        matches = match_fields(self.db_properties)
 
-            # 如果没有精确匹配，尝试模糊匹配
-            if not matched:
-                # 将候选词转换为小写用于匹配
-                candidates_lower = [c.lower() for c in candidates]
-                for prop_name in db_prop_names:
-                    if prop_name.lower() in candidates_lower and prop_name not in matched_notion_props:
-                        matched = prop_name
-                        break
+        print("\n🔍 自动匹配字段:")
+        print("-" * 50)
 
-            # 使用difflib进行模糊匹配
-            if not matched and db_prop_names:
-                available_props = [n for n in db_prop_names if n not in matched_notion_props]
-                matches = get_close_matches(field_key, [n.lower() for n in available_props], n=1, cutoff=0.3)
-                if matches:
-                    # 找到原始大小写的名称
-                    for prop_name in available_props:
-                        if prop_name.lower() == matches[0]:
-                            matched = prop_name
-                            break
-
-            if matched:
+        for field_key in FIELD_CANDIDATES:
+            if field_key in matches:
+                matched, score = matches[field_key]
                 self.field_mapping[field_key] = matched
-                matched_notion_props.add(matched)
                 prop_type = self.db_properties[matched].get("type", "")
-                print(f"  ✓ {field_key:15} → {matched} ({prop_type})")
+                print(f"  ✓ {field_key:15} → {matched} ({prop_type}, {score:.2f})")
             else:
                 print(f"  - {field_key:15} → (未找到匹配字段)")
 
         print("-" * 50)
+        print(f"  {len(self.db_properties)} 个属性，匹配耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
 
         # 检查必需字段
         if "name" not in self.field_mapping:
@@ -175,23 +889,39 @@ class GitHubTrendingToNotion:
 
     def parse_number(self, text):
         """解析包含k、M等单位的数字字符串"""
-        if not text:
-            return 0
-        text = text.strip().replace(',', '').replace(' ', '')
-        multipliers = {'k': 1000, 'm': 1000000, 'b': 1000000000}
-        match = re.search(r'([\d.]+)([kmb]?)', text.lower())
-        if match:
-            num = float(match.group(1))
-            unit = match.group(2)
-            return int(num * multipliers.get(unit, 1))
-        return 0
-
-    def get_trending_repos(self):
+        return parse_number(text)
+
+    def parse_trending_targets(self, periods_str, languages_str):
+        """解析抓取目标，返回 [(周期, 语言), ...]，语言为空字符串表示全部语言"""
+        periods = [p.strip().lower() for p in periods_str.split(",") if p.strip()]
+        if not periods:
+            periods = [self.trending_period]
+
+        languages = []
+        for lang in languages_str.split(","):
+            lang = lang.strip().lower()
+            if lang == "all":
+                lang = ""
+            if lang not in languages:
+                languages.append(lang)
+        if not languages_str.strip():
+            languages = [""]
+
+        return [(period, lang) for period in periods for lang in languages]
+
+    def trending_list_label(self, period, language=""):
+        """榜单标识，例如 daily 或 weekly/python"""
+        return f"{period}/{language}" if language else period
+
+    def get_trending_repos(self, period=None, language=None):
         """
         从GitHub Trending页面获取热门项目
-        爬取 https://github.com/trending
+        爬取 {GITHUB_BASE_URL}/trending[/语言]?since=周期
         """
-        print(f"\n正在爬取 GitHub Trending (周期: {self.trending_period})...")
+        period = period or self.trending_period
+        language = language or ""
+        label = self.trending_list_label(period, language)
+        print(f"\n正在爬取 GitHub Trending (周期: {period}, 语言: {language or '全部'})...")
 
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -200,34 +930,143 @@ class GitHubTrendingToNotion:
         }
 
         try:
-            # 可以添加语言筛选，例如 ?since=daily&language=python
+            url = self.trending_url
+            if language:
+                url = f"{self.trending_url}/{language}"
             params = {
-                "since": self.trending_period
+                "since": period
             }
 
-            response = requests.get(self.trending_url, params=params, headers=headers, timeout=30, proxies=self.proxies)
+            response = self.http_get(url, params=params, headers=headers, timeout=self.github_timeout)
             response.raise_for_status()
             html = response.text
 
-            # 使用BeautifulSoup解析HTML
-            soup = BeautifulSoup(html, 'html.parser')
-            articles = soup.find_all('article', class_='Box-row')
+            # 只解析 Box-row 片段，一次遍历提取所有字段
+            articles = TrendingPageExtractor().extract(html, limit=self.trending_top_n)
 
             trending_repos = []
-            for article in articles[:10]:  # 只取前10个
-                repo_data = self.parse_repo_article_soup(article)
+            for fields in articles:
+                repo_data = self.parse_repo_fields(fields)
                 if repo_data:
+                    repo_data["trending_lists"] = [label]
                     trending_repos.append(repo_data)
 
-            print(f"✓ 成功获取 {len(trending_repos)} 个热门项目")
+            print(f"✓ [{label}] 成功获取 {len(trending_repos)} 个热门项目")
             return trending_repos
 
         except requests.RequestException as e:
-            print(f"✗ 获取GitHub Trending失败: {e}")
+            print(f"✗ [{label}] 获取GitHub Trending失败: {e}")
             return []
 
+    def crawl_trending(self, targets=None):
+        """
+        并发抓取多个 (周期, 语言) 榜单，合并去重
+        同一仓库只保留一条记录，trending_lists 记录它出现过的所有榜单
+        """
+        targets = targets or self.trending_targets
+        if len(targets) == 1:
+            return self.get_trending_repos(*targets[0])
+
+        print(f"\n并发抓取 {len(targets)} 个榜单 (线程数: {min(self.crawl_workers, len(targets))})...")
+        with ThreadPoolExecutor(max_workers=min(self.crawl_workers, len(targets))) as executor:
+            futures = [executor.submit(self.get_trending_repos, period, language) for period, language in targets]
+            # 按目标顺序收集结果，保证合并结果稳定
+            pages = [future.result() for future in futures]
+
+        merged = self.merge_trending_results(pages)
+        total = sum(len(page) for page in pages)
+        print(f"✓ 合并完成: {total} 条榜单记录 → {len(merged)} 个不重复项目")
+        return merged
+
+    def merge_trending_results(self, pages):
+        """按 full_name 合并多个榜单的结果"""
+        merged = {}
+        for page in pages:
+            for repo in page:
+                self.merge_trending_repo(merged, repo)
+        return list(merged.values())
+
+    def merge_trending_repo(self, merged, repo):
+        """把一条榜单记录合并进 merged {小写full_name: 仓库}，是新仓库时返回True"""
+        key = repo["full_name"].lower()
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = repo
+            return True
+
+        for label in repo.get("trending_lists", []):
+            if label not in existing["trending_lists"]:
+                existing["trending_lists"].append(label)
+        # 不同榜单抓取时间略有差异，取较大的计数
+        existing["stars"] = max(existing["stars"], repo["stars"])
+        existing["forks"] = max(existing["forks"], repo["forks"])
+        if not existing.get("today_stars"):
+            existing["today_stars"] = repo.get("today_stars", 0)
+        return False
+
+    def parse_repo_fields(self, fields):
+        """把 TrendingPageExtractor 提取的原始字段转换为项目数据"""
+        if not fields:
+            return None
+        try:
+            href = fields["href"]
+            parts = href.strip('/').split('/')
+            if len(parts) < 2:
+                return None
+            owner = parts[0]
+            repo_name = parts[1]
+
+            stars = 0
+            forks = 0
+            for link_href, text in fields["links"]:
+                if '/stargazers' in link_href:
+                    stars = parse_number(text)
+                elif '/forks' in link_href:
+                    forks = parse_number(text)
+
+            today_stars = 0
+            for pattern in TODAY_STAR_PATTERNS:
+                match = pattern.search(fields["text"])
+                if match:
+                    today_stars = parse_number(match.group(1))
+                    if today_stars > 0:
+                        break
+
+            if today_stars == 0:
+                for span_text in fields["spans"]:
+                    span_text = span_text.lower()
+                    if 'today' in span_text or 'star' in span_text:
+                        num_match = SPAN_NUMBER_PATTERN.search(span_text)
+                        if num_match:
+                            num = parse_number(num_match.group(1))
+                            if 0 < num < stars:
+                                today_stars = num
+                                break
+
+            return {
+                "name": repo_name,
+                "full_name": f"{owner}/{repo_name}",
+                "description": fields["description"] or "No description",
+                "url": f"https://github.com{href.strip()}",
+                "stars": stars,
+                "forks": forks,
+                "today_stars": today_stars,
+                "language": fields["language"] or "Unknown",
+                "owner": owner,
+                "date": self.current_datetime,
+                "created_at": None,
+                "updated_at": None,
+                "topics": [],
+                "license": "",
+                "open_issues": 0,
+            }
+
+        except Exception as e:
+            print(f"  解析项目时出错: {e}")
+            return None
+
     def parse_repo_article_soup(self, article):
-        """使用BeautifulSoup解析单个项目的HTML"""
+        """使用BeautifulSoup解析单个项目的HTML（旧解析路径，供对比测试使用）"""
         try:
             # 查找主链接 (通常是h2或h3标签中的a标签)
             title_tag = article.find(['h2', 'h3'], class_='h3 lh-condensed')
@@ -331,321 +1170,1690 @@ class GitHubTrendingToNotion:
             print(f"  解析项目时出错: {e}")
             return None
 
-    def get_readme_content(self, owner, repo_name):
-        """获取GitHub仓库的README内容"""
-        # 尝试多种README文件名
-        readme_names = ['README.md', 'readme.md', 'README.md', 'README']
-
-        headers = {"Accept": "application/vnd.github.v3.raw"}
-        if self.github_token:
-            headers["Authorization"] = f"token {self.github_token}"
+    def enrich_repos(self, repos, with_readme=True):
+        """
+        通过GitHub GraphQL批量补全 created_at/updated_at/topics/license/open_issues
+        每批用别名 repository(owner:, name:) 查询多个仓库；with_readme 时同时定位README，
+        再为AI缓存未命中的仓库批量取回README正文
+        """
+        if not repos:
+            return
+        if not self.github_token:
+            print("  ⚠️  未设置GITHUB_TOKEN，跳过GraphQL补全（GraphQL API需要认证）")
+            return
 
-        for readme_name in readme_names:
-            # 尝试从raw.githubusercontent.com获取
-            url = f"https://raw.githubusercontent.com/{owner}/{repo_name}/main/{readme_name}"
-            try:
-                response = requests.get(url, headers=headers, timeout=10, proxies=self.proxies)
-                if response.status_code == 200:
-                    return response.text[:15000]  # 限制长度
-            except:
-                pass
+        batches = [repos[i:i + self.graphql_batch_size] for i in range(0, len(repos), self.graphql_batch_size)]
+        print(f"\n🔎 GraphQL补全 {len(repos)} 个项目（{len(batches)} 次查询）...")
+        fields = GRAPHQL_REPO_FIELDS + (GRAPHQL_README_LOCATE_FIELDS if with_readme else "")
+        enriched = 0
+        for batch in batches:
+            data = self._graphql_repo_batch(batch, fields)
+            if data is None:
+                continue
+            for index, repo in enumerate(batch):
+                node = data.get(f"r{index}")
+                if node:
+                    self._apply_graphql_node(repo, node)
+                    enriched += 1
+
+        print(f"  ✓ 补全 {enriched}/{len(repos)} 个项目")
+
+        if with_readme:
+            # README未变化且已有AI分析结果的仓库不需要下载正文
+            need_text = [
+                repo for repo in repos
+                if repo.get("readme_path") and not repo.get("readme")
+                and self.lookup_cached_analysis(repo["full_name"], repo.get("readme_validator")) is None
+            ]
+            if need_text and self.budget.degraded("readme"):
+                print(f"  ⏳ 时间预算不足，不取回 {len(need_text)} 个README")
+                need_text = []
+            if need_text and not self.transport.available("volcano"):
+                print(f"  🔌 AI接口熔断中，不取回 {len(need_text)} 个README")
+                need_text = []
+            if need_text:
+                print(f"  📄 批量取回 {len(need_text)} 个README（其余 {len(repos) - len(need_text)} 个无需下载）")
+            for i in range(0, len(need_text), self.graphql_batch_size):
+                batch = need_text[i:i + self.graphql_batch_size]
+                expressions = [f"HEAD:{repo['readme_path']}" for repo in batch]
+                data = self._graphql_repo_batch(batch, GRAPHQL_README_TEXT_FIELDS, expressions)
+                if data is None:
+                    continue
+                for index, repo in enumerate(batch):
+                    blob = (data.get(f"r{index}") or {}).get("readme") or {}
+                    if blob.get("text"):
+                        # GraphQL不支持部分读取，README随查询整体返回，只在本地截断
+                        text = blob["text"]
+                        repo["readme"] = truncate_utf8(text, self.readme_max_bytes)
+                        transferred = len(text.encode("utf-8"))
+                        self.record_readme_stats(repo["full_name"], "graphql", transferred,
+                                                 transferred > self.readme_max_bytes)
+
+        print(f"  GraphQL消耗 {self.graphql_cost} 点"
+              f"{f'，剩余 {self.graphql_remaining}' if self.graphql_remaining is not None else ''}")
+
+    def _graphql_repo_batch(self, batch, fields, expressions=None):
+        """
+        执行一批别名查询，返回 data 字典，失败返回None
+        fields 为每个仓库块内查询的字段，其中 $expression 对应 expressions 中该仓库的值
+        """
+        with self.graphql_lock:
+            remaining = self.graphql_remaining
+            exhausted = remaining is not None and remaining < self.graphql_last_cost
+        if exhausted:
+            print(f"  ⚠️  GraphQL额度不足（剩余 {remaining}），跳过本批查询")
+            return None
 
-            # 尝试master分支
-            url = f"https://raw.githubusercontent.com/{owner}/{repo_name}/master/{readme_name}"
-            try:
-                response = requests.get(url, headers=headers, timeout=10, proxies=self.proxies)
-                if response.status_code == 200:
-                    return response.text[:15000]
-            except:
-                pass
+        variable_defs = []
+        blocks = []
+        variables = {}
+        for index, repo in enumerate(batch):
+            variable_defs.append(f"$o{index}: String!, $n{index}: String!")
+            variables[f"o{index}"] = repo["owner"]
+            variables[f"n{index}"] = repo["name"]
+            block_fields = fields
+            if expressions:
+                variable_defs.append(f"$e{index}: String!")
+                variables[f"e{index}"] = expressions[index]
+                block_fields = fields.replace("$expression", f"$e{index}")
+            blocks.append(f"  r{index}: repository(owner: $o{index}, name: $n{index}) {{{block_fields}  }}")
+
+        query = (
+            f"query({', '.join(variable_defs)}) {{\n" + "\n".join(blocks) +
+            "\n  rateLimit { cost remaining resetAt }\n}"
+        )
+        headers = {
+            "Authorization": f"bearer {self.github_token}",
+            "Content-Type": "application/json",
+        }
 
-        # 如果直接获取失败，尝试使用GitHub API
         try:
-            api_url = f"https://api.github.com/repos/{owner}/{repo_name}/readme"
-            response = requests.get(api_url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                # GitHub API返回base64编码的内容
-                import base64
-                data = response.json()
-                content = base64.b64decode(data.get('content', '')).decode('utf-8', errors='ignore')
-                return content[:15000]
-        except:
-            pass
-
-        return None
+            response = self.transport.session("github_api").post(
+                self.github_graphql_url,
+                headers=headers,
+                json={"query": query, "variables": variables},
+                timeout=self.github_timeout
+            )
+        except requests.RequestException as e:
+            print(f"  ✗ GraphQL请求失败: {e}")
+            return None
 
-    def analyze_repo_with_ai(self, owner, repo_name, description=""):
-        """使用火山引擎豆包AI分析仓库README，生成中文描述"""
-        # 检查缓存
-        cache_key = f"{owner}/{repo_name}"
-        if cache_key in self.analyzed_repos:
-            return self.analyzed_repos[cache_key]
+        if response.status_code != 200:
+            print(f"  ✗ GraphQL错误: {response.status_code} - {response.text[:100]}")
+            return None
 
-        if not self.volcano_api_key:
-            print("  ⚠️  未设置VOLCANO_API_KEY环境变量，跳过AI分析")
+        try:
+            result = response.json()
+        except ValueError:
+            # 代理或网关返回的HTML错误页
+            print(f"  ✗ GraphQL响应不是JSON: {response.text[:100]}")
             return None
+        data = result.get("data") or {}
+        # 仓库不存在或改名时对应别名为null，并在errors中说明，其余结果照常使用
+        for error in (result.get("errors") or [])[:3]:
+            print(f"  ⚠️  GraphQL: {error.get('message', '')[:100]}")
+
+        rate_limit = data.get("rateLimit") or {}
+        if rate_limit:
+            with self.graphql_lock:
+                self.graphql_last_cost = rate_limit.get("cost", 1)
+                self.graphql_cost += self.graphql_last_cost
+                self.graphql_remaining = rate_limit.get("remaining")
+        return data
+
+    def _apply_graphql_node(self, repo, node):
+        repo["created_at"] = node.get("createdAt")
+        repo["updated_at"] = node.get("updatedAt")
+        repo["topics"] = [
+            topic_node["topic"]["name"]
+            for topic_node in (node.get("repositoryTopics") or {}).get("nodes", [])
+            if topic_node.get("topic")
+        ]
+        license_info = node.get("licenseInfo") or {}
+        spdx_id = license_info.get("spdxId")
+        repo["license"] = spdx_id if spdx_id and spdx_id != "NOASSERTION" else license_info.get("name", "")
+        repo["open_issues"] = (node.get("issues") or {}).get("totalCount", 0)
+
+        branch = (node.get("defaultBranchRef") or {}).get("name", "")
+        for alias, filename in GRAPHQL_README_ALIASES.items():
+            blob = node.get(alias)
+            if blob and blob.get("oid"):
+                repo["readme_path"] = filename
+                repo["readme_validator"] = f"sha:{blob['oid']}"
+                self.set_readme_validator(repo["full_name"], repo["readme_validator"])
+                if branch:
+                    self.remember_readme(
+                        repo["full_name"], path=filename, branch=branch,
+                        download_url=f"{self.github_raw_url}/{repo['full_name']}/{branch}/{filename}"
+                    )
+                break
+
+    def load_readme_index(self):
+        """读取README位置索引 {full_name: {path, branch, download_url} 或 {missing, checked_at}}"""
+        try:
+            with open(self.readme_index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_readme_index(self):
+        """保存README位置索引，供下次运行直接使用"""
+        with self.readme_index_lock:
+            data = dict(self.readme_index)
+        try:
+            os.makedirs(os.path.dirname(self.readme_index_file), exist_ok=True)
+            tmp_file = self.readme_index_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_file, self.readme_index_file)
+        except OSError as e:
+            print(f"  ⚠️  保存README索引失败: {e}")
+
+    def remember_readme(self, full_name, **entry):
+        with self.readme_index_lock:
+            self.readme_index[full_name.lower()] = entry
+
+    def set_readme_validator(self, full_name, validator):
+        """记录本次获取到的README校验信息（etag:... 或 sha:...），随AI分析结果一起缓存"""
+        if validator:
+            with self.readme_index_lock:
+                self.readme_validators[full_name.lower()] = validator
+
+    def readme_unchanged(self, full_name, validator):
+        """用保存的ETag向README地址发送HEAD条件请求，确认内容未变化（不下载正文）"""
+        if not validator or not validator.startswith("etag:"):
+            return False
+        with self.readme_index_lock:
+            entry = self.readme_index.get(full_name.lower()) or {}
+        if not entry.get("download_url"):
+            return False
 
-        print(f"  🤖 正在AI分析 {cache_key}...")
+        etag = validator[len("etag:"):]
+        try:
+            response = self.transport.for_url(entry["download_url"]).head(
+                entry["download_url"], headers={"If-None-Match": etag}, timeout=self.readme_timeout, allow_redirects=True)
+        except requests.RequestException:
+            return False
+        return response.status_code == 304 or response.headers.get("ETag") == etag
+
+    def record_readme_stats(self, full_name, source, transferred, truncated):
+        with self.readme_index_lock:
+            self.readme_stats[full_name] = {
+                "source": source,
+                "cap": self.readme_max_bytes,
+                "transferred": transferred,
+                "truncated": truncated,
+            }
 
-        # 获取README内容
-        readme = self.get_readme_content(owner, repo_name)
+    def readme_stats_summary(self):
+        stats = list(self.readme_stats.values())
+        transferred = sum(item["transferred"] for item in stats)
+        truncated = sum(1 for item in stats if item["truncated"])
+        return (f"{len(stats)} 个 | 传输 {transferred / 1024:.1f} KB | "
+                f"上限 {self.readme_max_bytes // 1024} KB/个 | 截断 {truncated} 个")
 
-        if not readme:
-            print(f"    ⚠️  无法获取README，跳过AI分析")
-            return None
+    def get_readme_content(self, owner, repo_name):
+        """
+        获取GitHub仓库的README内容
+        优先使用上次记录的位置（一次请求，通常命中HTTP缓存）；
+        否则调用 /repos/{owner}/{repo}/readme 直接得到默认分支的README；
+        API不可用时按顺序尝试常见文件名（少量并发），取最先成功的一个
+        """
+        full_name = f"{owner}/{repo_name}"
+        with self.readme_index_lock:
+            entry = self.readme_index.get(full_name.lower())
 
-        # 构建AI提示词
-        prompt = f"""请分析以下GitHub开源项目，用中文生成一段简洁的描述（200字以内）。
+        if entry and entry.get("missing"):
+            if time.time() - entry.get("checked_at", 0) < self.readme_missing_ttl:
+                return None
+        elif entry and entry.get("download_url"):
+            content = self._fetch_raw_readme(entry["download_url"], full_name)
+            if content is not None:
+                return content
+            # 文件被移动或删除，重新定位
 
-项目名称：{owner}/{repo_name}
-原描述：{description}
+        found, content = self._fetch_readme_via_api(owner, repo_name)
+        if found is not None:
+            return content
 
-README内容（截取）：
-{readme[:8000]}
+        return self._race_readme_candidates(owner, repo_name)
 
-请按以下格式回答：
-**是什么**：[项目是什么]
-**有什么用**：[项目的核心功能和用途]
-**怎么用**：[简单的使用方法或安装步骤]
+    def _fetch_raw_readme(self, url, full_name):
+        """从raw（GITHUB_RAW_URL）流式下载README（最多 readme_max_bytes 字节），失败返回None"""
+        try:
+            response = self.http_get(url, max_bytes=self.readme_max_bytes, timeout=self.readme_timeout)
+            if response.status_code in (200, 206):
+                source = "cache" if getattr(response, "from_cache", False) else "raw"
+                if response.headers.get("ETag"):
+                    self.set_readme_validator(full_name, f"etag:{response.headers['ETag']}")
+                truncated = getattr(response, "truncated", len(response.content) >= self.readme_max_bytes)
+                self.record_readme_stats(full_name, source, response.transferred_bytes, truncated)
+                return response.content.decode("utf-8", errors="ignore")
+        except requests.RequestException:
+            pass
+        return None
 
-要求：
-1. 用简洁准确的中文
-2. 突出项目的核心价值
-3. 实用的使用建议
-4. 总字数控制在200字以内
-"""
+    def _fetch_readme_via_api(self, owner, repo_name):
+        """
+        通过GitHub API获取README
+        返回 (True, 内容) / (False, None) 表示确定没有README / (None, None) 表示API不可用
+        """
+        api_url = f"{self.github_api_url}/repos/{owner}/{repo_name}/readme"
+        headers = {"Accept": "application/vnd.github+json"}
 
         try:
-            headers = {
-                "Content-Type": "application/json; charset=utf-8",
-                "Authorization": f"Bearer {self.volcano_api_key}"
-            }
+            response = self.http_get(api_url, headers=headers, timeout=self.readme_timeout)
+        except requests.RequestException:
+            return None, None
 
-            payload = {
-                "model": self.volcano_model,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": 500,
-                "temperature": 0.7
-            }
+        if response.status_code == 404:
+            self.remember_readme(f"{owner}/{repo_name}", missing=True, checked_at=time.time())
+            return False, None
+        if response.status_code != 200:
+            # 403/429 一般是未设置GITHUB_TOKEN时的限流
+            return None, None
 
-            response = requests.post(
-                self.volcano_api_url,
-                headers=headers,
-                json=payload,
-                timeout=30,
-                proxies=self.proxies_no_noproxy  # 国内服务不走代理
-            )
+        try:
+            data = response.json()
+            content = base64.b64decode(data.get("content", "")).decode("utf-8", errors="ignore")
+        except (ValueError, TypeError):
+            return None, None
+        if data.get("sha"):
+            self.set_readme_validator(f"{owner}/{repo_name}", f"sha:{data['sha']}")
+        # API以base64整体返回，无法按字节截断下载；之后的运行改用可流式读取的 download_url
+        self.record_readme_stats(f"{owner}/{repo_name}", "api", getattr(response, "transferred_bytes", len(response.content)),
+                                 data.get("size", 0) > self.readme_max_bytes)
+
+        download_url = data.get("download_url") or ""
+        branch = ""
+        prefix = f"{self.github_raw_url}/{owner}/{repo_name}/"
+        if download_url.startswith(prefix):
+            branch = download_url[len(prefix):].split("/", 1)[0]
+        self.remember_readme(f"{owner}/{repo_name}", path=data.get("path", ""), branch=branch,
+                             download_url=download_url)
+        return True, truncate_utf8(content, self.readme_max_bytes)
+
+    def _race_readme_candidates(self, owner, repo_name):
+        """
+        按顺序请求常见README文件名（HEAD指向默认分支），同时最多 readme_probe_workers 个，
+        返回最先成功的结果；排在后面、尚未开始的文件名不再请求
+        """
+        candidates = [
+            f"{self.github_raw_url}/{owner}/{repo_name}/HEAD/{name}"
+            for name in self.readme_names
+        ]
+        pending = iter(candidates)
+        workers = min(self.readme_probe_workers, len(candidates))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = {}
+
+        def submit_next():
+            url = next(pending, None)
+            if url is not None:
+                futures[executor.submit(self._fetch_raw_readme, url, f"{owner}/{repo_name}")] = url
+
+        try:
+            for _ in range(workers):
+                submit_next()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = futures.pop(future)
+                    content = future.result()
+                    if content is not None:
+                        self.remember_readme(f"{owner}/{repo_name}", path=url.rsplit("/", 1)[-1],
+                                             branch="HEAD", download_url=url)
+                        return content
+                    # 一个文件名失败后才开始下一个，找到后其余文件名不再请求
+                    submit_next()
+        finally:
+            # 仍在进行的请求在后台结束，不等待
+            executor.shutdown(wait=False, cancel_futures=True)
+        return None
 
-            if response.status_code == 200:
-                data = response.json()
-                ai_content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    def lookup_cached_analysis(self, full_name, validator=None):
+        """
+        下载README之前查找AI缓存：validator 与缓存中记录的一致，
+        或用缓存中的ETag确认README未变化时，直接返回缓存结果
+        """
+        if full_name in self.analyzed_repos:
+            return self.analyzed_repos[full_name]
+        if not self.ai_cache:
+            return None
 
-                # 清理内容
-                ai_content = ai_content.strip()
-                # 移除可能的markdown代码块标记
-                if ai_content.startswith("```"):
-                    ai_content = re.sub(r'^```[a-z]*\n', '', ai_content)
-                    ai_content = re.sub(r'\n```$', '', ai_content)
+        cached = self.ai_cache.latest(full_name, self.volcano_model, AI_PROMPT_VERSION)
+        if not cached:
+            return None
+        if validator:
+            unchanged = validator == cached["validator"]
+        elif self.budget.degraded("readme"):
+            # 时间预算不足时不发请求确认README，直接使用上次的分析
+            self.budget.skip("readme")
+            unchanged = True
+        else:
+            unchanged = self.readme_unchanged(full_name, cached["validator"])
+        if not unchanged:
+            return None
 
-                print(f"    ✓ AI分析完成")
-                self.analyzed_repos[cache_key] = ai_content
-                return ai_content
-            else:
-                print(f"    ✗ AI API错误: {response.status_code} - {response.text[:100]}")
-                return None
+        self.ai_cache.record_validator_hit(full_name, cached["readme_hash"], self.volcano_model, AI_PROMPT_VERSION)
+        self.analyzed_repos[full_name] = cached["content"]
+        return cached["content"]
 
-        except Exception as e:
-            print(f"    ✗ AI分析失败: {e}")
+    def latest_cached_analysis(self, full_name):
+        """不确认README是否变化，返回缓存中该仓库最近一次的分析结果（没有时返回None）"""
+        if not self.ai_cache:
             return None
+        cached = self.ai_cache.latest(full_name, self.volcano_model, AI_PROMPT_VERSION)
+        return cached["content"] if cached else None
 
-    def build_notion_properties(self, repo):
+    def prepare_ai_input(self, owner, repo_name, readme=None, quiet=False):
         """
-        根据自动匹配的字段映射，构建Notion属性
+        准备AI分析的输入：先查缓存，未命中时获取README
+        返回 (缓存的分析结果, None, None) 或 (None, readme, readme_hash)；无法获取README时全为None
         """
-        properties = {}
+        cache_key = f"{owner}/{repo_name}"
+        if cache_key in self.analyzed_repos:
+            return self.analyzed_repos[cache_key], None, None
 
-        # 辅助函数：安全截断文本
-        def truncate_text(text, max_length=2000):
-            if not text:
-                return ""
-            text = str(text)
-            return text[:max_length] if len(text) > max_length else text
+        # README未变化时直接使用上次的分析结果，不下载README
+        if not readme:
+            cached = self.lookup_cached_analysis(cache_key)
+            if cached:
+                if not quiet:
+                    print(f"  💾 {cache_key}: README未变化，使用缓存的AI分析")
+                return cached, None, None
+
+        # 获取README内容；时间预算不足或AI接口熔断时不再获取，有上次的分析（README可能已变化）时使用上次的分析
+        if not readme:
+            if self.budget.degraded("readme"):
+                self.budget.skip("readme")
+                return self.latest_cached_analysis(cache_key), None, None
+            if not self.transport.available("volcano"):
+                return self.latest_cached_analysis(cache_key), None, None
+            readme = self.get_readme_content(owner, repo_name)
+
+        if not readme:
+            print(f"    ⚠️  {cache_key}: 无法获取README，跳过AI分析")
+            return None, None, None
+
+        readme_hash = hashlib.sha256(readme.encode("utf-8")).hexdigest()
+        if self.ai_cache:
+            cached = self.ai_cache.get(cache_key, readme_hash, self.volcano_model, AI_PROMPT_VERSION)
+            if cached:
+                if not quiet:
+                    print(f"    💾 {cache_key}: README内容未变化，使用缓存的AI分析")
+                with self.readme_index_lock:
+                    validator = self.readme_validators.get(cache_key.lower())
+                if validator:
+                    self.ai_cache.set_validator(cache_key, readme_hash, self.volcano_model, AI_PROMPT_VERSION, validator)
+                self.analyzed_repos[cache_key] = cached
+                return cached, None, None
+
+        return None, readme, readme_hash
+
+    def prepare_readme_for_prompt(self, full_name, readme, max_tokens):
+        """
+        README放入提示词前的预处理：README_COMPACT=1 时清理并按章节填充token预算，
+        否则沿用原来的截取前8000字符（同样不超过 max_tokens）；记录处理前后的token估算
+        """
+        raw_tokens = estimate_tokens(readme[:8000])
+        if self.readme_compact:
+            prepared = compact_readme(readme, max_tokens)
+        else:
+            prepared = trim_to_tokens(readme[:8000], max_tokens)
+        with self.readme_index_lock:
+            self.prompt_size_stats[full_name] = {"raw": raw_tokens, "compact": estimate_tokens(prepared)}
+        return prepared
+
+    def prompt_size_summary(self):
+        stats = list(self.prompt_size_stats.values())
+        raw = sum(item["raw"] for item in stats)
+        compact = sum(item["compact"] for item in stats)
+        saved = (1 - compact / raw) * 100 if raw else 0
+        return f"{len(stats)} 个README | 精简前 ~{raw} tokens → 精简后 ~{compact} tokens（减少 {saved:.0f}%）"
+
+    def store_analysis(self, full_name, readme_hash, ai_content):
+        """保存AI分析结果到内存和持久化缓存"""
+        self.analyzed_repos[full_name] = ai_content
+        if self.ai_cache and ai_content:
+            with self.readme_index_lock:
+                validator = self.readme_validators.get(full_name.lower())
+            self.ai_cache.put(full_name, readme_hash, self.volcano_model, AI_PROMPT_VERSION,
+                              ai_content, validator)
+
+    def analyze_repo_with_ai(self, owner, repo_name, description="", readme=None, quiet=False):
+        """
+        使用火山引擎豆包AI分析仓库README，生成中文描述
+        readme 已由GraphQL补全取回时直接使用，不再单独请求；
+        结果按 README内容哈希 + 模型 + 提示词版本 持久化缓存；
+        quiet 时不输出进度（并发分析时由 analyze_repos 按顺序汇总输出）
+        """
+        cache_key = f"{owner}/{repo_name}"
+        if not self.volcano_api_key:
+            print("  ⚠️  未设置VOLCANO_API_KEY环境变量，跳过AI分析")
+            return None
+
+        cached, readme, readme_hash = self.prepare_ai_input(owner, repo_name, readme, quiet)
+        if cached or not readme:
+            return cached
+        if self.budget.degraded("ai"):
+            self.budget.skip("ai")
+            return None
+
+        if not quiet:
+            print(f"  🤖 正在AI分析 {cache_key}...")
 
-        # 根据字段映射和属性类型构建数据
-        for field_key, notion_prop_name in self.field_mapping.items():
-            prop_type = self.db_properties[notion_prop_name].get("type")
-            value = repo.get(field_key)
+        # 构建AI提示词
+        prompt = AI_PROMPT_TEMPLATE.format(full_name=cache_key, description=description,
+                                           readme=self.prepare_readme_for_prompt(cache_key, readme, self.ai_readme_tokens))
+
+        ai_content = self.chat_completion(prompt, cache_key)
+        if ai_content is None:
+            return None
+
+        call = self.ai_call_stats[cache_key]
+        self.ai_repo_stats[cache_key] = dict(call, mode="single")
+        if not quiet:
+            print(f"    ✓ {cache_key}: AI分析完成 ({call['latency']:.1f}s)")
+        self.store_analysis(cache_key, readme_hash, ai_content)
+        return ai_content
+
+    def chat_completion(self, prompt, label, max_tokens=500):
+        """
+        调用火山引擎chat completion接口，返回清理后的文本，失败返回None
+        经过AI限速器；429时按 Retry-After 暂停所有调用后重试，5xx和网络错误按指数退避重试；
+        每次调用的耗时、尝试次数和token用量记录在 ai_call_stats[label]
+        """
+        payload = {
+            "model": self.volcano_model,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.7
+        }
 
-            # 跳过空值（除了date和today_stars，它们有默认值）
-            if value is None and field_key not in ["date", "today_stars"]:
+        started = time.perf_counter()
+        attempts = 0
+        status = None
+        error = ""
+        while attempts < self.ai_max_attempts:
+            attempts += 1
+            try:
+                # 熔断中直接失败，不先等待限速器令牌
+                self.transport.check("volcano")
+                with self.ai_limiter, self.metrics.attempt(attempts):
+                    # 国内服务不走代理（volcano 上游的Session不设置代理，请求头已在初始化时配置）
+                    response = self.transport.session("volcano").post(
+                        self.volcano_api_url,
+                        json=payload,
+                        timeout=self.ai_timeout
+                    )
+            except requests.RequestException as e:
+                status, error = None, str(e)
+                if isinstance(e, (DeadlineExceeded, CircuitOpenError)):
+                    break
+                if attempts < self.ai_max_attempts:
+                    self.budget.sleep(min(2 ** attempts, self.retry_backoff_max))
                 continue
 
-            # 根据Notion属性类型设置值
-            if prop_type == "title":
-                properties[notion_prop_name] = {
-                    "title": [{"text": {"content": truncate_text(value, 2000)}}]
-                }
+            status = response.status_code
+            if status == 200:
+                break
+            error = response.text[:100]
+            if status < 500 and status != 429:
+                break
+            # 最后一次尝试失败后不再等待，也不暂停其他AI调用
+            if attempts >= self.ai_max_attempts:
+                break
+            if status == 429:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"), default=2 ** attempts)
+                print(f"    ⏳ {label}: AI接口限流，{retry_after:.0f}s 后重试")
+                self.ai_limiter.pause(self.budget.clamp(retry_after))
+            else:
+                self.budget.sleep(min(2 ** attempts, self.retry_backoff_max))
+
+        call = {
+            "latency": time.perf_counter() - started,
+            "attempts": attempts,
+            "status": status,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+        self.ai_call_stats[label] = call
 
-            elif prop_type == "rich_text":
-                # rich_text 可以存储字符串
-                text_content = truncate_text(value, 2000) if value else ""
-                properties[notion_prop_name] = {
-                    "rich_text": [{"text": {"content": text_content}}]
-                }
+        if status != 200:
+            print(f"    ✗ {label}: AI API错误: {status} - {error}")
+            return None
 
-            elif prop_type == "text":
-                properties[notion_prop_name] = {
-                    "text": {"content": truncate_text(value, 2000)}
-                }
+        try:
+            data = response.json()
+            ai_content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        except (ValueError, IndexError, AttributeError) as e:
+            print(f"    ✗ {label}: AI分析失败: {e}")
+            return None
 
-            elif prop_type == "number" and isinstance(value, (int, float)):
-                properties[notion_prop_name] = {"number": value}
+        usage = data.get("usage") or {}
+        call["prompt_tokens"] = usage.get("prompt_tokens") or estimate_tokens(prompt)
+        call["completion_tokens"] = usage.get("completion_tokens") or estimate_tokens(ai_content)
 
-            elif prop_type == "url":
-                properties[notion_prop_name] = {"url": value}
+        # 清理内容
+        ai_content = ai_content.strip()
+        # 移除可能的markdown代码块标记
+        if ai_content.startswith("```"):
+            ai_content = re.sub(r'^```[a-z]*\n', '', ai_content)
+            ai_content = re.sub(r'\n```$', '', ai_content)
+        return ai_content
 
-            elif prop_type == "date":
-                # 只有当值是日期格式时才使用date类型
-                if isinstance(value, str) and len(value) >= 10:
-                    properties[notion_prop_name] = {"date": {"start": value}}
+    def analyze_repos(self, repos):
+        """
+        并发分析多个仓库（线程数 AI_CONCURRENCY，速率 AI_RPS），
+        AI_BATCH_SIZE > 1 时把多个仓库打包进一次请求；
+        结果按输入顺序写回 repo["repo_detail"] 并按输入顺序输出
+        """
+        targets = [repo for repo in repos if repo.get("owner") and repo.get("name")]
+        if not targets:
+            return
 
-            elif prop_type == "email" and "@" in str(value):
-                properties[notion_prop_name] = {"email": str(value)}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.ai_concurrency) as executor:
+            if self.ai_batch_size > 1:
+                results = self._analyze_repos_batched(targets, executor)
+            else:
+                futures = [
+                    executor.submit(self.analyze_repo_with_ai, repo["owner"], repo["name"],
+                                    repo.get("description", ""), repo.get("readme"), True)
+                    for repo in targets
+                ]
+                results = []
+                for repo, future in zip(targets, futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        print(f"    ✗ {repo['full_name']}: AI分析失败: {e}")
+                        results.append(None)
+
+        analyzed = 0
+        for repo, ai_detail in zip(targets, results):
+            if ai_detail:
+                repo["repo_detail"] = ai_detail
+                analyzed += 1
+            self.print_ai_result(repo, ai_detail)
+        self.print_ai_summary(analyzed, len(targets), time.perf_counter() - started)
+
+    def print_ai_result(self, repo, ai_detail):
+        stats = self.ai_repo_stats.get(repo["full_name"])
+        if ai_detail:
+            if stats:
+                mode = "批量" if stats["mode"] == "batch" else "单个"
+                detail = (f"{mode} {stats['latency']:5.1f}s ×{stats['attempts']} | "
+                          f"tokens {stats['prompt_tokens']}+{stats['completion_tokens']}")
+            else:
+                detail = "缓存"
+            print(f"  ✓ {repo['full_name'][:40]:40} {detail}")
+        else:
+            print(f"  - {repo['full_name'][:40]:40} 未生成")
 
-            elif prop_type == "phone":
-                properties[notion_prop_name] = {"phone_number": str(value)}
+    def print_ai_summary(self, analyzed, total, elapsed):
+        for mode, mode_name in (("single", "单个"), ("batch", "批量")):
+            items = [item for item in self.ai_repo_stats.values() if item["mode"] == mode]
+            if not items:
+                continue
+            latencies = sorted(item["latency"] for item in items)
+            tokens = sum(item["prompt_tokens"] + item["completion_tokens"] for item in items)
+            print(f"  {mode_name}模式: {len(items)} 个仓库 | 平均耗时 {sum(latencies) / len(latencies):.1f}s | "
+                  f"p50 {latencies[len(latencies) // 2]:.1f}s | 平均 {tokens / len(items):.0f} tokens/仓库")
+        if self.prompt_size_stats:
+            print(f"  提示词README: {self.prompt_size_summary()}")
+        print(f"  完成 {analyzed}/{total} 个，AI请求 {len(self.ai_call_stats)} 次，"
+              f"限速等待 {self.ai_limiter.wait_time:.1f}s，总耗时 {elapsed:.1f}s")
+
+    def _analyze_repos_batched(self, targets, executor):
+        """批量模式：并发准备README，按token预算打包请求，解析失败的仓库回退到单独请求"""
+        prepared = [
+            executor.submit(self.prepare_ai_input, repo["owner"], repo["name"], repo.get("readme"), True)
+            for repo in targets
+        ]
+        results = {}
+        pending = []
+        for repo, future in zip(targets, prepared):
+            try:
+                cached, readme, readme_hash = future.result()
+            except Exception as e:
+                print(f"    ✗ {repo['full_name']}: AI分析失败: {e}")
+                cached, readme, readme_hash = None, None, None
+            if cached or not readme:
+                results[repo["full_name"]] = cached
+            else:
+                pending.append((repo, readme, readme_hash))
+        if pending and self.budget.degraded("ai"):
+            self.budget.skip("ai", len(pending))
+            pending = []
+
+        batches = self.pack_ai_batches(pending)
+        if batches:
+            print(f"  📦 {len(pending)} 个仓库打包为 {len(batches)} 个批量请求")
+        batch_futures = [
+            executor.submit(self._run_ai_batch, index, batch)
+            for index, batch in enumerate(batches, 1)
+        ]
+
+        fallback = []
+        for batch, future in zip(batches, batch_futures):
+            batch_results = future.result()
+            # 回退时使用完整README：单独请求有自己的token预算，缓存键也按完整README的哈希计算
+            for repo, readme, _, _ in batch:
+                if batch_results.get(repo["full_name"]):
+                    results[repo["full_name"]] = batch_results[repo["full_name"]]
+                else:
+                    fallback.append((repo, readme))
+        if fallback and self.budget.degraded("ai"):
+            self.budget.skip("ai", len(fallback))
+            fallback = []
+
+        if fallback:
+            print(f"  ↩️  {len(fallback)} 个仓库批量结果无效，改为单独请求")
+            fallback_futures = [
+                executor.submit(self.analyze_repo_with_ai, repo["owner"], repo["name"],
+                                repo.get("description", ""), readme, True)
+                for repo, readme in fallback
+            ]
+            for (repo, _), future in zip(fallback, fallback_futures):
+                try:
+                    results[repo["full_name"]] = future.result()
+                except Exception as e:
+                    print(f"    ✗ {repo['full_name']}: AI分析失败: {e}")
 
-            elif prop_type == "checkbox":
-                properties[notion_prop_name] = {"checkbox": bool(value)}
+        return [results.get(repo["full_name"]) for repo in targets]
 
-            elif prop_type == "multi_select" and field_key == "topics" and isinstance(value, list):
-                # 处理topics标签
-                options = self.db_properties[notion_prop_name].get("multi_select", {}).get("options", [])
-                existing_options = {opt["name"]: opt["id"] for opt in options}
+    def pack_ai_batches(self, pending):
+        """
+        按 AI_BATCH_SIZE 和 AI_BATCH_TOKENS 预算把待分析仓库分组，
+        每项为 (仓库, 完整README, README哈希, 放入批量提示词的精简README)
+        """
+        batches = []
+        current = []
+        current_tokens = 0
+        for repo, readme, readme_hash in pending:
+            trimmed = self.prepare_readme_for_prompt(repo["full_name"], readme, self.ai_batch_readme_tokens)
+            cost = estimate_tokens(trimmed) + estimate_tokens(repo.get("description", "")) + 30
+            if current and (len(current) >= self.ai_batch_size or current_tokens + cost > self.ai_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((repo, readme, readme_hash, trimmed))
+            current_tokens += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _run_ai_batch(self, index, batch):
+        """发送一个批量请求，返回 {full_name: 描述}，只包含通过校验的仓库"""
+        label = f"batch#{index}"
+        sections = "\n\n".join(
+            AI_BATCH_ITEM_TEMPLATE.format(
+                index=i, full_name=repo["full_name"], description=repo.get("description", ""), readme=trimmed
+            )
+            for i, (repo, _, _, trimmed) in enumerate(batch, 1)
+        )
+        prompt = AI_BATCH_PROMPT_TEMPLATE.format(count=len(batch), items=sections)
+        ai_content = self.chat_completion(prompt, label, max_tokens=min(4096, 450 * len(batch)))
+        if not ai_content:
+            return {}
+
+        parsed = self.parse_batch_response(ai_content, [repo["full_name"] for repo, _, _, _ in batch])
+        call = self.ai_call_stats[label]
+        prompt_costs = [estimate_tokens(trimmed) + 30 for _, _, _, trimmed in batch]
+        total_cost = sum(prompt_costs) or 1
+        output_total = sum(estimate_tokens(detail) for detail in parsed.values()) or 1
+        for (repo, _, readme_hash, _), cost in zip(batch, prompt_costs):
+            detail = parsed.get(repo["full_name"])
+            if not detail:
+                continue
+            # 按README长度和输出长度分摊批量请求的token用量
+            self.ai_repo_stats[repo["full_name"]] = {
+                "mode": "batch",
+                "latency": call["latency"],
+                "attempts": call["attempts"],
+                "status": call["status"],
+                "prompt_tokens": round(call["prompt_tokens"] * cost / total_cost),
+                "completion_tokens": round(call["completion_tokens"] * estimate_tokens(detail) / output_total),
+            }
+            self.store_analysis(repo["full_name"], readme_hash, detail)
+        return parsed
+
+    def parse_batch_response(self, text, expected_names):
+        """从模型输出中解析 {full_name: 描述} 的JSON对象，只保留预期仓库的非空字符串结果"""
+        start = text.find("{")
+        end = text.rfind("}")
+        if start < 0 or end <= start:
+            return {}
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+
+        by_lower = {str(key).strip().lower(): value for key, value in data.items()}
+        results = {}
+        for name in expected_names:
+            value = by_lower.get(name.lower())
+            if isinstance(value, str) and value.strip():
+                results[name] = value.strip()
+        return results
 
-                selects = []
-                for item in value[:10]:  # 最多10个标签
-                    item_str = str(item)
-                    if item_str in existing_options:
-                        selects.append({"name": item_str})
-                    else:
-                        # 对于不存在的选项，Notion会忽略
-                        selects.append({"name": item_str})
+    def build_notion_properties(self, repo):
+        """
+        根据自动匹配的字段映射，构建Notion属性
+        字段映射按数据库结构编译成专用的序列化函数，映射变化或重新获取结构后重新编译
+        """
+        key = tuple(self.field_mapping.items())
+        if key != self.property_serializers_key:
+            self.property_serializers = compile_property_serializers(self.field_mapping, self.db_properties)
+            self.property_serializers_key = key
+        return serialize_properties(self.property_serializers, repo)
 
-                if selects:
-                    properties[notion_prop_name] = {"multi_select": selects}
+    def notion_request(self, method, url, label, idempotent=False, **kwargs):
+        """
+        经过Notion限速器发送请求，返回 (response, 尝试次数, 错误信息)，请求未成功发出时 response 为None
+        429时按 Retry-After 暂停所有写入线程后重试，409冲突和5xx按指数退避重试；
+        网络错误只重试连接失败（请求未送达），读超时可能已经创建了页面，不重试以免重复写入；
+        idempotent=True 的请求（查询、更新页面）超时也重试
+        """
+        session = self.transport.session("notion")
+        attempts = 0
+        response = None
+        error = ""
+        while attempts < self.notion_max_attempts:
+            attempts += 1
+            try:
+                # 熔断中直接失败，不先等待限速器令牌
+                self.transport.check("notion")
+                with self.notion_limiter, self.metrics.attempt(attempts):
+                    response = session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                response, error = None, str(e)
+                if isinstance(e, (DeadlineExceeded, CircuitOpenError)):
+                    # 请求没有发出
+                    return None, attempts - 1, error
+                if not isinstance(e, requests.ConnectionError) and not (idempotent and isinstance(e, requests.Timeout)):
+                    return None, attempts, error
+                if attempts < self.notion_max_attempts:
+                    self.budget.sleep(min(2 ** attempts, self.retry_backoff_max) * random.uniform(0.5, 1.0))
+                continue
 
-            elif prop_type == "select" and value:
-                # 处理单选
-                value_str = truncate_text(value, 100)
-                options = self.db_properties[notion_prop_name].get("select", {}).get("options", [])
-                existing_options = {opt["name"]: opt["id"] for opt in options}
+            status = response.status_code
+            if status == 200:
+                return response, attempts, ""
+            error = response.text[:100]
+            if status != 429 and status != 409 and status < 500:
+                break
+            # 最后一次尝试失败后不再等待，也不暂停其他写入线程
+            if attempts >= self.notion_max_attempts:
+                break
+            if status == 429:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"), default=2 ** attempts)
+                print(f"  ⏳ {label}: Notion限流，{retry_after:.0f}s 后重试")
+                self.notion_limiter.pause(self.budget.clamp(retry_after))
+            else:
+                self.budget.sleep(min(2 ** attempts, self.retry_backoff_max) * random.uniform(0.5, 1.0))
+        return response, attempts, error
+
+    def select_mirror_key(self):
+        """选择用于识别仓库的字段：full_name > url > name（只有仓库名时不同owner的同名仓库会被视为同一个）"""
+        for field_key in ("full_name", "url", "name"):
+            if field_key in self.field_mapping:
+                return field_key, self.field_mapping[field_key]
+        return None
 
-                if value_str in existing_options:
-                    properties[notion_prop_name] = {"select": {"name": value_str}}
+    def repo_mirror_key(self, repo):
+        if self.mirror_key[0] == "name":
+            return (repo.get("name") or "").lower()
+        return repo["full_name"].lower()
+
+    def page_mirror_key(self, page):
+        """从查询到的页面中取出仓库键，取不到返回空字符串"""
+        field_key, prop_name = self.mirror_key
+        text = property_plain_text(page.get("properties", {}).get(prop_name)).strip()
+        if field_key == "url":
+            match = GITHUB_REPO_URL_PATTERN.search(text)
+            if not match:
+                return ""
+            text = match.group(1)
+            if text.endswith(".git"):
+                text = text[:-4]
+        return text.lower()
 
-        return properties
+    def sync_notion_mirror(self):
+        """
+        增量同步本地镜像：只查询 last_edited_time 不早于上次游标的页面，且只取仓库键对应的属性；
+        首次运行或识别字段变化时全量同步
+        """
+        self.mirror_key = self.select_mirror_key()
+        if not self.mirror_key:
+            print("  ⚠️  没有可用于识别仓库的字段，每次都新建页面")
+            self.notion_mirror = None
+            return False
 
-    def add_to_notion(self, repo):
-        """将单个仓库添加到Notion数据库"""
-        url = "https://api.notion.com/v1/pages"
+        field_key, prop_name = self.mirror_key
+        prop_id = self.db_properties[prop_name].get("id")
+        key_spec = f"{field_key}:{prop_id or prop_name}"
+        cursor = self.notion_mirror.get_cursor(self.notion_database_id, key_spec)
+
+        url = f"{self.notion_api_url}/v1/databases/{self.notion_database_id}/query"
+        body = {"page_size": 100, "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}]}
+        if cursor:
+            # last_edited_time 精确到分钟，用 on_or_after 保证不漏掉同一分钟内的修改
+            body["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": cursor}}
+        params = {"filter_properties": unquote(prop_id)} if prop_id else None
+
+        started = time.perf_counter()
+        newest = cursor
+        fetched = 0
+        requests_sent = 0
+        while True:
+            response, attempts, error = self.notion_request(
+                "POST", url, "镜像同步", idempotent=True, json=body, params=params)
+            requests_sent += attempts
+            if response is None or response.status_code != 200:
+                status = response.status_code if response is not None else "网络错误"
+                print(f"  ⚠️  Notion镜像同步失败: {status} - {error}，使用上次同步的结果")
+                break
+            data = response.json()
+            pages = data.get("results", [])
+            self.notion_mirror.put_pages(self.notion_database_id, [
+                (page["id"], self.page_mirror_key(page), page.get("last_edited_time")) for page in pages
+            ])
+            fetched += len(pages)
+            for page in pages:
+                if page.get("last_edited_time") and (newest is None or page["last_edited_time"] > newest):
+                    newest = page["last_edited_time"]
+            if not data.get("has_more") or not data.get("next_cursor"):
+                self.notion_mirror.set_cursor(self.notion_database_id, key_spec, newest)
+                break
+            body["start_cursor"] = data["next_cursor"]
+
+        mode = "增量" if cursor else "全量"
+        print(f"🔄 Notion镜像: {mode}同步 {fetched} 个页面（{requests_sent} 次请求，{time.perf_counter() - started:.1f}s），"
+              f"按「{prop_name}」识别，共 {self.notion_mirror.count(self.notion_database_id)} 个页面")
+        return True
 
+    def plan_notion_write(self, repo):
+        """
+        按本地镜像判断仓库的写入方式，不发请求；返回
+        {action: created/updated/unchanged, properties, send, hashes, page_id, mirror_key}，
+        send 为需要发送的属性（新建时为全部属性，更新时为与上次写入不同的属性）
+        """
         properties = self.build_notion_properties(repo)
+        plan = {"action": "created", "properties": properties, "send": properties,
+                "hashes": property_hashes(properties), "page_id": None, "mirror_key": None}
+        if not (self.notion_mirror and self.mirror_key):
+            return plan
+        plan["mirror_key"] = self.repo_mirror_key(repo)
+        page = self.notion_mirror.lookup(self.notion_database_id, plan["mirror_key"])
+        if page:
+            plan["action"] = "updated"
+            plan["page_id"] = page["page_id"]
+            if page["field_hashes"] is not None:
+                volatile_names = [self.field_mapping[f] for f in VOLATILE_FIELDS if f in self.field_mapping]
+                plan["send"] = changed_properties(properties, plan["hashes"], page["field_hashes"], volatile_names)
+                if not plan["send"]:
+                    plan["action"] = "unchanged"
+        return plan
+
+    def write_notion_page(self, repo):
+        """
+        写入单个仓库：本地镜像中已有该仓库的页面时只PATCH与上次写入不同的属性，
+        全部相同时不发请求；没有页面时新建。时间预算截止后不再写入。返回结果
+        {full_name, ok, action: created/updated/unchanged, status, attempts, latency, error,
+         sent_properties, total_properties}
+        """
+        outcome = {"full_name": repo["full_name"], "ok": False, "action": "created", "status": None,
+                   "attempts": 0, "latency": 0.0, "error": "", "sent_properties": 0, "total_properties": 0}
+
+        if self.budget.expired():
+            self.budget.skip("write")
+            outcome["error"] = "运行时间预算已用完，未写入"
+            return outcome
+        started = time.perf_counter()
+        plan = self.plan_notion_write(repo)
+        properties = plan["properties"]
 
         if not properties:
-            print(f"  ✗ {repo['full_name']}: 没有可写入的字段")
-            return False
+            outcome["error"] = "没有可写入的字段"
+            return outcome
+
+        outcome["total_properties"] = len(properties)
+        if plan["action"] == "unchanged":
+            outcome.update(ok=True, action="unchanged", latency=time.perf_counter() - started)
+            return outcome
+
+        response = None
+        if plan["action"] == "updated":
+            page_id = plan["page_id"]
+            outcome["action"] = "updated"
+            outcome["sent_properties"] = len(plan["send"])
+            response, attempts, error = self.notion_request(
+                "PATCH", f"{self.notion_api_url}/v1/pages/{page_id}", repo["full_name"],
+                idempotent=True, json={"properties": plan["send"]})
+            outcome["attempts"] += attempts
+            # 页面已被删除或归档：从镜像中移除，改为新建（写入全部属性）
+            if response is not None and (response.status_code == 404 or
+                                         (response.status_code == 400 and "archived" in response.text)):
+                self.notion_mirror.remove(page_id)
+                outcome["action"] = "created"
+                response = None
+
+        if outcome["action"] == "created":
+            # 必须指定parent（数据库ID）
+            payload = {
+                "parent": {"database_id": self.notion_database_id},
+                "properties": properties
+            }
+            outcome["sent_properties"] = len(properties)
+            response, attempts, error = self.notion_request(
+                "POST", f"{self.notion_api_url}/v1/pages", repo["full_name"], json=payload)
+            outcome["attempts"] += attempts
+
+        outcome["latency"] = time.perf_counter() - started
+        outcome["status"] = response.status_code if response is not None else None
+        outcome["ok"] = outcome["status"] == 200
+        outcome["error"] = error
+        if not outcome["ok"] and self.budget.expired():
+            self.budget.skip("write")
+
+        if outcome["ok"] and plan["mirror_key"]:
+            try:
+                written = response.json()
+                self.notion_mirror.record_write(self.notion_database_id, written["id"], plan["mirror_key"],
+                                                written.get("last_edited_time"), plan["hashes"])
+            except (ValueError, KeyError):
+                pass
+        return outcome
+
+    def print_notion_outcome(self, repo, outcome):
+        if outcome["ok"]:
+            today_display = f" | 今天+{repo['today_stars']}" if repo.get('today_stars') else ""
+            retry_display = f" | 尝试{outcome['attempts']}次" if outcome["attempts"] > 1 else ""
+            if outcome.get("action") == "unchanged":
+                print(f"  = {repo['full_name'][:40]:40} ⭐ {repo['stars']}{today_display} | 未变化")
+                return
+            action_display = ""
+            if outcome.get("action") == "updated":
+                action_display = f" | 更新 {outcome['sent_properties']}/{outcome['total_properties']} 个属性"
+            print(f"  ✓ {repo['full_name'][:40]:40} ⭐ {repo['stars']}{today_display}{action_display}{retry_display}")
+        elif outcome["status"]:
+            print(f"  ✗ {repo['full_name']}: {outcome['status']} - {outcome['error']} (尝试{outcome['attempts']}次)")
+        else:
+            print(f"  ✗ {repo['full_name']}: {outcome['error']}")
 
-        # 必须指定parent（数据库ID）
-        payload = {
-            "parent": {"database_id": self.notion_database_id},
-            "properties": properties
-        }
+    def add_to_notion(self, repo):
+        """将单个仓库添加到Notion数据库"""
+        outcome = self.write_notion_page(repo)
+        self.print_notion_outcome(repo, outcome)
+        return outcome["ok"]
 
-        try:
-            response = requests.post(
-                url,
-                headers=self.notion_headers,
-                json=payload,
-                proxies=self.proxies
-            )
+    def write_to_notion(self, repos):
+        """
+        并发写入多个仓库（线程数 NOTION_CONCURRENCY，速率 NOTION_RPS），
+        完成一个输出一个；返回按输入顺序排列的结果列表
+        """
+        if not repos:
+            return []
 
-            if response.status_code == 200:
-                today_display = f" | 今天+{repo['today_stars']}" if repo.get('today_stars') else ""
-                print(f"  ✓ {repo['full_name'][:40]:40} ⭐ {repo['stars']}{today_display}")
-                return True
+        started = time.perf_counter()
+        outcomes = [None] * len(repos)
+        with ThreadPoolExecutor(max_workers=self.notion_concurrency) as executor:
+            futures = {executor.submit(self.write_notion_page, repo): index for index, repo in enumerate(repos)}
+            for future in as_completed(futures):
+                index = futures[future]
+                repo = repos[index]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    outcome = self.failed_outcome(repo, str(e))
+                outcomes[index] = outcome
+                self.record_notion_outcome(repo, outcome)
+
+        self.print_write_summary(outcomes, time.perf_counter() - started)
+        return outcomes
+
+    def failed_outcome(self, repo, error):
+        """写入过程中出现意外异常时的结果"""
+        return {"full_name": repo["full_name"], "ok": False, "action": "created", "status": None,
+                "attempts": 0, "latency": 0.0, "error": error,
+                "sent_properties": 0, "total_properties": 0}
+
+    def record_notion_outcome(self, repo, outcome):
+        """在写入队列中确认或记录失败，并输出结果"""
+        if self.outbox and self.outbox_run_id:
+            if outcome["ok"]:
+                self.outbox.ack(self.outbox_run_id, repo["full_name"], outcome["action"], outcome["attempts"])
             else:
-                print(f"  ✗ {repo['full_name']}: {response.status_code} - {response.text[:100]}")
-                return False
+                self.outbox.fail(self.outbox_run_id, repo["full_name"], outcome["attempts"], outcome["error"])
+        self.print_notion_outcome(repo, outcome)
+
+    def print_write_summary(self, outcomes, elapsed):
+        """输出写入统计；有 400 错误时让数据库结构缓存失效"""
+        if any(outcome["status"] == 400 for outcome in outcomes):
+            self.invalidate_schema_cache()
+
+        requests_sent = sum(outcome["attempts"] for outcome in outcomes)
+        retries = sum(max(0, outcome["attempts"] - 1) for outcome in outcomes)
+        created = sum(1 for outcome in outcomes if outcome["ok"] and outcome["action"] == "created")
+        updated = [outcome for outcome in outcomes if outcome["ok"] and outcome["action"] == "updated"]
+        unchanged = sum(1 for outcome in outcomes if outcome["ok"] and outcome["action"] == "unchanged")
+        elided = sum(outcome["total_properties"] - outcome["sent_properties"] for outcome in updated)
+        print(f"  新建 {created} 个，更新 {len(updated)} 个，未变化 {unchanged} 个 | "
+              f"省去 {unchanged} 次请求，更新时省去 {elided} 个未变化的属性")
+        print(f"  Notion请求 {requests_sent} 次（重试 {retries} 次），{requests_sent / max(elapsed, 1e-6):.1f} 次/秒，"
+              f"限速等待 {self.notion_limiter.wait_time:.1f}s，总耗时 {elapsed:.1f}s")
+
+    def prepare_database(self):
+        """获取数据库结构并匹配字段（步骤1、2）"""
+        # 1. 获取数据库结构
+        print("\n[步骤 1/4] 获取Notion数据库结构...")
+        if not self.get_database_schema():
+            print("无法获取数据库结构，请检查token和数据库ID是否正确")
+            return False
 
-        except requests.RequestException as e:
-            print(f"  ✗ 请求错误: {e}")
+        # 2. 自动匹配字段
+        print("\n[步骤 2/4] 自动匹配数据库字段...")
+        if not self.resolve_field_mapping():
+            print("字段匹配失败，请检查数据库是否有必需的title字段")
             return False
+        return True
 
     def run(self):
         """执行主流程"""
         print("=" * 60)
-        print(f"🚀 GitHub Trending → Notion + AI分析")
+        print("🚀 GitHub Trending → Notion + AI分析")
         print(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("=" * 60)
 
-        # 1. 获取数据库结构
-        print("\n[步骤 1/4] 获取Notion数据库结构...")
-        if not self.get_database_schema():
-            print("无法获取数据库结构，请检查token和数据库ID是否正确")
-            return
+        if self.outbox:
+            last = self.outbox.last_unfinished()
+            if last and last["pending"]:
+                print(f"⚠️  上次运行 {last['run_id']} 还有 {last['pending']} 个项目未写入，"
+                      f"可用 --resume 只写入这些项目；本次运行将重新抓取")
 
-        # 2. 自动匹配字段
-        print("\n[步骤 2/4] 自动匹配数据库字段...")
-        if not self.auto_match_fields():
-            print("字段匹配失败，请检查数据库是否有必需的title字段")
+        self.run_mode = "pipeline" if self.pipeline_enabled else "phased"
+        if self.pipeline_enabled:
+            self.run_pipeline()
+        else:
+            self.run_phased()
+
+    def run_phased(self):
+        """按步骤依次执行（PIPELINE=0）：获取结构 → 抓取全部 → 分析全部 → 写入全部"""
+        with self.metrics.timed("schema"):
+            prepared = self.prepare_database()
+        if not prepared:
+            self.write_run_report("failed", reason="无法获取数据库结构或匹配字段")
             return
 
         # 3. 获取GitHub热门项目
         print("\n[步骤 3/4] 获取GitHub Trending热门项目...")
-        trending_repos = self.get_trending_repos()
+        with self.metrics.timed("scrape"):
+            trending_repos = self.crawl_trending()
 
         if not trending_repos:
             print("没有获取到任何项目")
+            self.write_run_report("failed", reason="没有获取到任何项目")
             return
 
+        # 补全创建时间、主题、许可证等字段；需要AI分析时同时取回README
+        need_readme = "repo_detail" in self.field_mapping and bool(self.volcano_api_key)
+        with self.metrics.timed("enrich"):
+            self.enrich_repos(trending_repos, with_readme=need_readme)
+
+        # 抓取结果写入队列，之后中断时可以 --resume 继续
+        if self.outbox:
+            self.outbox_run_id = self.outbox.new_run_id()
+            self.outbox.start_run(self.outbox_run_id, trending_repos)
+
         # 4. AI分析仓库（如果配置了API且数据库有对应字段）
-        if "repo_detail" in self.field_mapping and self.volcano_api_key:
+        if "repo_detail" in self.field_mapping and self.volcano_api_key and self.budget.degraded("detail"):
+            # 时间预算不足：不再等待AI分析，全部直接写入（与流水线模式的第三步降级一致）
+            print("\n[步骤 4/4] 跳过AI分析（时间预算不足，直接写入）")
+            self.budget.skip("detail", len(trending_repos))
+        elif "repo_detail" in self.field_mapping and self.volcano_api_key:
             print("\n[步骤 4/4] AI分析仓库README...")
             print("-" * 60)
-            for repo in trending_repos:
-                owner = repo.get("owner", "")
-                name = repo.get("name", "")
-                if owner and name:
-                    ai_detail = self.analyze_repo_with_ai(owner, name, repo.get("description", ""))
-                    if ai_detail:
-                        repo["repo_detail"] = ai_detail
-                time.sleep(0.5)  # 避免API限速
+            with self.metrics.timed("ai"):
+                self.analyze_repos(trending_repos)
         else:
             if not self.volcano_api_key:
                 print("\n[步骤 4/4] 跳过AI分析（未设置VOLCANO_API_KEY）")
             else:
                 print("\n[步骤 4/4] 跳过AI分析（数据库无对应字段）")
 
+        if self.outbox:
+            self.outbox.update_repos(self.outbox_run_id, trending_repos, status="writing")
+
+        self.write_and_report(trending_repos)
+
+    def run_pipeline(self):
+        """
+        流水线模式：获取数据库结构与抓取榜单并行；抓取到的仓库按批补全，逐个AI分析，
+        每个仓库分析完成后立即写入Notion，不等待其他仓库
+        """
+        use_ai = bool(self.volcano_api_key)
+        stage_names = ["抓取", "补全"] + (["AI分析"] if use_ai else []) + ["写入"]
+        print(f"\n[流水线] {' → '.join(stage_names)}（Notion数据库结构与榜单抓取并行获取）")
+        if not self.github_token:
+            print("  ⚠️  未设置GITHUB_TOKEN，跳过GraphQL补全（GraphQL API需要认证）")
+        if not use_ai:
+            print("  跳过AI分析（未设置VOLCANO_API_KEY）")
+
+        self.pipeline_lock = threading.Lock()
+        self.pipeline_merged = {}
+        self.pipeline_outcomes = []
+        self.pipeline_analyzed = []
+        self.repo_timeline = {}
+
+        stages = [
+            Stage("scrape", self._pipeline_scrape, label="抓取",
+                  workers=min(self.crawl_workers, len(self.trending_targets))),
+            Stage("enrich", self._pipeline_enrich, label="补全", workers=self.pipeline_enrich_workers,
+                  batch_size=self.graphql_batch_size),
+        ]
+        if use_ai:
+            if self.ai_batch_size > 1:
+                stages.append(Stage("ai", self._pipeline_analyze_batch, label="AI分析", workers=self.ai_concurrency,
+                                    batch_size=self.ai_batch_size, on_close=self._pipeline_ai_done))
+            else:
+                stages.append(Stage("ai", self._pipeline_analyze, label="AI分析", workers=self.ai_concurrency,
+                                    on_close=self._pipeline_ai_done))
+        stages.append(Stage("notion", self._pipeline_write, label="写入", workers=self.notion_concurrency))
+        self.pipeline = Pipeline(stages, queue_size=self.pipeline_queue_size, on_sample=self.metrics.record_stage)
+
+        with ThreadPoolExecutor(max_workers=1) as schema_executor, \
+                ThreadPoolExecutor(max_workers=self.ai_concurrency) as ai_executor:
+            self.pipeline_schema = schema_executor.submit(self._pipeline_prepare)
+            self.pipeline_ai_executor = ai_executor
+            self.pipeline.run(self.trending_targets)
+            schema_ok = self.pipeline_schema.result()
+        for item in self.pipeline.stats():
+            self.metrics.set_stage_wall(item["name"], item["wall"])
+
+        if not schema_ok:
+            self.write_run_report("failed", reason="无法获取数据库结构或匹配字段")
+            return
+        if not self.pipeline_merged:
+            print("没有获取到任何项目")
+            self.write_run_report("failed", reason="没有获取到任何项目")
+            return
+
+        outcomes = self.pipeline_outcomes
+        print("\n" + "-" * 60)
+        print("📝 写入Notion:")
+        self.print_write_summary(outcomes, self.pipeline.elapsed())
+        if self.pipeline_analyzed:
+            print("🤖 AI分析:")
+            self.print_ai_summary(sum(1 for ok in self.pipeline_analyzed if ok), len(self.pipeline_analyzed),
+                                  self.pipeline.elapsed())
+        self.print_pipeline_summary()
+
+        print("\n" + "=" * 60)
+        self.finish_report(outcomes, len(self.pipeline_merged))
+
+    def _pipeline_prepare(self):
+        """获取数据库结构、匹配字段并同步镜像（与抓取并行），成功返回True"""
+        try:
+            with self.metrics.timed("schema"):
+                prepared = self.prepare_database()
+            if not prepared:
+                return False
+            if self.notion_mirror:
+                with self.metrics.timed("mirror_sync"):
+                    self.sync_notion_mirror()
+            return True
+        except Exception as e:
+            print(f"✗ 准备Notion数据库失败: {e}")
+            return False
+
+    def mark_repos(self, repos, stage):
+        now = time.perf_counter()
+        with self.pipeline_lock:
+            for repo in repos:
+                self.repo_timeline.setdefault(repo["full_name"], {})[stage] = now
+
+    def _pipeline_scrape(self, target):
+        """抓取一个榜单，只把之前榜单中没有出现过的仓库交给下游"""
+        period, language = target
+        repos = self.get_trending_repos(period, language)
+        new_repos = []
+        with self.pipeline_lock:
+            for repo in repos:
+                if self.merge_trending_repo(self.pipeline_merged, repo):
+                    new_repos.append(repo)
+        self.mark_repos(new_repos, "scraped")
+        return new_repos
+
+    def _pipeline_enrich(self, batch):
+        """补全一批仓库并记入写入队列；数据库结构不可用时取消整个流水线"""
+        if not self.pipeline_schema.result():
+            self.pipeline.cancel()
+            return []
+        if self.github_token:
+            need_readme = "repo_detail" in self.field_mapping and bool(self.volcano_api_key)
+            self.enrich_repos(batch, with_readme=need_readme)
+
+        # 补全后的仓库写入队列，之后中断时可以 --resume 继续
+        if self.outbox:
+            with self.pipeline_lock:
+                if self.outbox_run_id is None:
+                    self.outbox_run_id = self.outbox.new_run_id()
+                    self.outbox.start_run(self.outbox_run_id, batch)
+                else:
+                    self.outbox.add_repos(self.outbox_run_id, batch)
+        self.mark_repos(batch, "enriched")
+        return batch
+
+    def _pipeline_analyze(self, repo):
+        if self.budget.degraded("detail"):
+            # 时间预算不足：不再等待AI分析，直接交给写入阶段（已完成的AI总结照常写入）
+            self.budget.skip("detail")
+        elif "repo_detail" in self.field_mapping and repo.get("owner") and repo.get("name"):
+            try:
+                ai_detail = self.analyze_repo_with_ai(repo["owner"], repo["name"], repo.get("description", ""),
+                                                      repo.get("readme"), True)
+            except Exception as e:
+                print(f"    ✗ {repo['full_name']}: AI分析失败: {e}")
+                ai_detail = None
+            self._pipeline_store_analysis([repo], [ai_detail])
+        self.mark_repos([repo], "analyzed")
+        return [repo]
+
+    def _pipeline_analyze_batch(self, batch):
+        """批量模式：一批仓库打包请求，批内的README准备和请求使用共享线程池"""
+        targets = [repo for repo in batch if repo.get("owner") and repo.get("name")]
+        if self.budget.degraded("detail"):
+            self.budget.skip("detail", len(batch))
+        elif "repo_detail" in self.field_mapping and targets:
+            try:
+                results = self._analyze_repos_batched(targets, self.pipeline_ai_executor)
+            except Exception as e:
+                print(f"    ✗ AI批量分析失败: {e}")
+                results = [None] * len(targets)
+            self._pipeline_store_analysis(targets, results)
+        self.mark_repos(batch, "analyzed")
+        return batch
+
+    def _pipeline_store_analysis(self, repos, results):
+        for repo, ai_detail in zip(repos, results):
+            if ai_detail:
+                repo["repo_detail"] = ai_detail
+            self.print_ai_result(repo, ai_detail)
+        with self.pipeline_lock:
+            self.pipeline_analyzed.extend(bool(ai_detail) for ai_detail in results)
+        if self.outbox and self.outbox_run_id:
+            self.outbox.update_repos(self.outbox_run_id, repos)
+
+    def _pipeline_ai_done(self):
+        """所有仓库分析完成后，写入队列中的运行进入写入阶段"""
+        if self.outbox and self.outbox_run_id:
+            self.outbox.update_repos(self.outbox_run_id, [], status="writing")
+
+    def _pipeline_write(self, repo):
+        try:
+            outcome = self.write_notion_page(repo)
+        except Exception as e:
+            outcome = self.failed_outcome(repo, str(e))
+        self.record_notion_outcome(repo, outcome)
+        with self.pipeline_lock:
+            self.pipeline_outcomes.append(outcome)
+        self.mark_repos([repo], "written")
+        return []
+
+    def repo_latencies(self):
+        """流水线中每个仓库从抓取到写入完成的耗时（秒）"""
+        return [timeline["written"] - timeline["scraped"] for timeline in self.repo_timeline.values()
+                if "scraped" in timeline and "written" in timeline]
+
+    def print_pipeline_summary(self):
+        """各阶段利用率，以及每个仓库从抓取到写入完成的端到端耗时"""
+        print(f"📊 流水线: 总耗时 {self.pipeline.elapsed():.1f}s")
+        for line in self.pipeline.summary_lines():
+            print(f"  {line}")
+
+        timelines = [timeline for timeline in self.repo_timeline.values()
+                     if "scraped" in timeline and "written" in timeline]
+        if not timelines:
+            return
+        latencies = self.repo_latencies()
+        first_written = min(timeline["written"] for timeline in timelines) - self.pipeline.started_at
+        print(f"⏱️  端到端（抓取→写入）: {len(latencies)} 个项目 | p50 {percentile(latencies, 0.5):.1f}s | "
+              f"p95 {percentile(latencies, 0.95):.1f}s | 最长 {max(latencies):.1f}s | "
+              f"首个页面在 {first_written:.1f}s 时写入")
+        segments = [("scraped", "enriched", "抓取→补全"), ("enriched", "analyzed", "补全→AI分析"),
+                    ("analyzed", "written", "AI分析→写入")]
+        if not any("analyzed" in timeline for timeline in timelines):
+            segments = [("scraped", "enriched", "抓取→补全"), ("enriched", "written", "补全→写入")]
+        parts = []
+        for start_key, end_key, label in segments:
+            durations = [timeline[end_key] - timeline[start_key] for timeline in timelines
+                         if start_key in timeline and end_key in timeline]
+            if durations:
+                parts.append(f"{label} {sum(durations) / len(durations):.1f}s")
+        print(f"  平均分段（含排队）: {' | '.join(parts)}")
+
+    def resume(self):
+        """
+        继续上次中断的运行：不重新抓取，只写入队列中未确认的项目；
+        中断在AI分析阶段时先补做缺少的分析（已缓存的结果不会重复调用）
+        """
+        print("=" * 60)
+        print("🔁 GitHub Trending → Notion: 继续上次未完成的运行")
+        print(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("=" * 60)
+
+        if not self.outbox:
+            print("未启用写入队列（OUTBOX=0），无法继续")
+            return
+        last = self.outbox.last_unfinished()
+        if not last or not last["pending"]:
+            print("没有未完成的运行")
+            return
+        started_at = datetime.fromtimestamp(last["started_at"]).strftime('%Y-%m-%d %H:%M:%S')
+        print(f"📋 运行 {last['run_id']}（开始于 {started_at}）: 共 {last['total']} 个项目，未写入 {last['pending']} 个")
+
+        self.run_mode = "resume"
+        with self.metrics.timed("schema"):
+            prepared = self.prepare_database()
+        if not prepared:
+            self.write_run_report("failed", reason="无法获取数据库结构或匹配字段")
+            return
+
+        self.outbox_run_id = last["run_id"]
+        repos = self.outbox.load_repos(last["run_id"])
+        if last["status"] == "collecting" and "repo_detail" in self.field_mapping and self.volcano_api_key:
+            missing = [repo for repo in repos if not repo.get("repo_detail")]
+            if missing:
+                print(f"\n[补做] AI分析 {len(missing)} 个仓库...")
+                print("-" * 60)
+                with self.metrics.timed("ai"):
+                    self.analyze_repos(missing)
+            self.outbox.update_repos(last["run_id"], repos, status="writing")
+
+        self.write_and_report(repos)
+
+    def dry_run(self, with_ai=False):
+        """
+        预演（dry-run 子命令）：抓取、补全，按数据库结构生成属性并对照本地镜像，
+        输出每个仓库会新建、更新哪些属性还是不变；不写入Notion，不记录写入队列和运行报告。
+        with_ai 时同时进行AI分析（会调用AI接口，结果写入AI缓存，正式运行时直接使用）
+        """
+        print("=" * 60)
+        print("🧪 GitHub Trending → Notion: 预演（不写入Notion）")
+        print(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("=" * 60)
+
+        self.run_mode = "dry-run"
+        prepared = self.prepare_database()
+        if not prepared:
+            print("⚠️  无法获取数据库结构，只显示抓取结果")
+        elif self.notion_mirror:
+            self.sync_notion_mirror()
+
+        print("\n[步骤 3/4] 获取GitHub Trending热门项目...")
+        repos = self.crawl_trending()
+        if not repos:
+            print("没有获取到任何项目")
+            self.transport.close()
+            return
+
+        use_ai = with_ai and prepared and "repo_detail" in self.field_mapping and bool(self.volcano_api_key)
+        self.enrich_repos(repos, with_readme=use_ai)
+        if use_ai:
+            print("\n[步骤 4/4] AI分析仓库README...")
+            print("-" * 60)
+            self.analyze_repos(repos)
+        else:
+            print("\n[步骤 4/4] 跳过AI分析" + ("（使用 --ai 开启）" if not with_ai else ""))
+
+        print("\n📝 写入计划:")
+        print("-" * 60)
+        counts = {"created": 0, "updated": 0, "unchanged": 0}
+        for repo in repos:
+            line = f"{repo['full_name'][:40]:40} ⭐ {repo['stars']}"
+            if not prepared:
+                print(f"  · {line}")
+                continue
+            plan = self.plan_notion_write(repo)
+            counts[plan["action"]] += 1
+            if plan["action"] == "created":
+                print(f"  + {line} | 新建，{len(plan['properties'])} 个属性")
+            elif plan["action"] == "updated":
+                names = "、".join(plan["send"])
+                print(f"  ~ {line} | 更新 {len(plan['send'])}/{len(plan['properties'])} 个属性: {names}")
+            else:
+                print(f"  = {line} | 未变化")
+        print("-" * 60)
+        if prepared:
+            print(f"新建 {counts['created']} 个，更新 {counts['updated']} 个，未变化 {counts['unchanged']} 个 | "
+                  f"正式运行需要 {counts['created'] + counts['updated']} 次Notion写入请求")
+        self.save_readme_index()
+        self.transport.close()
+
+    def show_schema(self, refresh=False):
+        """
+        输出数据库结构和字段映射（schema 子命令），成功返回True；
+        refresh 时忽略缓存有效期重新获取（结构未变化时仍沿用缓存的字段映射）
+        """
+        if refresh:
+            self.schema_cache_ttl = 0
+        had_cache = self.load_schema_cache() is not None
+        ok = self.get_database_schema() and self.resolve_field_mapping()
+        if ok and had_cache:
+            self.print_database_schema()
+        if ok and self.notion_mirror:
+            mirror_key = self.select_mirror_key()
+            if mirror_key:
+                print(f"🔄 按「{mirror_key[1]}」识别已写入的仓库，本地镜像中有 "
+                      f"{self.notion_mirror.count(self.notion_database_id)} 个页面")
+        self.transport.close()
+        return ok
+
+    def write_and_report(self, repos):
+        """写入Notion（步骤5）并输出运行摘要"""
         # 5. 写入Notion
         print(f"\n📝 写入Notion数据库:")
         print("-" * 60)
-        success_count = 0
-        for repo in trending_repos:
-            if self.add_to_notion(repo):
-                success_count += 1
-            time.sleep(0.3)  # 避免API限速
-
+        if self.notion_mirror:
+            with self.metrics.timed("mirror_sync"):
+                self.sync_notion_mirror()
+        with self.metrics.timed("notion"):
+            outcomes = self.write_to_notion(repos)
         print("\n" + "=" * 60)
-        print(f"✅ 完成! 成功添加 {success_count}/{len(trending_repos)} 个项目")
+        self.finish_report(outcomes, len(repos))
+
+    def finish_report(self, outcomes, total):
+        """结束运行：保存索引、确认写入队列，输出缓存和连接统计"""
+        success_count = sum(1 for outcome in outcomes if outcome["ok"])
+        self.save_readme_index()
+
+        print(f"✅ 完成! 成功写入 {success_count}/{total} 个项目")
+        remaining = total - success_count
+        if self.outbox and self.outbox_run_id:
+            remaining = self.outbox.finish_run(self.outbox_run_id)
+            if remaining:
+                print(f"📋 写入队列: {remaining} 个项目未写入，可用 --resume 重试")
+        if self.http_cache:
+            print(f"📦 HTTP缓存: {self.http_cache.summary()}")
+        if self.readme_stats:
+            print(f"📄 README: {self.readme_stats_summary()}")
+        if self.ai_cache:
+            print(f"🧠 AI缓存: {self.ai_cache.summary()}")
+        print(f"🔌 连接复用: {self.transport.summary()}")
+        print(f"📈 请求耗时: {self.metrics.summary()}")
+        budget_summary = self.budget.summary()
+        if budget_summary:
+            print(f"⏳ 时间预算: {budget_summary}")
+        circuit_summary = self.breakers.summary()
+        if circuit_summary:
+            print(f"🔌 熔断: {circuit_summary}")
+        self.write_run_report("ok" if not remaining else "partial", outcomes, total, remaining=remaining)
         print("=" * 60)
+        self.transport.close()
+
+    def write_run_report(self, status, outcomes=(), total=0, reason="", remaining=None):
+        """写出JSON运行报告（RUN_REPORT_FILE）：各阶段/各域名耗时分布、写入结果、流水线统计"""
+        if not self.run_report_file:
+            return
+        outcomes = list(outcomes)
+        run_id = self.outbox_run_id or datetime.fromtimestamp(self.metrics.started_at).strftime("%Y%m%d-%H%M%S")
+        writes = {
+            "total": total,
+            "created": sum(1 for outcome in outcomes if outcome["ok"] and outcome["action"] == "created"),
+            "updated": sum(1 for outcome in outcomes if outcome["ok"] and outcome["action"] == "updated"),
+            "unchanged": sum(1 for outcome in outcomes if outcome["ok"] and outcome["action"] == "unchanged"),
+            "failed": sum(1 for outcome in outcomes if not outcome["ok"]),
+            "pending": remaining,
+            "requests": sum(outcome["attempts"] for outcome in outcomes),
+            "latency": latency_summary([outcome["latency"] for outcome in outcomes if outcome["attempts"]]),
+        }
+        budget_summary = self.budget.summary()
+        if budget_summary and not reason:
+            reason = f"时间预算不足: {budget_summary}"
+        extra = {
+            "run_id": run_id,
+            "mode": self.run_mode,
+            "status": status,
+            "reason": reason,
+            "writes": writes,
+            "ai": {
+                "requests": len(self.ai_call_stats),
+                "generated": len(self.ai_repo_stats),
+                "limiter_wait": round(self.ai_limiter.wait_time, 3),
+            },
+            "connections": self.transport.connection_stats(),
+        }
+        if self.budget.limited:
+            extra["budget"] = self.budget.report()
+        circuits = self.breakers.stats()
+        if circuits:
+            extra["circuits"] = circuits
+        if self.run_mode == "pipeline" and self.pipeline and self.pipeline.started_at:
+            extra["pipeline"] = [
+                {key: round(value, 4) if isinstance(value, float) else value for key, value in item.items()}
+                for item in self.pipeline.stats()
+            ]
+            extra["repo_latency"] = latency_summary(self.repo_latencies())
+        try:
+            self.metrics.write_report(self.run_report_file, **extra)
+            print(f"🧾 运行报告: {self.run_report_file}")
+        except OSError as e:
+            print(f"⚠️  写入运行报告失败: {e}")
+
+
+TRENDING_PERIOD_CHOICES = ("daily", "weekly", "monthly")
+
+# 命令行参数 → 环境变量（命令行优先于 .env 和系统环境变量）: (参数, 环境变量, 类型, 说明)
+CLI_ENV_OPTIONS = [
+    ("--period", "TRENDING_PERIODS", None, "周期，逗号分隔: daily,weekly,monthly"),
+    ("--language", "TRENDING_LANGUAGES", str, "语言，逗号分隔，all 表示不限语言"),
+    ("--top-n", "TRENDING_TOP_N", int, "每个榜单取前几个项目"),
+    ("--crawl-workers", "CRAWL_WORKERS", int, "并发抓取的线程数"),
+    ("--enrich-workers", "PIPELINE_ENRICH_WORKERS", int, "同时进行的GraphQL补全批次数"),
+    ("--ai-concurrency", "AI_CONCURRENCY", int, "AI并发请求数"),
+    ("--ai-rps", "AI_RPS", float, "AI每秒请求数"),
+    ("--ai-batch-size", "AI_BATCH_SIZE", int, "每次AI请求打包的仓库数"),
+    ("--notion-concurrency", "NOTION_CONCURRENCY", int, "Notion并发写入数"),
+    ("--notion-rps", "NOTION_RPS", float, "Notion每秒请求数"),
+    ("--github-timeout", "GITHUB_TIMEOUT", float, "Trending页面和GraphQL的读取超时秒数"),
+    ("--readme-timeout", "README_TIMEOUT", float, "README请求的读取超时秒数"),
+    ("--ai-timeout", "AI_TIMEOUT", float, "AI请求的读取超时秒数"),
+    ("--notion-timeout", "NOTION_TIMEOUT", float, "Notion请求的读取超时秒数"),
+    ("--retry-backoff-max", "RETRY_BACKOFF_MAX", float, "失败重试的最长退避秒数"),
+    ("--time-budget", "RUN_TIME_BUDGET", float, "整次运行的时间预算秒数，0 表示不限时"),
+    ("--cache-dir", "CACHE_DIR", str, "缓存目录"),
+]
+
+
+def period_list(text):
+    """解析 --period 的值，返回规范化的逗号分隔字符串"""
+    periods = [period.strip().lower() for period in text.split(",") if period.strip()]
+    invalid = [period for period in periods if period not in TRENDING_PERIOD_CHOICES]
+    if not periods or invalid:
+        raise argparse.ArgumentTypeError(f"周期只能是 {'/'.join(TRENDING_PERIOD_CHOICES)}: {text}")
+    return ",".join(periods)
+
+
+def build_arg_parser():
+    """
+    命令行: [sync|dry-run|schema|profile] [选项]，不指定子命令时为 sync；
+    选项未指定时不覆盖环境变量（default=SUPPRESS），因此同一选项写在子命令前后均可
+    """
+    options = argparse.ArgumentParser(add_help=False)
+    for flag, env_name, value_type, help_text in CLI_ENV_OPTIONS:
+        options.add_argument(flag, type=value_type or period_list, default=argparse.SUPPRESS,
+                             help=f"{help_text}（{env_name}）")
+    options.add_argument("--phased", action="store_true", default=argparse.SUPPRESS,
+                         help="按步骤依次执行，不使用流水线（PIPELINE=0）")
+
+    resume_help = "继续上次中断的运行：只写入未确认的项目，不重新抓取和分析"
+    parser = argparse.ArgumentParser(description="抓取 GitHub Trending 写入 Notion 数据库", parents=[options],
+                                     allow_abbrev=False)
+    parser.add_argument("--resume", action="store_true", default=argparse.SUPPRESS, help=resume_help)
+    subparsers = parser.add_subparsers(dest="command", metavar="{sync,dry-run,schema,profile}")
+
+    sync_parser = subparsers.add_parser("sync", parents=[options], help="抓取、分析并写入Notion（默认）")
+    sync_parser.add_argument("--resume", action="store_true", default=argparse.SUPPRESS, help=resume_help)
+
+    dry_run_parser = subparsers.add_parser("dry-run", parents=[options],
+                                           help="抓取并输出每个仓库的写入计划，不写入Notion")
+    dry_run_parser.add_argument("--ai", action="store_true", default=argparse.SUPPRESS,
+                                help="同时进行AI分析（会调用AI接口，结果写入AI缓存）")
+
+    schema_parser = subparsers.add_parser("schema", parents=[options], help="显示Notion数据库结构和字段映射")
+    schema_parser.add_argument("--refresh", action="store_true", default=argparse.SUPPRESS,
+                               help="忽略缓存有效期，重新获取数据库结构")
+
+    profile_parser = subparsers.add_parser("profile", parents=[options],
+                                           help="在 cProfile / tracemalloc 下运行一次同步，输出剖析文件")
+    profile_parser.add_argument("--output-dir", default=argparse.SUPPRESS,
+                                help="剖析文件目录（默认 缓存目录/profile）")
+    profile_parser.add_argument("--interval", type=float, default=argparse.SUPPRESS,
+                                help="调用栈采样间隔（毫秒，默认5）")
+    profile_parser.add_argument("--top", type=int, default=argparse.SUPPRESS,
+                                help="输出内存分配最多的前几个位置（默认30）")
+    return parser
+
+
+def apply_cli_options(args):
+    """把命令行指定的选项写入对应的环境变量，需在创建 GitHubTrendingToNotion 之前调用"""
+    values = vars(args)
+    for flag, env_name, _, _ in CLI_ENV_OPTIONS:
+        key = flag[2:].replace("-", "_")
+        if key in values:
+            os.environ[env_name] = str(values[key])
+    if values.get("phased"):
+        os.environ["PIPELINE"] = "0"
 
 
 def main():
+    args = build_arg_parser().parse_args()
+    apply_cli_options(args)
+    command = args.command or "sync"
+
     bot = GitHubTrendingToNotion()
-    bot.run()
+    try:
+        if command == "schema":
+            sys.exit(0 if bot.show_schema(refresh=getattr(args, "refresh", False)) else 1)
+        elif command == "dry-run":
+            bot.dry_run(with_ai=getattr(args, "ai", False))
+        elif command == "profile":
+            output_dir = getattr(args, "output_dir", None) or os.path.join(bot.cache_dir, "profile")
+            profile_call(bot.run, output_dir, interval=getattr(args, "interval", 5.0) / 1000,
+                         top=getattr(args, "top", 30))
+        elif getattr(args, "resume", False):
+            bot.resume()
+        else:
+            bot.run()
+    finally:
+        # 提前结束（获取数据库结构失败等）时也保存熔断状态
+        bot.transport.close()
 
 
 if __name__ == "__main__":
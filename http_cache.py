@@ -0,0 +1,258 @@
+"""
+HTTP 磁盘缓存
+保存响应内容和 ETag/Last-Modified 校验信息，过期后用条件请求重新验证，
+304 时直接使用磁盘上的内容；按域名设置新鲜期，总大小超限时按 LRU 淘汰
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# 各域名默认新鲜期（秒），新鲜期内直接使用缓存，不发请求
+DEFAULT_HOST_TTLS = {
+    "github.com": 600,
+    "raw.githubusercontent.com": 3600,
+    "api.github.com": 600,
+}
+
+# 随缓存保存的响应头
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def parse_host_ttls(text):
+    """解析 "github.com=600,raw.githubusercontent.com=86400" 格式的配置"""
+    ttls = {}
+    for item in (text or "").split(","):
+        if "=" not in item:
+            continue
+        host, seconds = item.split("=", 1)
+        try:
+            ttls[host.strip().lower()] = float(seconds)
+        except ValueError:
+            continue
+    return ttls
+
+
+def read_capped(response, max_bytes):
+    """
+    流式读取响应体，读满 max_bytes 字节后停止；返回是否发生截断
+    （只有确实还有后续内容时才算截断，正好 max_bytes 字节的完整响应不算）
+    """
+    chunks = []
+    size = 0
+    truncated = False
+    try:
+        for chunk in response.iter_content(chunk_size=8192):
+            if size + len(chunk) > max_bytes:
+                chunks.append(chunk[:max_bytes - size])
+                size = max_bytes
+                truncated = True
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        # 服务器按 Range 返回时，是否还有剩余内容以 Content-Range 为准
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            truncated = total.isdigit() and int(total) > size
+        try:
+            transferred = response.raw.tell()
+        except AttributeError:
+            transferred = size
+    finally:
+        response.close()
+
+    response._content = b"".join(chunks)
+    response._content_consumed = True
+    response.transferred_bytes = transferred or size
+    response.truncated = truncated
+    return truncated
+
+
+def capped_get(session, url, max_bytes, headers=None, **kwargs):
+    """
+    下载最多 max_bytes 字节的GET请求
+    发送 Range 头（服务器支持时只返回前 max_bytes 字节），同时流式读取并在上限处停止
+    """
+    headers = dict(headers or {})
+    headers["Range"] = f"bytes=0-{max_bytes - 1}"
+    kwargs["stream"] = True
+    response = session.get(url, headers=headers, **kwargs)
+    if response.status_code in (200, 206):
+        read_capped(response, max_bytes)
+    else:
+        response.transferred_bytes = len(response.content)
+        response.truncated = False
+    return response
+
+
+class HttpCache:
+    """基于 SQLite 的 HTTP GET 缓存，可在多线程中共享"""
+
+    def __init__(self, cache_dir, max_bytes=50 * 1024 * 1024, host_ttls=None, default_ttl=0):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "http_cache.sqlite")
+        self.max_bytes = max_bytes
+        self.host_ttls = dict(DEFAULT_HOST_TTLS)
+        self.host_ttls.update(host_ttls or {})
+        self.default_ttl = default_ttl
+        self.lock = threading.Lock()
+        self.stats = {
+            "hits": 0,           # 新鲜期内直接命中
+            "revalidated": 0,    # 304 重新验证命中
+            "misses": 0,         # 从网络下载
+            "bytes_saved": 0,
+            "bytes_downloaded": 0,
+            "evictions": 0,
+        }
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                encoding TEXT,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        self.conn.commit()
+
+    def ttl_for(self, url):
+        host = (urlsplit(url).hostname or "").lower()
+        return self.host_ttls.get(host, self.default_ttl)
+
+    def get(self, url, params=None, headers=None, session=None, max_bytes=None, **kwargs):
+        """
+        发送带缓存的 GET 请求，返回 requests.Response
+        命中缓存时返回的响应带有 from_cache=True；max_bytes 限制下载的字节数
+        """
+        session = session or requests
+        headers = dict(headers or {})
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        key = f"{full_url}|{headers.get('Accept', '')}"
+        if max_bytes:
+            key += f"|0-{max_bytes - 1}"
+
+        entry = self._load(key)
+        now = time.time()
+        if entry and now - entry["stored_at"] < self.ttl_for(full_url):
+            self._record_hit("hits", key, entry, now)
+            return self._build_response(entry)
+
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        if max_bytes:
+            response = capped_get(session, full_url, max_bytes, headers=headers, **kwargs)
+        else:
+            response = session.get(full_url, headers=headers, **kwargs)
+            response.transferred_bytes = len(response.content)
+
+        if response.status_code == 304 and entry:
+            self._record_hit("revalidated", key, entry, now, refresh=True)
+            return self._build_response(entry)
+
+        response.from_cache = False
+        if response.status_code in (200, 206):
+            with self.lock:
+                self.stats["misses"] += 1
+                self.stats["bytes_downloaded"] += response.transferred_bytes
+            self._store(key, full_url, response, now)
+        return response
+
+    def summary(self):
+        """运行摘要中显示的统计行"""
+        s = self.stats
+        return (f"命中 {s['hits']} | 304重验证 {s['revalidated']} | 未命中 {s['misses']} | "
+                f"节省 {s['bytes_saved'] / 1024:.1f} KB | 下载 {s['bytes_downloaded'] / 1024:.1f} KB")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _load(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT url, status, headers, encoding, body, etag, last_modified, stored_at, size "
+                "FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "url": row[0], "status": row[1], "headers": json.loads(row[2]), "encoding": row[3],
+            "body": row[4], "etag": row[5], "last_modified": row[6], "stored_at": row[7], "size": row[8],
+        }
+
+    def _record_hit(self, counter, key, entry, now, refresh=False):
+        with self.lock:
+            self.stats[counter] += 1
+            self.stats["bytes_saved"] += entry["size"]
+            if refresh:
+                self.conn.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+            else:
+                self.conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+
+    def _store(self, key, url, response, now):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        # 没有校验信息且没有新鲜期的响应无法复用，不保存
+        if not etag and not last_modified and self.ttl_for(url) <= 0:
+            return
+
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, url, status, headers, encoding, body, etag, last_modified, stored_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, response.status_code, json.dumps(headers), response.encoding, body,
+                 etag, last_modified, now, now, len(body))
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """总大小超过上限时，按最近访问时间淘汰（调用方持有锁）"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def _build_response(self, entry):
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response._content = entry["body"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.url = entry["url"]
+        response.encoding = entry["encoding"]
+        response.reason = "OK (cached)"
+        response.from_cache = True
+        response.transferred_bytes = 0
+        return response
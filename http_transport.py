@@ -0,0 +1,206 @@
+"""
+共享的 HTTP 传输层
+每个上游服务（GitHub 页面、raw、API、Notion、火山引擎）各自持有一个带连接池的 Session，
+分别配置代理、默认请求头、超时和连接池大小；运行结束时可输出连接复用统计和每个请求的指标；
+设置了运行时间预算时，请求超时不超过剩余时间，截止后不再发出请求；
+设置了熔断器时，连续失败的上游在冷却期内直接失败，不再逐个等待超时
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 上游服务配置：域名、是否走代理、默认超时 (连接, 读取)
+UPSTREAMS = {
+    "github_web": {"hosts": ["github.com"], "proxy": True, "timeout": (10, 30)},
+    "github_raw": {"hosts": ["raw.githubusercontent.com"], "proxy": True, "timeout": (10, 10)},
+    "github_api": {"hosts": ["api.github.com"], "proxy": True, "timeout": (10, 30)},
+    "notion": {"hosts": ["api.notion.com"], "proxy": True, "timeout": (10, 30)},
+    # 国内服务不走代理
+    "volcano": {"hosts": ["ark.cn-beijing.volces.com"], "proxy": False, "timeout": (10, 60)},
+    # 其他域名
+    "default": {"hosts": [], "proxy": True, "timeout": (10, 30)},
+}
+
+
+class UpstreamSession(requests.Session):
+    """
+    未指定 timeout 的请求使用该上游的默认超时；
+    设置了 metrics 时记录每个请求的延迟、状态码和字节数（流式响应按 Content-Length 计）；
+    设置了 budget（run_budget.RunBudget）时超时不超过剩余时间，截止后抛出 DeadlineExceeded；
+    设置了 breaker（circuit_breaker.CircuitBreaker）时熔断中抛出 CircuitOpenError，并记录每个请求的成败；
+    request_proxies 随每个请求传入，优先于 HTTP_PROXY/HTTPS_PROXY 环境变量（Session.proxies 的优先级低于环境变量）
+    """
+
+    def __init__(self, default_timeout, name="default", metrics=None, budget=None, breaker=None):
+        super().__init__()
+        self.default_timeout = default_timeout
+        self.name = name
+        self.metrics = metrics
+        self.budget = budget
+        self.breaker = breaker
+        self.request_proxies = None
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout
+        if self.request_proxies and kwargs.get("proxies") is None:
+            kwargs["proxies"] = self.request_proxies
+        if self.budget is not None:
+            self.budget.check()
+            kwargs["timeout"] = self.budget.clamp_timeout(kwargs["timeout"])
+        if self.breaker is not None:
+            self.breaker.before_request()
+
+        started = time.perf_counter()
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.RequestException as e:
+            if self.breaker is not None:
+                # 时间预算截止前缩短的超时不代表服务故障
+                if self.budget is not None and self.budget.expired():
+                    self.breaker.release()
+                else:
+                    self.breaker.record(error=e)
+            if self.metrics is not None:
+                self.metrics.record_request(self.name, method, url, None, time.perf_counter() - started, 0,
+                                            error=type(e).__name__)
+            raise
+        except BaseException:
+            if self.breaker is not None:
+                self.breaker.release()
+            raise
+        if self.breaker is not None:
+            self.breaker.record(response=response)
+        if self.metrics is None:
+            return response
+
+        if kwargs.get("stream"):
+            size = int(response.headers.get("Content-Length") or 0)
+        else:
+            size = len(response.content)
+        self.metrics.record_request(self.name, method, url, response.status_code,
+                                    time.perf_counter() - started, size)
+        return response
+
+
+class HttpTransport:
+    """按上游服务管理共享的 Session，可在多线程中共用"""
+
+    def __init__(self, proxies=None, pool_size=10, metrics=None, budget=None, breakers=None):
+        self.proxies = proxies
+        self.pool_size = pool_size
+        # run_metrics.RunMetrics，记录每个请求
+        self.metrics = metrics
+        # run_budget.RunBudget，整次运行的截止时间
+        self.budget = budget
+        # circuit_breaker.CircuitBreakers，每个上游一个熔断器
+        self.breakers = breakers
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+        self.headers = {}
+        self.upstreams = {name: dict(config) for name, config in UPSTREAMS.items()}
+        self.host_map = {}
+        for name, config in self.upstreams.items():
+            for host in config["hosts"]:
+                self.host_map[host] = name
+
+    def configure(self, name, headers=None, pool_size=None, timeout=None):
+        """设置某个上游的默认请求头、连接池大小或超时（在第一次请求前调用）"""
+        if headers:
+            self.headers.setdefault(name, {}).update(headers)
+            if name in self.sessions:
+                self.sessions[name].headers.update(headers)
+        if pool_size:
+            self.upstreams[name]["pool_size"] = pool_size
+        if timeout:
+            self.upstreams[name]["timeout"] = timeout
+
+    def register_host(self, host, name):
+        """把域名（或 主机:端口）归到某个上游，例如自定义的火山引擎地址、本地模拟服务"""
+        if host:
+            self.host_map[host.lower()] = name
+
+    def session(self, name):
+        """获取上游对应的 Session，首次使用时创建（加锁，多个线程同时首次使用时只创建一个）"""
+        session = self.sessions.get(name)
+        if session is not None:
+            return session
+        with self.sessions_lock:
+            session = self.sessions.get(name)
+            if session is not None:
+                return session
+            config = self.upstreams[name]
+            breaker = self.breakers.get(name) if self.breakers else None
+            session = UpstreamSession(config["timeout"], name, self.metrics, self.budget, breaker)
+            pool_size = config.get("pool_size", self.pool_size)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            session.headers.update(self.headers.get(name, {}))
+            if config["proxy"] and self.proxies:
+                session.request_proxies = dict(self.proxies)
+            self.sessions[name] = session
+        return session
+
+    def upstream_for(self, url):
+        parts = urlsplit(url)
+        netloc = parts.netloc.lower()
+        if netloc in self.host_map:
+            return self.host_map[netloc]
+        return self.host_map.get((parts.hostname or "").lower(), "default")
+
+    def for_url(self, url):
+        """按URL的域名选择 Session"""
+        return self.session(self.upstream_for(url))
+
+    def available(self, name):
+        """上游当前是否会放行请求（没有熔断，或冷却已结束可以探测）"""
+        breaker = self.breakers.get(name) if self.breakers else None
+        return breaker is None or breaker.allows_requests()
+
+    def check(self, name):
+        """上游熔断中时抛出 CircuitOpenError（在占用限速器令牌之前调用）"""
+        breaker = self.breakers.get(name) if self.breakers else None
+        if breaker is not None:
+            breaker.check()
+
+    def connection_stats(self):
+        """每个上游的请求数、新建连接数和复用次数"""
+        stats = {}
+        for name, session in self.sessions.items():
+            requests_count = 0
+            connections = 0
+            for adapter in set(session.adapters.values()):
+                managers = [adapter.poolmanager] + list(adapter.proxy_manager.values())
+                for manager in managers:
+                    for key in list(manager.pools.keys()):
+                        pool = manager.pools.get(key)
+                        if pool is None:
+                            continue
+                        requests_count += pool.num_requests
+                        connections += pool.num_connections
+            stats[name] = {
+                "requests": requests_count,
+                "connections": connections,
+                "reused": max(0, requests_count - connections),
+            }
+        return stats
+
+    def summary(self):
+        parts = []
+        for name, item in self.connection_stats().items():
+            if item["requests"]:
+                parts.append(f"{name} {item['requests']}请求/{item['connections']}连接")
+        return " | ".join(parts) if parts else "无请求"
+
+    def close(self):
+        """关闭所有连接，保存熔断状态"""
+        for session in self.sessions.values():
+            session.close()
+        if self.breakers:
+            self.breakers.save()
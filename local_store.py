@@ -0,0 +1,432 @@
+"""
+本地持久化存储（SQLite）
+保存跨运行复用的数据，例如 AI 分析结果、Notion 数据库镜像、待写入 Notion 的队列
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+class AiAnalysisCache:
+    """
+    AI分析结果缓存
+    键为 仓库全名 + README内容哈希 + 模型 + 提示词版本；
+    同时保存README的校验信息（ETag或blob sha），用于在不下载README的情况下判断是否变化
+    """
+
+    def __init__(self, cache_dir, ttl_seconds=0, max_entries=5000):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "ai_cache.sqlite")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "validator_hits": 0, "misses": 0}
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                full_name TEXT NOT NULL,
+                readme_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                content TEXT NOT NULL,
+                validator TEXT,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (full_name, readme_hash, model, prompt_version)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_accessed ON analyses (accessed_at)")
+        self.conn.commit()
+        self._evict()
+
+    def get(self, full_name, readme_hash, model, prompt_version):
+        """按README内容哈希查找，未命中返回None"""
+        row = self._select(
+            "WHERE full_name = ? AND readme_hash = ? AND model = ? AND prompt_version = ?",
+            (full_name.lower(), readme_hash, model, prompt_version)
+        )
+        with self.lock:
+            self.stats["hits" if row else "misses"] += 1
+        return row["content"] if row else None
+
+    def latest(self, full_name, model, prompt_version):
+        """该仓库最近一次的分析结果（含README校验信息），用于下载README前的预检查"""
+        return self._select(
+            "WHERE full_name = ? AND model = ? AND prompt_version = ? AND validator IS NOT NULL "
+            "ORDER BY created_at DESC LIMIT 1",
+            (full_name.lower(), model, prompt_version)
+        )
+
+    def record_validator_hit(self, full_name, readme_hash, model, prompt_version):
+        with self.lock:
+            self.stats["validator_hits"] += 1
+            self.conn.execute(
+                "UPDATE analyses SET accessed_at = ? "
+                "WHERE full_name = ? AND readme_hash = ? AND model = ? AND prompt_version = ?",
+                (time.time(), full_name.lower(), readme_hash, model, prompt_version)
+            )
+            self.conn.commit()
+
+    def set_validator(self, full_name, readme_hash, model, prompt_version, validator):
+        """README内容相同但校验信息变化时（例如改用其他方式获取），更新保存的校验信息"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE analyses SET validator = ? "
+                "WHERE full_name = ? AND readme_hash = ? AND model = ? AND prompt_version = ?",
+                (validator, full_name.lower(), readme_hash, model, prompt_version)
+            )
+            self.conn.commit()
+
+    def put(self, full_name, readme_hash, model, prompt_version, content, validator=None):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO analyses "
+                "(full_name, readme_hash, model, prompt_version, content, validator, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (full_name.lower(), readme_hash, model, prompt_version, content, validator, now, now)
+            )
+            self.conn.commit()
+        self._evict()
+
+    def summary(self):
+        s = self.stats
+        return f"命中 {s['hits'] + s['validator_hits']} (其中免下载README {s['validator_hits']}) | 未命中 {s['misses']}"
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _select(self, where, params):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT full_name, readme_hash, content, validator, created_at FROM analyses " + where, params
+            ).fetchone()
+            if row and self.ttl_seconds and now - row[4] > self.ttl_seconds:
+                return None
+            if row:
+                self.conn.execute(
+                    "UPDATE analyses SET accessed_at = ? WHERE full_name = ? AND readme_hash = ?",
+                    (now, row[0], row[1])
+                )
+                self.conn.commit()
+        if not row:
+            return None
+        return {"full_name": row[0], "readme_hash": row[1], "content": row[2], "validator": row[3], "created_at": row[4]}
+
+    def _evict(self):
+        """删除过期条目，条目数超过上限时按最近使用时间淘汰"""
+        with self.lock:
+            if self.ttl_seconds:
+                self.conn.execute("DELETE FROM analyses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            count = self.conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM analyses WHERE rowid IN "
+                    "(SELECT rowid FROM analyses ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self.conn.commit()
+
+
+class NotionMirror:
+    """
+    Notion目标数据库的本地镜像
+    保存每个页面的 page_id、仓库键（owner/repo 小写）、last_edited_time 和上次写入的各属性哈希，
+    按仓库键建索引，写入时 O(1) 判断是新建、更新还是无需写入；
+    sync_state 记录每个数据库的同步游标（已同步到的最大 last_edited_time）和用于生成仓库键的字段
+    """
+
+    def __init__(self, cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "notion_mirror.sqlite")
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id TEXT PRIMARY KEY,
+                database_id TEXT NOT NULL,
+                repo_key TEXT NOT NULL,
+                last_edited_time TEXT,
+                synced_at REAL NOT NULL,
+                field_hashes TEXT
+            )
+        """)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(pages)")]
+        if "field_hashes" not in columns:
+            self.conn.execute("ALTER TABLE pages ADD COLUMN field_hashes TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_repo ON pages (database_id, repo_key)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                database_id TEXT PRIMARY KEY,
+                key_field TEXT NOT NULL,
+                cursor TEXT,
+                synced_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get_cursor(self, database_id, key_field):
+        """
+        返回同步游标，None 表示需要全量同步；
+        生成仓库键的字段变化时（例如字段映射改变）清空该数据库的镜像
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT key_field, cursor FROM sync_state WHERE database_id = ?", (database_id,)
+            ).fetchone()
+            if row and row[0] == key_field:
+                return row[1]
+            self.conn.execute("DELETE FROM pages WHERE database_id = ?", (database_id,))
+            self.conn.execute("DELETE FROM sync_state WHERE database_id = ?", (database_id,))
+            self.conn.commit()
+        return None
+
+    def set_cursor(self, database_id, key_field, cursor):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (database_id, key_field, cursor, synced_at) VALUES (?, ?, ?, ?)",
+                (database_id, key_field, cursor, time.time())
+            )
+            self.conn.commit()
+
+    def put_pages(self, database_id, pages):
+        """
+        批量写入同步到的 [(page_id, repo_key, last_edited_time)]，repo_key 为空的页面删除；
+        last_edited_time 与上次写入后记录的不同，说明页面在别处被修改过，清除保存的属性哈希
+        """
+        now = time.time()
+        with self.lock:
+            for page_id, repo_key, last_edited_time in pages:
+                if not repo_key:
+                    self.conn.execute("DELETE FROM pages WHERE page_id = ?", (page_id,))
+                    continue
+                self.conn.execute(
+                    "INSERT INTO pages (page_id, database_id, repo_key, last_edited_time, synced_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (page_id) DO UPDATE SET "
+                    "field_hashes = CASE WHEN pages.last_edited_time IS excluded.last_edited_time "
+                    "THEN pages.field_hashes ELSE NULL END, "
+                    "database_id = excluded.database_id, repo_key = excluded.repo_key, "
+                    "last_edited_time = excluded.last_edited_time, synced_at = excluded.synced_at",
+                    (page_id, database_id, repo_key, last_edited_time, now)
+                )
+            self.conn.commit()
+
+    def record_write(self, database_id, page_id, repo_key, last_edited_time, field_hashes):
+        """记录本次写入后的页面状态和各属性哈希"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(page_id, database_id, repo_key, last_edited_time, synced_at, field_hashes) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (page_id, database_id, repo_key, last_edited_time, time.time(), json.dumps(field_hashes))
+            )
+            self.conn.commit()
+
+    def lookup(self, database_id, repo_key):
+        """
+        仓库对应的页面（同一仓库有多个页面时取最近编辑的），没有返回None；
+        返回 {page_id, field_hashes}，field_hashes 为None表示不知道页面当前的内容
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT page_id, field_hashes FROM pages WHERE database_id = ? AND repo_key = ? "
+                "ORDER BY last_edited_time DESC LIMIT 1",
+                (database_id, repo_key)
+            ).fetchone()
+        if not row:
+            return None
+        return {"page_id": row[0], "field_hashes": json.loads(row[1]) if row[1] else None}
+
+    def remove(self, page_id):
+        """页面已归档或删除"""
+        with self.lock:
+            self.conn.execute("DELETE FROM pages WHERE page_id = ?", (page_id,))
+            self.conn.commit()
+
+    def count(self, database_id):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pages WHERE database_id = ?", (database_id,)).fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class Outbox:
+    """
+    写入Notion前的持久化队列（SQLite WAL，每次提交都落盘）
+    每次运行记录抓取和AI分析后的仓库数据，逐个确认写入结果；
+    运行中断后可以只写入未确认的项目，不必重新抓取和分析
+    runs.status: collecting（抓取/分析中）→ writing（写入中）→ done；
+    开始新的运行时，之前未完成的运行标记为 superseded（数据已过时，不再继续）
+    """
+
+    def __init__(self, cache_dir, keep_runs=10):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "outbox.sqlite")
+        self.keep_runs = keep_runs
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                run_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                full_name TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                action TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, full_name)
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def new_run_id():
+        """运行ID：开始时间（精确到毫秒）加随机后缀，同一秒内开始的两次运行也不会重复"""
+        return f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]}-{uuid.uuid4().hex[:4]}"
+
+    def start_run(self, run_id, repos):
+        """记录本次运行抓取到的仓库（状态 collecting），同时清理较早的运行"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("UPDATE runs SET status = 'superseded', updated_at = ? "
+                              "WHERE status IN ('collecting', 'writing')", (now,))
+            # 同一运行ID下不保留之前写入的项目
+            self.conn.execute("DELETE FROM items WHERE run_id = ?", (run_id,))
+            self.conn.execute("INSERT OR REPLACE INTO runs (run_id, status, started_at, updated_at) VALUES (?, ?, ?, ?)",
+                              (run_id, "collecting", now, now))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO items (run_id, seq, full_name, repo, state, updated_at) "
+                "VALUES (?, ?, ?, ?, 'pending', ?)",
+                [(run_id, seq, repo["full_name"], self._dump(repo), now) for seq, repo in enumerate(repos)]
+            )
+            self.conn.commit()
+        self._prune()
+
+    def add_repos(self, run_id, repos):
+        """向运行中追加仓库（流水线模式下抓取和补全是分批完成的），顺序接在已有项目之后"""
+        now = time.time()
+        with self.lock:
+            next_seq = self.conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM items WHERE run_id = ?", (run_id,)
+            ).fetchone()[0]
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO items (run_id, seq, full_name, repo, state, updated_at) "
+                "VALUES (?, ?, ?, ?, 'pending', ?)",
+                [(run_id, next_seq + offset, repo["full_name"], self._dump(repo), now)
+                 for offset, repo in enumerate(repos)]
+            )
+            self.conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+            self.conn.commit()
+
+    def update_repos(self, run_id, repos, status=None):
+        """保存AI分析后的仓库数据，可同时更新运行状态"""
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE items SET repo = ?, updated_at = ? WHERE run_id = ? AND full_name = ?",
+                [(self._dump(repo), now, run_id, repo["full_name"]) for repo in repos]
+            )
+            if status:
+                self.conn.execute("UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (status, now, run_id))
+            self.conn.commit()
+
+    def ack(self, run_id, full_name, action, attempts):
+        """确认单个项目已写入"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE items SET state = 'acked', action = ?, attempts = attempts + ?, error = NULL, updated_at = ? "
+                "WHERE run_id = ? AND full_name = ?",
+                (action, attempts, time.time(), run_id, full_name)
+            )
+            self.conn.commit()
+
+    def fail(self, run_id, full_name, attempts, error):
+        """记录写入失败，项目保持未确认"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE items SET attempts = attempts + ?, error = ?, updated_at = ? WHERE run_id = ? AND full_name = ?",
+                (attempts, error, time.time(), run_id, full_name)
+            )
+            self.conn.commit()
+
+    def finish_run(self, run_id):
+        """所有项目都已确认时标记运行完成，返回未确认的数量"""
+        with self.lock:
+            remaining = self.conn.execute(
+                "SELECT COUNT(*) FROM items WHERE run_id = ? AND state != 'acked'", (run_id,)
+            ).fetchone()[0]
+            if not remaining:
+                self.conn.execute("UPDATE runs SET status = 'done', updated_at = ? WHERE run_id = ?",
+                                  (time.time(), run_id))
+                self.conn.commit()
+        return remaining
+
+    def last_unfinished(self):
+        """最近一次未完成的运行 {run_id, status, started_at, total, pending}，没有返回None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT run_id, status, started_at FROM runs WHERE status IN ('collecting', 'writing') "
+                "ORDER BY started_at DESC LIMIT 1"
+            ).fetchone()
+            if not row:
+                return None
+            total, pending = self.conn.execute(
+                "SELECT COUNT(*), SUM(state != 'acked') FROM items WHERE run_id = ?", (row[0],)
+            ).fetchone()
+        return {"run_id": row[0], "status": row[1], "started_at": row[2], "total": total, "pending": pending or 0}
+
+    def load_repos(self, run_id, pending_only=True):
+        """按原顺序读取运行中的仓库数据"""
+        sql = "SELECT repo FROM items WHERE run_id = ?"
+        if pending_only:
+            sql += " AND state != 'acked'"
+        with self.lock:
+            rows = self.conn.execute(sql + " ORDER BY seq", (run_id,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _dump(self, repo):
+        # README原文不需要重放，不保存
+        return json.dumps({key: value for key, value in repo.items() if key != "readme"},
+                          ensure_ascii=False, default=str)
+
+    def _prune(self):
+        """只保留最近 keep_runs 次运行"""
+        with self.lock:
+            old_runs = self.conn.execute(
+                "SELECT run_id FROM runs ORDER BY started_at DESC LIMIT -1 OFFSET ?", (self.keep_runs,)
+            ).fetchall()
+            for (run_id,) in old_runs:
+                self.conn.execute("DELETE FROM items WHERE run_id = ?", (run_id,))
+                self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self.conn.commit()
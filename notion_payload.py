@@ -0,0 +1,178 @@
+"""
+Notion 属性序列化
+按字段映射和数据库结构，为每个 (字段, 属性) 预先生成专用的序列化函数：
+属性类型的分支判断、select 选项集合等只在编译时处理一次，之后构建每个仓库的属性只是一个简单循环；
+另外提供属性哈希，用于比较与上次写入的内容是否相同
+"""
+
+import hashlib
+import json
+
+# 值为None时仍然写入的字段（它们在仓库数据中有默认值）
+ALWAYS_WRITE_FIELDS = ("date", "today_stars")
+
+# 每次运行都会变化的字段（写入日期），不参与变化检测，只在页面有其他变化时随之更新
+VOLATILE_FIELDS = ("date",)
+
+
+def truncate_text(text, max_length=2000):
+    """安全截断文本"""
+    if not text:
+        return ""
+    text = str(text)
+    return text[:max_length] if len(text) > max_length else text
+
+
+def title_serializer(value):
+    return {"title": [{"text": {"content": truncate_text(value, 2000)}}]}
+
+
+def rich_text_serializer(value):
+    # rich_text 可以存储字符串
+    return {"rich_text": [{"text": {"content": truncate_text(value, 2000) if value else ""}}]}
+
+
+def text_serializer(value):
+    return {"text": {"content": truncate_text(value, 2000)}}
+
+
+def number_serializer(value):
+    if isinstance(value, (int, float)):
+        return {"number": value}
+    return None
+
+
+def url_serializer(value):
+    return {"url": value}
+
+
+def date_serializer(value):
+    # 只有当值是日期格式时才使用date类型
+    if isinstance(value, str) and len(value) >= 10:
+        return {"date": {"start": value}}
+    return None
+
+
+def email_serializer(value):
+    if "@" in str(value):
+        return {"email": str(value)}
+    return None
+
+
+def phone_serializer(value):
+    return {"phone_number": str(value)}
+
+
+def checkbox_serializer(value):
+    return {"checkbox": bool(value)}
+
+
+def topics_serializer(value):
+    # 不存在的选项由Notion自动创建，所以不需要检查已有选项
+    if not isinstance(value, list):
+        return None
+    selects = [{"name": str(item)} for item in value[:10]]  # 最多10个标签
+    if selects:
+        return {"multi_select": selects}
+    return None
+
+
+def make_select_serializer(prop_data):
+    """单选只写入数据库中已有的选项，选项集合在编译时计算一次"""
+    options = frozenset(opt["name"] for opt in prop_data.get("select", {}).get("options", []))
+
+    def select_serializer(value):
+        if not value:
+            return None
+        value_str = truncate_text(value, 100)
+        if value_str in options:
+            return {"select": {"name": value_str}}
+        return None
+    return select_serializer
+
+
+SIMPLE_SERIALIZERS = {
+    "title": title_serializer,
+    "rich_text": rich_text_serializer,
+    "text": text_serializer,
+    "number": number_serializer,
+    "url": url_serializer,
+    "date": date_serializer,
+    "email": email_serializer,
+    "phone": phone_serializer,
+    "checkbox": checkbox_serializer,
+}
+
+
+def compile_property_serializers(field_mapping, db_properties):
+    """
+    返回 [(字段, 属性名, 值为None时是否跳过, 序列化函数)]，顺序与 field_mapping 一致；
+    写不进去的组合（例如非topics字段对应multi_select、不支持的属性类型）在编译时直接去掉
+    """
+    compiled = []
+    for field_key, prop_name in field_mapping.items():
+        prop_data = db_properties[prop_name]
+        prop_type = prop_data.get("type")
+        if prop_type in SIMPLE_SERIALIZERS:
+            serializer = SIMPLE_SERIALIZERS[prop_type]
+        elif prop_type == "multi_select" and field_key == "topics":
+            serializer = topics_serializer
+        elif prop_type == "select":
+            serializer = make_select_serializer(prop_data)
+        else:
+            continue
+        compiled.append((field_key, prop_name, field_key not in ALWAYS_WRITE_FIELDS, serializer))
+    return compiled
+
+
+def serialize_properties(compiled, repo):
+    """用编译好的序列化函数构建一个仓库的Notion属性"""
+    properties = {}
+    get = repo.get
+    for field_key, prop_name, skip_none, serializer in compiled:
+        value = get(field_key)
+        if value is None and skip_none:
+            continue
+        prop_value = serializer(value)
+        if prop_value is not None:
+            properties[prop_name] = prop_value
+    return properties
+
+
+def property_plain_text(prop):
+    """从查询到的页面属性中取出文本值（title/rich_text/url/select 等），取不到返回空字符串"""
+    if not prop:
+        return ""
+    prop_type = prop.get("type")
+    value = prop.get(prop_type)
+    if prop_type in ("title", "rich_text"):
+        return "".join(item.get("plain_text", "") for item in value or [])
+    if prop_type in ("url", "email", "phone_number"):
+        return value or ""
+    if prop_type == "select":
+        return (value or {}).get("name", "")
+    return ""
+
+
+def property_hashes(properties):
+    """每个属性值的哈希 {属性名: 哈希}，用于与上次写入的内容比较"""
+    return {
+        name: hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+        for name, value in properties.items()
+    }
+
+
+def changed_properties(properties, hashes, previous_hashes, volatile_names=()):
+    """
+    返回需要写入的属性：与上次写入不同的属性，有变化时再加上易变属性（如写入日期）；
+    没有变化返回空字典
+    """
+    changed = {
+        name: value for name, value in properties.items()
+        if name not in volatile_names and previous_hashes.get(name) != hashes[name]
+    }
+    if changed:
+        for name in volatile_names:
+            if name in properties:
+                changed[name] = properties[name]
+    return changed
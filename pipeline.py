@@ -0,0 +1,202 @@
+"""
+流水线执行器
+把处理过程拆成若干阶段，阶段之间用有界队列连接，每个阶段有自己的线程数，可以按批处理；
+下游处理不过来时队列填满，上游放入时等待（背压），不会在内存中无限堆积。
+每个阶段记录处理数量、忙碌时间和因背压等待的时间，用于输出利用率
+"""
+
+import math
+import queue
+import threading
+import time
+
+# 结束标记：上游全部处理完后放入下游队列
+_END = object()
+
+
+def percentile(values, fraction):
+    """最近秩百分位数（fraction 取 0～1），values 为空时返回0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Stage:
+    """
+    流水线的一个阶段
+    name 用于统计和报告，label 用于输出（默认同 name）；
+    handler(item) 返回交给下一阶段的项目列表（可以为空）；batch_size > 1 时 handler 收到项目列表，
+    队列中暂时没有更多项目时最多等待 batch_wait 秒凑批；on_close 在本阶段全部处理完后调用一次
+    """
+
+    def __init__(self, name, handler, workers=1, batch_size=1, batch_wait=0.2, on_close=None, label=None):
+        self.name = name
+        self.label = label or name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self.on_close = on_close
+        self.inbox = None
+        self.downstream = None
+        self.lock = threading.Lock()
+        self.active_workers = 0
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.closed_at = None
+
+
+class Pipeline:
+    """
+    按顺序连接各阶段；run() 把输入送入第一个阶段，阻塞到最后一个阶段处理完
+    on_sample(阶段名, 秒) 在每次 handler 调用后回调，用于记录每个项目/批次的耗时分布
+    """
+
+    def __init__(self, stages, queue_size=20, on_sample=None):
+        self.stages = stages
+        self.on_sample = on_sample
+        for stage, downstream in zip(stages, stages[1:] + [None]):
+            # 队列至少能放下一批，否则凑批时只能等超时
+            stage.inbox = queue.Queue(maxsize=max(queue_size, stage.batch_size))
+            stage.downstream = downstream
+        self.cancelled = False
+        self.started_at = None
+        self.finished_at = None
+
+    def cancel(self):
+        """之后取出的项目不再处理（已在处理中的照常完成），各阶段照常结束"""
+        self.cancelled = True
+
+    def run(self, items):
+        self.started_at = time.perf_counter()
+        threads = []
+        for stage in self.stages:
+            stage.active_workers = stage.workers
+            for index in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(stage,),
+                                          name=f"{stage.name}-{index}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        first = self.stages[0]
+        for item in items:
+            if self.cancelled:
+                break
+            first.inbox.put(item)
+        first.inbox.put(_END)
+
+        for thread in threads:
+            thread.join()
+        self.finished_at = time.perf_counter()
+
+    def _work(self, stage):
+        finished = False
+        while not finished:
+            batch, finished = self._take(stage)
+            if batch:
+                self._process(stage, batch)
+
+        with stage.lock:
+            stage.active_workers -= 1
+            last = stage.active_workers == 0
+        if not last:
+            return
+        stage.closed_at = time.perf_counter()
+        if stage.on_close and not self.cancelled:
+            try:
+                stage.on_close()
+            except Exception as e:
+                print(f"  ✗ [{stage.label}] 结束处理失败: {e}")
+        if stage.downstream:
+            stage.downstream.inbox.put(_END)
+
+    def _take(self, stage):
+        """取出一个项目或一批项目，返回 (项目列表, 是否已收到结束标记)"""
+        item = stage.inbox.get()
+        if item is _END:
+            # 放回去留给同一阶段的其他线程
+            stage.inbox.put(_END)
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + stage.batch_wait
+        while len(batch) < stage.batch_size:
+            try:
+                item = stage.inbox.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _END:
+                stage.inbox.put(_END)
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _process(self, stage, batch):
+        with stage.lock:
+            stage.items_in += len(batch)
+        if self.cancelled:
+            return
+
+        started = time.perf_counter()
+        try:
+            outputs = stage.handler(batch if stage.batch_size > 1 else batch[0]) or []
+        except Exception as e:
+            outputs = []
+            with stage.lock:
+                stage.errors += 1
+            print(f"  ✗ [{stage.label}] 处理失败: {e}")
+        busy = time.perf_counter() - started
+        if self.on_sample:
+            self.on_sample(stage.name, busy)
+
+        blocked = 0.0
+        if stage.downstream:
+            for output in outputs:
+                put_started = time.perf_counter()
+                stage.downstream.inbox.put(output)
+                blocked += time.perf_counter() - put_started
+
+        with stage.lock:
+            stage.busy += busy
+            stage.blocked += blocked
+            stage.items_out += len(outputs)
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def stats(self):
+        """每个阶段的 {name, label, workers, items_in, items_out, errors, busy, blocked, wall, utilization}"""
+        wall = max(self.elapsed(), 1e-6)
+        end = self.finished_at or time.perf_counter()
+        return [
+            {
+                "name": stage.name,
+                "label": stage.label,
+                "workers": stage.workers,
+                "items_in": stage.items_in,
+                "items_out": stage.items_out,
+                "errors": stage.errors,
+                "busy": stage.busy,
+                "blocked": stage.blocked,
+                # 从流水线开始到本阶段结束
+                "wall": (stage.closed_at or end) - self.started_at if self.started_at else 0.0,
+                # 忙碌时间 / (线程数 × 流水线总耗时)
+                "utilization": stage.busy / (stage.workers * wall),
+            }
+            for stage in self.stages
+        ]
+
+    def summary_lines(self):
+        lines = []
+        for item in self.stats():
+            error_display = f" | 失败 {item['errors']}" if item["errors"] else ""
+            lines.append(f"{item['label']:6} 线程 {item['workers']:2} | 输入 {item['items_in']:3} 输出 {item['items_out']:3} | "
+                         f"忙碌 {item['busy']:6.1f}s | 利用率 {item['utilization'] * 100:3.0f}% | "
+                         f"背压等待 {item['blocked']:.1f}s{error_display}")
+        return lines
@@ -0,0 +1,210 @@
+"""
+性能剖析（profile 子命令）
+在 cProfile 和 tracemalloc 下执行一次同步，输出三个文件：
+- .pstats: 所有线程的函数耗时，可用 python -m pstats 或 snakeviz 查看
+- .collapsed.txt: 折叠栈（每行 "线程;帧;帧;... 次数"），可直接交给 flamegraph.pl / speedscope / inferno 生成火焰图；
+  由后台线程定时采样所有线程的调用栈得到，反映墙钟时间，等待网络和锁的时间也在其中
+- .alloc.txt: 内存占用峰值附近分配最多的代码位置
+"""
+
+import cProfile
+import linecache
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+# 工作线程名的序号后缀（notion-0、ThreadPoolExecutor-0_3），同一组线程在折叠栈中合并
+THREAD_SUFFIX_PATTERN = re.compile(r'[-_]\d+$')
+
+
+class StackSampler:
+    """
+    后台线程，每 interval 秒采样一次所有线程（自身除外）的调用栈，累计为折叠栈；
+    同时每 memory_interval 秒检查一次 tracemalloc 的当前占用，创新高时保存快照
+    """
+
+    def __init__(self, interval=0.005, memory_interval=1.0):
+        self.interval = interval
+        self.memory_interval = memory_interval
+        self.counts = {}
+        self.samples = 0
+        self.peak_snapshot = None
+        self.peak_traced = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        next_memory_check = time.monotonic()
+        while not self.stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                root = THREAD_SUFFIX_PATTERN.sub("", names.get(thread_id, "thread"))
+                key = ";".join([root] + stack[::-1])
+                self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+            if tracemalloc.is_tracing() and time.monotonic() >= next_memory_check:
+                next_memory_check = time.monotonic() + self.memory_interval
+                self.check_memory()
+
+    def check_memory(self):
+        """当前占用比已保存的快照高出10%以上时重新拍快照（快照开销较大，不每次都拍）"""
+        traced, _ = tracemalloc.get_traced_memory()
+        if traced > self.peak_traced * 1.1:
+            self.peak_traced = traced
+            self.peak_snapshot = tracemalloc.take_snapshot()
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for key, count in sorted(self.counts.items()):
+                f.write(f"{key} {count}\n")
+
+
+class ThreadProfiler:
+    """
+    覆盖所有线程的 cProfile：Python 3.12 之前 cProfile 只剖析调用 enable() 的线程，
+    用 threading.setprofile 在每个新线程启动时为其创建一个 Profile，结束时合并；
+    3.12 起 cProfile 基于 sys.monitoring，一个 Profile 即对所有线程生效
+    """
+
+    def __init__(self):
+        self.main = cProfile.Profile()
+        self.thread_profilers = []
+        self.lock = threading.Lock()
+        self.per_thread = sys.version_info < (3, 12)
+
+    def _start_thread(self, frame, event, arg):
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        with self.lock:
+            self.thread_profilers.append(profiler)
+        profiler.enable()
+
+    def start(self):
+        if self.per_thread:
+            threading.setprofile(self._start_thread)
+        self.main.enable()
+
+    def stop(self):
+        self.main.disable()
+        if self.per_thread:
+            threading.setprofile(None)
+
+    def stats(self):
+        stats = pstats.Stats(self.main)
+        with self.lock:
+            profilers = list(self.thread_profilers)
+        for profiler in profilers:
+            try:
+                stats.add(profiler)
+            except TypeError:
+                # 线程没有执行任何Python函数，没有数据
+                pass
+        return stats
+
+
+def format_allocations(snapshot, traced, peak, top):
+    """按代码行汇总快照中的内存分配，返回文本行"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ))
+    statistics = snapshot.statistics("lineno")
+    lines = [
+        f"峰值 {peak / 1024 / 1024:.1f} MB，快照时占用 {traced / 1024 / 1024:.1f} MB，"
+        f"共 {len(statistics)} 个分配位置，以下为占用最多的 {min(top, len(statistics))} 个",
+        "",
+    ]
+    for rank, stat in enumerate(statistics[:top], 1):
+        frame = stat.traceback[0]
+        lines.append(f"{rank:3}. {stat.size / 1024:10.1f} KB {stat.count:8} 个  {frame.filename}:{frame.lineno}")
+        source = linecache.getline(frame.filename, frame.lineno).strip()
+        if source:
+            lines.append(f"     {source}")
+    return lines
+
+
+def top_functions(stats, count):
+    """按自身耗时排序的前 count 个函数 [(自身秒, 累计秒, 调用次数, 名称)]"""
+    rows = []
+    for (filename, lineno, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        label = name if filename == "~" else f"{name} ({os.path.basename(filename)}:{lineno})"
+        rows.append((own, cumulative, calls, label))
+    rows.sort(reverse=True)
+    return rows[:count]
+
+
+def profile_call(func, output_dir, name="sync", interval=0.005, top=30, frames=10):
+    """
+    在 cProfile、调用栈采样和 tracemalloc 下执行 func()，写出 pstats / 折叠栈 / 内存分配 三个文件，
+    返回 {pstats, collapsed, allocations} 文件路径
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    paths = {
+        "pstats": f"{prefix}.pstats",
+        "collapsed": f"{prefix}.collapsed.txt",
+        "allocations": f"{prefix}.alloc.txt",
+    }
+
+    # 采样线程先于 cProfile 启动，自身不被剖析
+    sampler = StackSampler(interval=interval)
+    profiler = ThreadProfiler()
+    tracemalloc.start(frames)
+    sampler.start()
+    profiler.start()
+    started = time.perf_counter()
+    try:
+        func()
+    finally:
+        elapsed = time.perf_counter() - started
+        profiler.stop()
+        sampler.stop()
+        traced, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        stats = profiler.stats()
+        stats.dump_stats(paths["pstats"])
+        sampler.write_collapsed(paths["collapsed"])
+        # 结束时的占用不低于运行中的最高快照时用结束时的快照，否则用峰值附近的快照
+        if sampler.peak_snapshot is not None and sampler.peak_traced > traced:
+            snapshot, traced = sampler.peak_snapshot, sampler.peak_traced
+        allocation_lines = format_allocations(snapshot, traced, peak, top)
+        with open(paths["allocations"], "w", encoding="utf-8") as f:
+            f.write("\n".join(allocation_lines) + "\n")
+
+        print("\n" + "=" * 60)
+        print(f"🔬 性能剖析（总耗时 {elapsed:.1f}s，剖析本身会使运行变慢）")
+        print(f"  pstats:  {paths['pstats']}（python -m pstats 或 snakeviz 查看）")
+        print(f"  折叠栈:  {paths['collapsed']}（{sampler.samples} 次采样，可用 flamegraph.pl / speedscope 生成火焰图）")
+        print(f"  内存分配: {paths['allocations']}（{allocation_lines[0]}）")
+        print("  自身耗时最多的函数:")
+        for own, cumulative, calls, label in top_functions(stats, 10):
+            print(f"    {own:7.3f}s 自身 | {cumulative:7.3f}s 累计 | {calls:7} 次 | {label}")
+        print("=" * 60)
+    return paths
@@ -0,0 +1,84 @@
+"""
+限速工具
+令牌桶（平均速率 + 突发容量）与并发上限，可在多线程间共享；
+收到 429 时可让所有调用方一起暂停到 Retry-After 指定的时间
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value, default=1.0):
+    """解析 Retry-After 头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimiter:
+    """
+    令牌桶限速器
+    rate 为每秒平均请求数（<=0 表示不限速），burst 为允许的突发请求数，
+    max_concurrent 为同时进行的请求数上限；用法: with limiter: 发送请求
+    """
+
+    def __init__(self, rate, burst=None, max_concurrent=None):
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate)
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.semaphore = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self.wait_time = 0.0
+
+    def acquire(self):
+        """取得一个令牌，必要时等待"""
+        started = time.monotonic()
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.rate <= 0:
+                    break
+                else:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+        with self.lock:
+            self.wait_time += time.monotonic() - started
+
+    def pause(self, seconds):
+        """所有调用方暂停 seconds 秒（收到 429 Retry-After 时使用）"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+    def __enter__(self):
+        if self.semaphore:
+            self.semaphore.acquire()
+        try:
+            self.acquire()
+        except BaseException:
+            if self.semaphore:
+                self.semaphore.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.semaphore:
+            self.semaphore.release()
+        return False
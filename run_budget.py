@@ -0,0 +1,151 @@
+"""
+运行时间预算
+整次运行有一个截止时间，各阶段在发请求、重试和等待前查询剩余时间：
+- 请求超时和重试等待不超过剩余时间，截止后不再发出请求（抛出 DeadlineExceeded）
+- 已用时间超过预算的一定比例时按固定顺序降级: 跳过README探测 → 跳过AI分析 → 写入时不带AI总结
+降级的时间点、原因和受影响的项目数写入运行报告
+"""
+
+import threading
+import time
+
+import requests
+
+# 降级步骤（按触发顺序）: (步骤, 说明)
+DEGRADE_STEPS = (
+    ("readme", "跳过README探测"),
+    ("ai", "跳过AI分析"),
+    ("detail", "写入时不带AI总结"),
+)
+DEFAULT_DEGRADE_AT = (0.5, 0.7, 0.85)
+# 截止时间前剩余很少时，请求超时至少保留的秒数
+MIN_TIMEOUT = 0.5
+
+
+class DeadlineExceeded(requests.RequestException):
+    """运行时间预算已用完，请求没有发出"""
+
+
+def parse_degrade_at(text):
+    """解析 RUN_DEGRADE_AT（逗号分隔的三个比例），格式不对时使用默认值"""
+    try:
+        values = tuple(float(item) for item in text.split(",") if item.strip())
+    except ValueError:
+        values = ()
+    if len(values) != len(DEGRADE_STEPS) or not all(0 < value <= 1 for value in values):
+        return DEFAULT_DEGRADE_AT
+    # 保证按固定顺序触发
+    return tuple(sorted(values))
+
+
+class RunBudget:
+    """
+    可在多线程间共享；seconds <= 0 表示不限时（所有方法都不改变原来的行为）
+    degraded(step) 在已用比例达到该步骤的阈值时返回True，同时记录之前尚未记录的步骤
+    """
+
+    def __init__(self, seconds, degrade_at=DEFAULT_DEGRADE_AT):
+        self.seconds = seconds
+        self.degrade_at = dict(zip((step for step, _ in DEGRADE_STEPS), degrade_at))
+        self.started_at = time.monotonic()
+        self.lock = threading.Lock()
+        # {步骤: {at, reason}}，按触发顺序
+        self.degradations = {}
+        # 各步骤实际跳过的项目数，另有 write: 截止后未写入的项目数
+        self.skipped = {}
+
+    @property
+    def limited(self):
+        return self.seconds > 0
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def remaining(self):
+        """剩余秒数，不限时返回None"""
+        if not self.limited:
+            return None
+        return max(0.0, self.seconds - self.elapsed())
+
+    def expired(self):
+        return self.limited and self.remaining() <= 0
+
+    def check(self):
+        """截止后抛出 DeadlineExceeded"""
+        if self.expired():
+            raise DeadlineExceeded(f"运行时间预算 {self.seconds:.0f}s 已用完")
+
+    def clamp(self, seconds):
+        """等待时间不超过剩余时间"""
+        remaining = self.remaining()
+        return seconds if remaining is None else min(seconds, remaining)
+
+    def clamp_timeout(self, timeout):
+        """请求超时（秒数或 (连接, 读取)）不超过剩余时间，至少保留 MIN_TIMEOUT"""
+        remaining = self.remaining()
+        if remaining is None or timeout is None:
+            return timeout
+        limit = max(MIN_TIMEOUT, remaining)
+        if isinstance(timeout, tuple):
+            return tuple(min(value, limit) if value is not None else limit for value in timeout)
+        return min(timeout, limit)
+
+    def sleep(self, seconds):
+        """重试退避等待，截止时间之后的部分不再等待"""
+        seconds = self.clamp(seconds)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def degraded(self, step):
+        if not self.limited:
+            return False
+        if step in self.degradations:
+            return True
+        elapsed = self.elapsed()
+        if elapsed < self.seconds * self.degrade_at[step]:
+            return False
+
+        with self.lock:
+            for name, label in DEGRADE_STEPS:
+                if name not in self.degradations:
+                    reason = (f"已用 {elapsed:.0f}s / {self.seconds:.0f}s（{elapsed / self.seconds:.0%}），"
+                              f"达到 {self.degrade_at[name]:.0%}")
+                    self.degradations[name] = {"at": round(elapsed, 3), "reason": reason}
+                    print(f"  ⏳ 时间预算: {reason}，之后{label}")
+                if name == step:
+                    break
+        return True
+
+    def skip(self, step, count=1):
+        """记录因降级或截止而跳过的项目数"""
+        with self.lock:
+            self.skipped[step] = self.skipped.get(step, 0) + count
+
+    def report(self):
+        """运行报告中的 budget 字段"""
+        with self.lock:
+            degradations = dict(self.degradations)
+            skipped = dict(self.skipped)
+        return {
+            "seconds": self.seconds,
+            "elapsed": round(self.elapsed(), 3),
+            "expired": self.expired(),
+            "degraded": [
+                {"step": step, "label": label, "at": degradations[step]["at"],
+                 "reason": degradations[step]["reason"], "skipped": skipped.get(step, 0)}
+                for step, label in DEGRADE_STEPS if step in degradations
+            ],
+            "unwritten": skipped.get("write", 0),
+        }
+
+    def summary(self):
+        """一行说明；不限时或没有降级时返回空字符串"""
+        if not self.limited:
+            return ""
+        report = self.report()
+        if not report["degraded"] and not report["unwritten"]:
+            return ""
+        parts = [f"{item['label']}（{item['at']:.0f}s 起，{item['skipped']} 个）" for item in report["degraded"]]
+        if report["unwritten"]:
+            parts.append(f"截止后未写入 {report['unwritten']} 个")
+        return f"用时 {report['elapsed']:.0f}s / {self.seconds:.0f}s | " + "，".join(parts)
@@ -0,0 +1,168 @@
+"""
+运行指标
+记录每个HTTP请求的延迟、状态码、字节数和重试序号（按主机和端口分组），以及各阶段的耗时，
+运行结束时汇总为 p50/p95/最大值，写成JSON运行报告，供桌面客户端和监控读取
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from pipeline import percentile
+
+REPORT_VERSION = 1
+
+
+def latency_summary(values):
+    """{count, avg, p50, p95, max}，单位秒"""
+    if not values:
+        return {"count": 0, "avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "count": len(values),
+        "avg": round(sum(values) / len(values), 4),
+        "p50": round(percentile(values, 0.5), 4),
+        "p95": round(percentile(values, 0.95), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def request_host(url):
+    """分组用的主机名；非默认端口保留端口号，本机不同端口的模拟服务分别统计"""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != {"http": 80, "https": 443}.get(parts.scheme):
+        return f"{host}:{port}"
+    return host
+
+
+class RunMetrics:
+    """可在多线程间共享；HTTP请求由 http_transport 自动记录，阶段耗时用 timed() 记录"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+        self.requests = []
+        self.stages = {}
+        self.stage_walls = {}
+        self.local = threading.local()
+
+    @contextmanager
+    def attempt(self, number):
+        """标记当前线程接下来的请求是第几次尝试（重试循环中使用），用于统计重试次数"""
+        previous = getattr(self.local, "attempt", 1)
+        self.local.attempt = number
+        try:
+            yield
+        finally:
+            self.local.attempt = previous
+
+    def record_request(self, upstream, method, url, status, latency, size, error=""):
+        item = {
+            "upstream": upstream,
+            "host": request_host(url),
+            "method": method.upper(),
+            "status": status,
+            "latency": latency,
+            "bytes": size,
+            "attempt": getattr(self.local, "attempt", 1),
+            "error": error,
+        }
+        with self.lock:
+            self.requests.append(item)
+
+    @contextmanager
+    def timed(self, stage):
+        """记录一次阶段执行的耗时（逐步执行时每个阶段一次，流水线中每个项目/批次一次）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - started)
+
+    def record_stage(self, stage, seconds):
+        with self.lock:
+            self.stages.setdefault(stage, []).append(seconds)
+
+    def set_stage_wall(self, stage, seconds):
+        """阶段从开始到结束的墙钟时间（流水线中各阶段重叠，单独记录）"""
+        with self.lock:
+            self.stage_walls[stage] = seconds
+
+    def host_stats(self):
+        with self.lock:
+            requests = list(self.requests)
+        hosts = {}
+        for item in requests:
+            hosts.setdefault(item["host"], []).append(item)
+
+        stats = {}
+        for host, items in sorted(hosts.items()):
+            statuses = {}
+            for item in items:
+                key = str(item["status"]) if item["status"] is not None else (item["error"] or "error")
+                statuses[key] = statuses.get(key, 0) + 1
+            stats[host] = {
+                "upstream": items[0]["upstream"],
+                "requests": len(items),
+                "errors": sum(1 for item in items if item["status"] is None or item["status"] >= 400),
+                "retries": sum(1 for item in items if item["attempt"] > 1),
+                "bytes": sum(item["bytes"] for item in items),
+                "statuses": statuses,
+                "latency": latency_summary([item["latency"] for item in items]),
+            }
+        return stats
+
+    def stage_stats(self):
+        with self.lock:
+            stages = {stage: list(values) for stage, values in self.stages.items()}
+            walls = dict(self.stage_walls)
+        stats = {}
+        for stage, values in stages.items():
+            stats[stage] = {
+                "total": round(sum(values), 4),
+                "wall": round(walls.get(stage, sum(values)), 4),
+                "latency": latency_summary(values),
+            }
+        return stats
+
+    def report(self, **extra):
+        """运行报告字典；extra 中的字段（状态、写入结果、流水线统计等）原样并入"""
+        finished_at = time.time()
+        report = {
+            "version": REPORT_VERSION,
+            "started_at": self.started_at,
+            "finished_at": finished_at,
+            "duration": round(finished_at - self.started_at, 3),
+            "stages": self.stage_stats(),
+            "hosts": self.host_stats(),
+        }
+        report.update(extra)
+        return report
+
+    def write_report(self, path, **extra):
+        """先写临时文件再替换，读取方不会读到写了一半的报告"""
+        report = self.report(**extra)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+        return report
+
+    def summary(self):
+        """每个主机一段: 请求数、p95、重试数；带端口的主机（如本机模拟服务）附上上游名"""
+        parts = []
+        for host, item in self.host_stats().items():
+            retry_display = f" 重试{item['retries']}" if item["retries"] else ""
+            label = f"{host}({item['upstream']})" if ":" in host else host
+            parts.append(f"{label} {item['requests']}请求 p95 {item['latency']['p95']:.2f}s{retry_display}")
+        return " | ".join(parts) if parts else "无请求"